@@ -0,0 +1,88 @@
+""" Measures the time needed to dispatch a message to the handlers of a HandlerList.
+
+Compares the compiled dispatch tables of HandlerList with the filter loop that was used before,
+for lists of 1, 5 and 20 handlers with mixed filters.
+
+Run from the root of the repository:
+
+    python -m benchmarks.handler_dispatch
+
+"""
+
+import timeit
+
+from nervix import verbs
+from nervix.channel import HandlerList, MessageStatus, MESSAGE_STATUSES
+
+N = 200000
+
+FILTERS = [
+    MessageStatus.ANY,
+    MessageStatus.OK,
+    MessageStatus.NOT_OK,
+    MessageStatus.TIMEOUT,
+    MessageStatus.UNREACHABLE,
+]
+
+
+def handler(msg):
+    pass
+
+
+class LoopHandlerList:
+    """ The HandlerList as it was before the dispatch tables were introduced.
+    """
+
+    def __init__(self):
+        self.handlers = list()
+
+    def add(self, handler, filter):
+        self.handlers.append((handler, filter))
+
+    def call(self, call_filter, *args, **kwargs):
+
+        for handler, handler_filter in self.handlers:
+
+            if call_filter is None or call_filter & handler_filter:
+                handler(*args, **kwargs)
+
+
+def from_verb(verb):
+    """ MessageStatus.from_verb() as it was before the dispatch tables were introduced.
+    """
+
+    if verb.status == verbs.MessageVerb.STATUS_OK:
+        return MessageStatus.OK
+
+    elif verb.status == verbs.MessageVerb.STATUS_TIMEOUT:
+        return MessageStatus.TIMEOUT
+
+    elif verb.status == verbs.MessageVerb.STATUS_UNREACHABLE:
+        return MessageStatus.UNREACHABLE
+
+    else:
+        return MessageStatus.NONE
+
+
+def main():
+    verb = verbs.MessageVerb(messageref=1, status=verbs.MessageVerb.STATUS_OK, payload=b'')
+
+    print(f"Time per dispatch of an OK message, averaged over {N} dispatches:")
+
+    for nr_handlers in (1, 5, 20):
+        loop_list = LoopHandlerList()
+        table_list = HandlerList(MESSAGE_STATUSES)
+
+        for i in range(nr_handlers):
+            loop_list.add(handler, FILTERS[i % len(FILTERS)])
+            table_list.add(handler, FILTERS[i % len(FILTERS)])
+
+        loop_time = timeit.timeit(lambda: loop_list.call(from_verb(verb), None), number=N)
+        table_time = timeit.timeit(lambda: table_list.call_status(verb.status, None), number=N)
+
+        print("  %2d handlers: loop %6.0f ns, table %6.0f ns" % (
+            nr_handlers, loop_time / N * 1e9, table_time / N * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+""" Measures the memory needed to keep track of 1M outstanding requests.
+
+Compares the SlotTable used by Core with the dict that was used before it.
+
+Run from the root of the repository:
+
+    python -m benchmarks.messageref_memory
+
+"""
+
+import tracemalloc
+
+from nervix.util.slots import SlotTable
+
+N = 1000000
+
+
+class PendingRequest:
+    """ Stand-in for a Request, only used to obtain a bound method per request.
+    """
+
+    __slots__ = ()
+
+    def on_message(self, verb):
+        pass
+
+
+def measure(func):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    keep = func()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del keep
+    return used
+
+
+def fill_dict(handlers):
+    table = dict()
+    next_ref = 1
+    for handler in handlers:
+        table[next_ref] = handler
+        next_ref += 1
+    return table
+
+
+def fill_slot_table(handlers):
+    table = SlotTable()
+    for handler in handlers:
+        table.add(handler)
+    return table
+
+
+def main():
+    shared = [PendingRequest().on_message] * N
+
+    print(f"Table memory with {N} outstanding requests (shared handler):")
+    print("  dict:      %6.1f MiB" % (measure(lambda: fill_dict(shared)) / 2 ** 20))
+    print("  SlotTable: %6.1f MiB" % (measure(lambda: fill_slot_table(shared)) / 2 ** 20))
+
+    del shared
+
+    print(f"Total memory with {N} outstanding requests (bound method per request):")
+    print("  dict:      %6.1f MiB" % (
+        measure(lambda: fill_dict([PendingRequest().on_message for _ in range(N)])) / 2 ** 20))
+    print("  SlotTable: %6.1f MiB" % (
+        measure(lambda: fill_slot_table([PendingRequest().on_message for _ in range(N)])) / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+""" Compares the StructSerializer with JSON text encoded by the StringSerializer.
+
+Uses a typical call payload (an order) and a typical post payload (a quote with 10 price levels
+on both sides), and reports the encoded size and the time to encode and decode each.
+
+Run from the root of the repository:
+
+    python -m benchmarks.struct_serializer
+
+"""
+
+import json
+import timeit
+
+from nervix.serializers.string import StringSerializer
+from nervix.serializers.structured import StructSerializer, Record, List, String
+
+N = 50000
+
+ORDER_SCHEMA = Record(
+    ('order_id', 'uint64'),
+    ('account', String(16)),
+    ('symbol', String(8)),
+    ('side', 'int8'),
+    ('quantity', 'uint32'),
+    ('price', 'float64'),
+    ('comment', String()),
+)
+
+ORDER = {
+    'order_id': 1234567890123,
+    'account': 'ACC-000123',
+    'symbol': 'EURUSD',
+    'side': 1,
+    'quantity': 250000,
+    'price': 1.08765,
+    'comment': 'rebalance',
+}
+
+LEVEL = Record(('price', 'float64'), ('size', 'uint32'))
+
+QUOTE_SCHEMA = Record(
+    ('symbol', String(8)),
+    ('time', 'float64'),
+    ('sequence', 'uint32'),
+    ('bids', List(LEVEL)),
+    ('asks', List(LEVEL)),
+)
+
+QUOTE = {
+    'symbol': 'EURUSD',
+    'time': 1700000000.123456,
+    'sequence': 987654,
+    'bids': [{'price': 1.08765 - i * 0.00001, 'size': 1000000 + i * 50000} for i in range(10)],
+    'asks': [{'price': 1.08766 + i * 0.00001, 'size': 1000000 + i * 50000} for i in range(10)],
+}
+
+
+class JsonSerializer:
+    """ JSON text on top of the StringSerializer, the way structured payloads are usually sent.
+    """
+
+    def __init__(self):
+        self.string = StringSerializer()
+
+    def encode(self, obj):
+        return self.string.encode(json.dumps(obj))
+
+    def decode(self, bts):
+        return json.loads(self.string.decode(bts))
+
+
+def measure(name, serializer, obj):
+    payload = serializer.encode(obj)
+
+    encode_time = timeit.timeit(lambda: serializer.encode(obj), number=N) / N
+    decode_time = timeit.timeit(lambda: serializer.decode(payload), number=N) / N
+
+    print("  %-6s %5d bytes, encode %6.2f us, decode %6.2f us" % (
+        name, len(payload), encode_time * 1e6, decode_time * 1e6))
+
+
+def main():
+    print("Call payload (order):")
+    measure('json', JsonSerializer(), ORDER)
+    measure('struct', StructSerializer(ORDER_SCHEMA), ORDER)
+
+    print("Post payload (quote with 10 levels per side):")
+    measure('json', JsonSerializer(), QUOTE)
+    measure('struct', StructSerializer(QUOTE_SCHEMA), QUOTE)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+import logging
+from nervix.sync import create_sync_channel, RequestError
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="%(asctime)s %(levelname)s %(message)s"
+)
+
+if __name__ == '__main__':
+    with create_sync_channel("nxtcp://localhost:9999") as channel:
+
+        try:
+            print(channel.call('demo', 'hello world', timeout=2.0))
+
+        except RequestError as exc:
+            print("Request failed:", exc)
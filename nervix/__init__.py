@@ -13,7 +13,7 @@ def create_channel(uri, loop=None):
         loop = Mainloop()
 
     connection = create_connection(loop, uri)
-    chan = Channel(connection)
+    chan = Channel(connection, loop=loop)
     return loop, chan
 
 
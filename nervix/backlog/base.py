@@ -0,0 +1,26 @@
+class BaseBacklog:
+    """ Interface for backlogs.
+
+    A backlog holds the verbs that were put upstream at a time the connection was not ready. Each
+    verb is kept until it is drained, canceled or its ttl expires.
+    """
+
+    def put(self, verb, ttl):
+        """ Store the given verb in the backlog, it should be discarded after ttl seconds.
+        """
+        raise NotImplementedError()
+
+    def cancel(self, verb):
+        """ Remove the given verb from the backlog. Returns True if the verb was present in the
+        backlog, or False if not.
+        """
+        raise NotImplementedError()
+
+    def drain(self):
+        """ Generator that removes and yields all verbs that are not expired, in the order they
+        were put in the backlog.
+        """
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
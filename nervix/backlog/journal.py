@@ -0,0 +1,369 @@
+import os
+import mmap
+import time
+import struct
+import logging
+from collections import deque
+
+from nervix import verbs
+
+from .base import BaseBacklog
+
+logger = logging.getLogger(__name__)
+
+# header at the start of each segment file
+SEGMENT_MAGIC = b'NXBL\x01'
+
+# header in front of each record: state, body length, expiry as wall clock time
+RECORD_HEADER = struct.Struct('>BId')
+
+# states a record can be in, a zeroed header marks the end of the written data in a segment
+STATE_EMPTY = 0
+STATE_PENDING = 1
+STATE_CONSUMED = 2
+
+
+class JournalBacklog(BaseBacklog):
+    """ Backlog that journals unidirectional requests to memory-mapped segment files.
+
+    Verbs are kept in memory like the MemoryBacklog does, but unidirectional RequestVerbs are also
+    appended to a segment file in the given directory. When a new JournalBacklog is created on the
+    same directory, for example after a process restart, all pending requests whose ttl has not
+    yet expired are loaded again and will be send as soon as the connection becomes ready.
+
+    Other verbs are only kept in memory, because they refer to messagerefs or postrefs that have
+    no meaning anymore after a restart.
+
+    Segments of which all records are consumed are deleted.
+
+    Example:
+
+    .. code-block:: py
+
+        backlog = JournalBacklog('/var/lib/myapp/backlog')
+        channel = Channel(connection, backlog=backlog)
+
+    """
+
+    def __init__(self, directory, segment_size=2 ** 20, sync=False):
+        self.directory = directory
+        self.segment_size = segment_size
+
+        # when set the segment is flushed to disk after every write
+        self.sync = sync
+
+        # deque of (verb, expires, record) tuples, new verbs are added on the left side. record
+        # is a (segment, offset) tuple for journaled verbs, or None for verbs in memory only.
+        self.entries = deque()
+
+        # the segment new records are appended to, created on demand
+        self.active_segment = None
+        self.next_segment_nr = 1
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.__load()
+
+    def put(self, verb, ttl):
+        expires = time.monotonic() + ttl
+
+        record = None
+
+        if isinstance(verb, verbs.RequestVerb) and verb.unidirectional:
+            record = self.__append(encode_request(verb), time.time() + ttl)
+
+        self.entries.appendleft((verb, expires, record))
+
+    def cancel(self, verb):
+
+        for entry in self.entries:
+            if entry[0] is verb:
+                self.entries.remove(entry)
+                self.__consume(entry[2])
+                return True
+
+        return False
+
+    def drain(self):
+
+        now = time.monotonic()
+        while self.entries:
+
+            verb, expires, record = self.entries.pop()
+
+            self.__consume(record)
+
+            if now > expires:
+                continue
+
+            yield verb
+
+    def close(self):
+        """ Close all segment files. Pending records stay on disk.
+        """
+
+        segments = set(entry[2][0] for entry in self.entries if entry[2])
+
+        if self.active_segment:
+            segments.add(self.active_segment)
+
+        for segment in segments:
+            segment.close()
+
+        self.entries.clear()
+        self.active_segment = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __append(self, body, expires):
+        """ Append a record to the active segment, returns a (segment, offset) tuple.
+        """
+
+        size = RECORD_HEADER.size + len(body)
+
+        if not self.active_segment or not self.active_segment.fits(size):
+            self.__new_segment(size)
+
+        segment = self.active_segment
+        offset = segment.append(body, expires)
+
+        if self.sync:
+            segment.flush()
+
+        return segment, offset
+
+    def __consume(self, record):
+        """ Mark the given record as consumed, deleting its segment when nothing in it is pending.
+        """
+
+        if not record:
+            return
+
+        segment, offset = record
+        segment.consume(offset)
+
+        if self.sync:
+            segment.flush()
+
+        if not segment.pending:
+            if segment is self.active_segment:
+                self.active_segment = None
+
+            segment.delete()
+
+    def __new_segment(self, min_size):
+        """ Create a new active segment.
+        """
+
+        path = os.path.join(self.directory, '%08d.seg' % self.next_segment_nr)
+        self.next_segment_nr += 1
+
+        size = max(self.segment_size, len(SEGMENT_MAGIC) + min_size + RECORD_HEADER.size)
+
+        self.active_segment = Segment.create(path, size)
+
+    def __load(self):
+        """ Load pending records from existing segment files.
+        """
+
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.seg'))
+
+        now_wall = time.time()
+        now = time.monotonic()
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+
+            try:
+                self.next_segment_nr = max(self.next_segment_nr, int(name[:-4]) + 1)
+            except ValueError:
+                continue
+
+            segment = Segment.open(path)
+
+            if not segment:
+                logger.warning("Ignoring invalid backlog segment %s", path)
+                continue
+
+            for offset, body, expires_wall in segment.records():
+
+                if expires_wall < now_wall:
+                    segment.consume(offset)
+                    continue
+
+                try:
+                    verb = decode_request(body)
+                except (ValueError, struct.error) as exc:
+                    logger.warning("Discarding corrupt record in %s: %s", path, exc)
+                    segment.consume(offset)
+                    continue
+
+                expires = now + (expires_wall - now_wall)
+                self.entries.appendleft((verb, expires, (segment, offset)))
+
+            if not segment.pending:
+                segment.delete()
+
+        if self.entries:
+            logger.info("Loaded %d requests from backlog journal", len(self.entries))
+
+
+class Segment:
+    """ A single memory-mapped segment file.
+
+    Objects of this type should be obtained by calling the create() or open() methods.
+    """
+
+    def __init__(self, path, mm, end, pending):
+        self.path = path
+        self.mm = mm
+
+        # offset at which the next record will be written
+        self.end = end
+
+        # number of records that are not consumed yet
+        self.pending = pending
+
+    @classmethod
+    def create(cls, path, size):
+        with open(path, 'w+b') as f:
+            f.truncate(size)
+            mm = mmap.mmap(f.fileno(), size)
+
+        mm[0:len(SEGMENT_MAGIC)] = SEGMENT_MAGIC
+
+        return cls(path, mm, len(SEGMENT_MAGIC), 0)
+
+    @classmethod
+    def open(cls, path):
+        """ Open an existing segment, returns None if the file is not a valid segment.
+        """
+
+        with open(path, 'r+b') as f:
+            size = os.fstat(f.fileno()).st_size
+
+            if size < len(SEGMENT_MAGIC):
+                return None
+
+            mm = mmap.mmap(f.fileno(), size)
+
+        if mm[0:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            mm.close()
+            return None
+
+        segment = cls(path, mm, len(SEGMENT_MAGIC), 0)
+
+        # find the end of the written data and count the pending records
+        for _ in segment.records():
+            pass
+
+        return segment
+
+    def fits(self, size):
+        return self.end + size <= len(self.mm)
+
+    def append(self, body, expires):
+        """ Append a record, returns the offset of the record.
+        """
+
+        offset = self.end
+        start = offset + RECORD_HEADER.size
+
+        # the state is written last, so a partially written record is never seen as pending
+        self.mm[start:start + len(body)] = body
+        RECORD_HEADER.pack_into(self.mm, offset, STATE_EMPTY, len(body), expires)
+        self.mm[offset] = STATE_PENDING
+
+        self.end = start + len(body)
+        self.pending += 1
+
+        return offset
+
+    def consume(self, offset):
+        if self.mm[offset] == STATE_PENDING:
+            self.mm[offset] = STATE_CONSUMED
+            self.pending -= 1
+
+    def records(self):
+        """ Generator that yields an (offset, body, expires) tuple for every pending record.
+        """
+
+        offset = len(SEGMENT_MAGIC)
+        self.pending = 0
+
+        while offset + RECORD_HEADER.size <= len(self.mm):
+            state, length, expires = RECORD_HEADER.unpack_from(self.mm, offset)
+
+            start = offset + RECORD_HEADER.size
+
+            if state == STATE_EMPTY or start + length > len(self.mm):
+                break
+
+            if state == STATE_PENDING:
+                self.pending += 1
+                yield offset, bytes(self.mm[start:start + length]), expires
+
+            offset = start + length
+
+        self.end = offset
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        if not self.mm.closed:
+            self.mm.close()
+
+    def delete(self):
+        self.close()
+
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+REQUEST_HEADER = struct.Struct('>BdI')
+
+
+def encode_request(verb):
+    """ Encode an unidirectional RequestVerb into a record body.
+
+    uint8: name length
+    double: timeout, negative if there is no timeout
+    uint32: payload length
+    bytes: name
+    bytes: payload
+    """
+
+    name = verb.name
+    payload = verb.payload or b''
+    timeout = -1.0 if verb.timeout is None else float(verb.timeout)
+
+    return REQUEST_HEADER.pack(len(name), timeout, verbs.payload_size(payload)) + name + payload
+
+
+def decode_request(body):
+    """ Decode a record body back into a RequestVerb.
+    Raises ValueError if the body is malformed.
+    """
+
+    name_len, timeout, payload_len = REQUEST_HEADER.unpack_from(body)
+
+    start = REQUEST_HEADER.size
+
+    if start + name_len + payload_len != len(body):
+        raise ValueError("Record length does not match its contents")
+
+    verb = verbs.RequestVerb(
+        name=body[start:start + name_len],
+        unidirectional=True,
+        messageref=None,
+        timeout=None if timeout < 0 else timeout,
+        payload=body[start + name_len:],
+    )
+
+    verb.validate()
+
+    return verb
@@ -0,0 +1,43 @@
+import time
+from collections import deque
+
+from .base import BaseBacklog
+
+
+class MemoryBacklog(BaseBacklog):
+    """ Backlog that keeps all verbs in memory.
+
+    This is the default backlog, verbs that are stored in it are lost when the process exits.
+    """
+
+    def __init__(self):
+        # deque of (verb, expires) tuples, new verbs are added on the left side
+        self.entries = deque()
+
+    def put(self, verb, ttl):
+        expires = time.monotonic() + ttl
+        self.entries.appendleft((verb, expires))
+
+    def cancel(self, verb):
+
+        for entry in self.entries:
+            if entry[0] is verb:
+                self.entries.remove(entry)
+                return True
+
+        return False
+
+    def drain(self):
+
+        now = time.monotonic()
+        while self.entries:
+
+            verb, expires = self.entries.pop()
+
+            if now > expires:
+                continue
+
+            yield verb
+
+    def __len__(self):
+        return len(self.entries)
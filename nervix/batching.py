@@ -0,0 +1,454 @@
+import random
+import struct
+import logging
+
+from nervix import verbs
+from nervix.channel import Request, Call, Post, Message, HandlerList, LazyPayload, MessageStatus, \
+    MESSAGE_STATUSES, freeze_payload
+from nervix.serializers.raw import RAW
+from nervix.util.deadlines import DeadlineQueue
+
+logger = logging.getLogger(__name__)
+
+# header of every envelope: magic, kind and number of items
+HEADER = struct.Struct('>4sBH')
+HEADER_MAGIC = b'\x00NXB'
+
+# header of every item in an envelope: status and length of the payload
+ITEM = struct.Struct('>BI')
+
+# kinds of envelopes
+KIND_REQUEST = 1
+KIND_REPLY = 2
+
+# status of an item in a reply
+ITEM_OK = 0
+ITEM_UNANSWERED = 1
+ITEM_TOO_LARGE = 2
+
+
+def pack_envelope(kind, items):
+    """ Return an envelope holding the given list of (status, payload) tuples.
+    """
+
+    parts = [HEADER.pack(HEADER_MAGIC, kind, len(items))]
+
+    for status, payload in items:
+        parts.append(ITEM.pack(status, verbs.payload_size(payload)))
+        parts.append(payload)
+
+    return b''.join(parts)
+
+
+def unpack_envelope(payload):
+    """ Returns a (kind, items) tuple, where items is a list of (status, payload) tuples, or None
+    if the payload is not a valid envelope.
+    """
+
+    if not payload or len(payload) < HEADER.size or payload[:len(HEADER_MAGIC)] != HEADER_MAGIC:
+        return None
+
+    _, kind, count = HEADER.unpack_from(payload)
+
+    items = list()
+    offset = HEADER.size
+
+    for _ in range(count):
+        if offset + ITEM.size > len(payload):
+            return None
+
+        status, length = ITEM.unpack_from(payload, offset)
+        offset += ITEM.size
+
+        if offset + length > len(payload):
+            return None
+
+        items.append((status, payload[offset:offset + length]))
+        offset += length
+
+    if offset != len(payload):
+        return None
+
+    return kind, items
+
+
+class BatchingRequestStub:
+    """ Class used to send many small requests to the same name, packed together in envelopes.
+
+    Requests that are send within window seconds of each other are collected, and send as a single
+    request once the window has passed, once max_items are collected, or once the envelope is full.
+    A request that is alone in its window is send as a normal request. The session unpacks the
+    envelope and replies with a single envelope, which is split again so the handlers are called
+    with a Message for every request. This only works with sessions that use a BatchingSession.
+
+    All requests of an envelope share the timeout and ttl of the stub.
+
+    Example:
+
+    .. code-block:: py
+
+        req = BatchingRequestStub(channel, 'name', window=0.002)
+        req.add_handler(function_to_be_called_with_every_response)
+
+        for payload in payloads:
+            req.send(payload)
+
+    """
+
+    def __init__(self, channel, name=None, window=0.001, max_items=64, timeout=None, ttl=None):
+        self.core = channel.core
+        self.name = name
+        self.window = window
+        self.max_items = max_items
+        self.timeout = timeout
+        self.ttl = ttl
+
+        self.default_timeout = 5.0
+        self.default_ttl = 5.0
+
+        self.serializer = self.core.serializer_for(name)
+
+        self.handlers = HandlerList(MESSAGE_STATUSES)
+
+        # requests collected for the next envelope, and the size that envelope would have
+        self.pending = list()
+        self.pending_size = HEADER.size
+
+        self.flush_scheduled = False
+        self.timer = None
+
+        # mapping of the Request objects that are waiting for a response to their BatchedRequests,
+        # they all share the same handler
+        self.batches = dict()
+        self.request_handlers = HandlerList(MESSAGE_STATUSES)
+        self.request_handlers.add(self.__on_message, MessageStatus.ANY)
+
+        self.nr_requests = 0
+        self.nr_envelopes = 0
+
+    def add_handler(self, handler, filter=MessageStatus.ANY):
+        """ Add a handler that should be called with the response to every request.
+        """
+
+        self.handlers.add(handler, filter)
+
+    def send(self, payload):
+        """ Queue a request with the given payload, returns the BatchedRequest.
+        """
+
+        request = BatchedRequest(self, self.serializer.encode(payload))
+        size = ITEM.size + verbs.payload_size(request.payload)
+
+        self.nr_requests += 1
+
+        if self.pending_size + size > verbs.MAX_PAYLOAD_SIZE:
+            self.flush()
+
+        self.pending.append(request)
+        self.pending_size += size
+
+        if len(self.pending) >= self.max_items:
+            self.flush()
+
+        elif not self.flush_scheduled:
+            self.__schedule_flush()
+
+        return request
+
+    def flush(self):
+        """ Send the requests that were collected so far.
+        """
+
+        self.flush_scheduled = False
+
+        if self.timer:
+            self.timer.cancel()
+
+        batch = self.pending
+        self.pending = list()
+        self.pending_size = HEADER.size
+
+        # requests canceled before they were send are left out
+        batch = [request for request in batch if not request.canceled]
+
+        if not batch:
+            return
+
+        if len(batch) == 1:
+            payload = batch[0].payload
+        else:
+            payload = pack_envelope(KIND_REQUEST, [(ITEM_OK, request.payload) for request in batch])
+            self.nr_envelopes += 1
+
+        timeout = self.timeout or self.default_timeout
+        ttl = self.ttl if self.ttl is not None else self.default_ttl
+
+        request = Request(self.core, self.name, payload, timeout, ttl, self.request_handlers, RAW)
+        self.batches[request] = batch
+
+    def stats(self):
+        """ Return a dict with metrics about the batching of requests.
+        """
+
+        return {
+            'requests': self.nr_requests,
+            'envelopes': self.nr_envelopes,
+        }
+
+    def __schedule_flush(self):
+        self.flush_scheduled = True
+
+        if self.window and self.core.loop:
+            if not self.timer:
+                self.timer = self.core.loop.timer()
+                self.timer.set_handler(self.__on_window)
+
+            self.timer.set(self.window)
+
+        else:
+            self.core.call_soon(self.__on_window)
+
+    def __on_window(self):
+        if self.flush_scheduled:
+            self.flush()
+
+    def __on_message(self, msg):
+        batch = self.batches.pop(msg.source, None)
+
+        if batch is None:
+            return
+
+        if msg.status != MessageStatus.OK:
+            for request in batch:
+                request.finish(msg.verb.status, None)
+            return
+
+        if len(batch) == 1:
+            batch[0].finish(verbs.MessageVerb.STATUS_OK, msg.raw_payload)
+            return
+
+        envelope = unpack_envelope(msg.raw_payload)
+
+        if envelope is None or envelope[0] != KIND_REPLY or len(envelope[1]) != len(batch):
+            logger.warning("Invalid reply to batched requests to %s", self.name)
+
+            for request in batch:
+                request.finish(verbs.MessageVerb.STATUS_UNREACHABLE, None)
+            return
+
+        for request, (status, payload) in zip(batch, envelope[1]):
+            if status == ITEM_OK:
+                request.finish(verbs.MessageVerb.STATUS_OK, payload)
+                continue
+
+            if status == ITEM_TOO_LARGE:
+                logger.warning("Reply to batched request to %s does not fit in the envelope",
+                               self.name)
+
+            request.finish(verbs.MessageVerb.STATUS_UNREACHABLE, None)
+
+
+class BatchedRequest:
+    """ Class used to represent a single request that is send in an envelope.
+
+    This class should not be instantiated directly but should only be obtained by calling
+    the BatchingRequestStub.send() method.
+    """
+
+    def __init__(self, stub, payload):
+        self.stub = stub
+        self.payload = payload
+        self.canceled = False
+
+    def cancel(self):
+        """ Cancel the request, handlers will not be called. The request is still send if its
+        envelope was send already.
+        """
+
+        self.canceled = True
+
+    def finish(self, status, payload):
+        """ Called by the stub when the response to this request is known.
+        """
+
+        if self.canceled:
+            return
+
+        verb = verbs.MessageVerb(messageref=None, status=status, payload=payload)
+        msg = Message(self.stub.core, verb, self, LazyPayload(self.stub.serializer, payload))
+
+        self.stub.handlers.call_status(status, msg)
+
+
+class BatchingSession:
+    """ Class used to receive batched requests on a session, see BatchingRequestStub.
+
+    The call handlers are called for every request in an envelope. Once every call is posted to,
+    the responses are send back in a single envelope. Calls that are not posted to within timeout
+    seconds are reported to the requester as unreachable. Calls that were not batched are passed
+    to the call handlers unchanged.
+
+    The session can not have an executor, as the replies are collected and posted on the mainloop.
+
+    Example:
+
+    .. code-block:: py
+
+        sess = channel.session('name')
+        batching = BatchingSession(sess)
+        batching.add_call_handler(function_to_be_called_on_incoming_calls)
+
+    """
+
+    def __init__(self, session, timeout=5.0):
+
+        if session.executor is not None:
+            raise ValueError("A BatchingSession can not be used on a session with an executor")
+
+        self.session = session
+        self.core = session.core
+        self.timeout = timeout
+
+        self.call_handlers = HandlerList()
+
+        # envelopes that are waiting for replies, mapping of ids to EnvelopeReply objects
+        self.replies = dict()
+
+        self.deadlines = DeadlineQueue(self.core.loop, self.__on_expired)
+
+        self.session.add_call_handler(self.__on_call)
+
+    def add_call_handler(self, handler):
+        """ Add a handler that should be called on incoming calls, batched or not.
+        """
+
+        self.call_handlers.add(handler, None)
+
+    def __on_call(self, call):
+        envelope = unpack_envelope(call.raw_payload)
+
+        if envelope is None:
+            self.call_handlers.call(None, call)
+            return
+
+        kind, items = envelope
+
+        if kind != KIND_REQUEST:
+            logger.warning("Unexpected envelope received on %s", call.name)
+            return
+
+        reply = None
+        if not call.unidirectional:
+            reply = EnvelopeReply(self, call.postref, len(items))
+            self.replies[reply.id] = reply
+            self.deadlines.add(reply.id, self.timeout)
+
+        for index, (_, payload) in enumerate(items):
+            verb = verbs.CallVerb(
+                unidirectional=call.unidirectional,
+                postref=call.postref,
+                name=call.verb.name,
+                payload=payload,
+            )
+
+            self.call_handlers.call(None, BatchedCall(reply, index, verb, self.session, call.serializer))
+
+    def send_reply(self, reply, ttl):
+        """ Send the envelope with the replies, called by EnvelopeReply when all calls are
+        answered or when the deadline expires.
+        """
+
+        self.replies.pop(reply.id, None)
+        self.deadlines.remove(reply.id)
+
+        items = list()
+        size = HEADER.size
+
+        for payload in reply.payloads:
+            if payload is None:
+                items.append((ITEM_UNANSWERED, b''))
+                continue
+
+            if size + ITEM.size + len(payload) > verbs.MAX_PAYLOAD_SIZE:
+                logger.warning("Reply to batched call does not fit in the envelope")
+                items.append((ITEM_TOO_LARGE, b''))
+                size += ITEM.size
+                continue
+
+            items.append((ITEM_OK, payload))
+            size += ITEM.size + len(payload)
+
+        return Post(self.core, reply.postref, pack_envelope(KIND_REPLY, items), ttl, RAW)
+
+    def __on_expired(self, key):
+        reply = self.replies.get(key, None)
+
+        if reply is None:
+            return
+
+        logger.info("Batched call expired with %d of %d calls answered",
+                    reply.nr_answered, len(reply.payloads))
+
+        reply.finish()
+
+
+class EnvelopeReply:
+    """ Class used internally to collect the replies to the calls of an envelope.
+    """
+
+    def __init__(self, batching_session, postref, count):
+        self.batching_session = batching_session
+        self.id = random.getrandbits(64)
+        self.postref = postref
+
+        self.payloads = [None] * count
+        self.nr_answered = 0
+        self.ttl = None
+        self.finished = False
+
+    def answer(self, index, payload, ttl):
+        """ Store the reply to the call with the given index, returns the Post of the envelope
+        if this was the last reply.
+        """
+
+        if self.finished or self.payloads[index] is not None:
+            logger.warning("Post done on batched call that was already answered, it will be ignored")
+            return None
+
+        self.payloads[index] = payload
+        self.nr_answered += 1
+        self.ttl = max(self.ttl or 0.0, ttl)
+
+        if self.nr_answered == len(self.payloads):
+            return self.finish()
+
+        return None
+
+    def finish(self):
+        self.finished = True
+
+        return self.batching_session.send_reply(self, self.ttl or 5.0)
+
+
+class BatchedCall(Call):
+    """ Call that arrived in an envelope, passed to the handlers of a BatchingSession. The response
+    is send together with the responses to the other calls of the envelope.
+    """
+
+    def __init__(self, reply, index, verb, source, serializer=None):
+        Call.__init__(self, source.core, verb, source, serializer)
+        self.reply = reply
+        self.index = index
+
+    def post(self, payload, ttl=None):
+        """ Post a response to the call. Returns the Post of the envelope if this was the last
+        call of the envelope to be answered, None otherwise.
+        """
+
+        if self.unidirectional:
+            logger.warning("Post done on unidirectional call, it will be ignored")
+            return None
+
+        ttl = ttl or self.default_ttl
+
+        return self.reply.answer(self.index, freeze_payload(self.serializer.encode(payload)), ttl)
@@ -0,0 +1,111 @@
+import logging
+
+from nervix.channel import Request, Post, HandlerList, MessageStatus, MESSAGE_STATUSES
+from nervix.serializers.raw import RAW
+
+logger = logging.getLogger(__name__)
+
+
+class Bridge:
+    """ Forwards calls to sessions on one channel as requests on another channel, which may be
+    connected to another server, and posts the responses back.
+
+    Payloads are forwarded as they are received, they are never decoded or encoded. Requests that
+    time out or are unreachable on the target channel are not answered, so the original requester
+    sees a timeout as well.
+
+    Example:
+
+    .. code-block:: py
+
+        bridge = Bridge(local_channel, remote_channel)
+        bridge.add('quotes')
+        bridge.add('orders', target_name='orders-eu')
+
+    """
+
+    def __init__(self, source, target, timeout=5.0, ttl=5.0):
+        self.source = source
+        self.target = target
+        self.timeout = timeout
+        self.ttl = ttl
+
+        # mapping of session names to their Session objects
+        self.sessions = dict()
+
+        # requests in flight, mapping of the Request objects that own the messageref on the target
+        # channel to the postrefs of the calls on the source channel, they all share the same handler
+        self.postrefs = dict()
+        self.handlers = HandlerList(MESSAGE_STATUSES)
+        self.handlers.add(self.__on_message, MessageStatus.ANY)
+
+        self.nr_calls = 0
+        self.nr_responses = 0
+        self.nr_failures = 0
+
+    def add(self, name, target_name=None, force=False, persist=False, standby=False):
+        """ Login on a session with the given name on the source channel, and forward its calls to
+        target_name, or the same name, on the target channel. Returns the Session.
+        """
+
+        if name in self.sessions:
+            raise ValueError("Session %s is already bridged" % name)
+
+        target_name = target_name or name
+
+        session = self.source.session(name, force, persist, standby)
+        session.add_call_handler(lambda call: self.forward(call, target_name))
+
+        self.sessions[name] = session
+
+        return session
+
+    def remove(self, name):
+        """ Logout of the session with the given name. Calls that are in flight are still answered.
+        """
+
+        session = self.sessions.pop(name, None)
+
+        if session is not None:
+            session.cancel()
+
+    def forward(self, call, target_name):
+        """ Forward the call to target_name on the target channel.
+        """
+
+        self.nr_calls += 1
+
+        if call.unidirectional:
+            Request(self.target.core, target_name, call.raw_payload, self.timeout, self.ttl, None, RAW)
+            return
+
+        request = Request(self.target.core, target_name, call.raw_payload, self.timeout, self.ttl,
+                          self.handlers, RAW)
+
+        self.postrefs[request] = call.postref
+
+    def stats(self):
+        """ Return a dict with metrics about the forwarded calls.
+        """
+
+        return {
+            'calls': self.nr_calls,
+            'responses': self.nr_responses,
+            'failures': self.nr_failures,
+            'in_flight': len(self.postrefs),
+        }
+
+    def __on_message(self, msg):
+        postref = self.postrefs.pop(msg.source, None)
+
+        if postref is None:
+            return
+
+        if msg.status != MessageStatus.OK:
+            logger.info("Forwarded request to %s failed with status %s", msg.source.name, msg.status)
+            self.nr_failures += 1
+            return
+
+        self.nr_responses += 1
+
+        Post(self.source.core, postref, msg.raw_payload, self.ttl, RAW)
@@ -0,0 +1,124 @@
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """ Cache for responses to idempotent requests.
+
+    Responses are cached per (session name, encoded payload), but only for names that were given a
+    ttl with set_ttl(), or for all names when a default ttl is given. Only responses with status OK
+    are cached. When the cache holds more than max_entries responses, or more than max_bytes of
+    response payload, the least recently used responses are evicted.
+
+    Example:
+
+    .. code-block:: py
+
+        cache = ResponseCache(max_entries=1000)
+        cache.set_ttl('config', 30.0)
+
+        channel = Channel(connection, response_cache=cache)
+
+    """
+
+    def __init__(self, default_ttl=None, max_entries=1024, max_bytes=None):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # mapping of names to their ttl
+        self.ttls = dict()
+
+        # mapping of (name, payload) to (expires, response) tuples, least recently used first
+        self.entries = OrderedDict()
+        self.nr_bytes = 0
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def set_ttl(self, name, ttl):
+        """ Set the number of seconds responses for the given name are cached. A ttl of None
+        disables caching for the name, even if there is a default ttl.
+        """
+
+        self.ttls[name] = ttl
+
+    def get_ttl(self, name):
+        return self.ttls.get(name, self.default_ttl)
+
+    def get(self, name, payload):
+        """ Return the cached response for the given name and encoded payload, or None if there is
+        no valid response in the cache.
+        """
+
+        if self.get_ttl(name) is None:
+            return None
+
+        key = (name, payload)
+        entry = self.entries.get(key, None)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires, response = entry
+
+        if time.monotonic() > expires:
+            self.__remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return response
+
+    def put(self, name, payload, response):
+        """ Store the response for the given name and encoded payload.
+        """
+
+        ttl = self.get_ttl(name)
+
+        if ttl is None:
+            return
+
+        key = (name, payload)
+
+        if key in self.entries:
+            self.__remove(key)
+
+        self.entries[key] = (time.monotonic() + ttl, response)
+        self.nr_bytes += len(response)
+
+        while self.entries and (len(self.entries) > self.max_entries or
+                                (self.max_bytes is not None and self.nr_bytes > self.max_bytes)):
+            self.__remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.nr_bytes = 0
+
+    def stats(self):
+        """ Return a dict with metrics.
+        """
+
+        return {
+            'cache_entries': len(self.entries),
+            'cache_bytes': self.nr_bytes,
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_evictions': self.evictions,
+            'cache_expirations': self.expirations,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __remove(self, key):
+        _, response = self.entries.pop(key)
+        self.nr_bytes -= len(response)
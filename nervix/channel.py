@@ -1,11 +1,16 @@
 import time
 import logging
-from collections import deque
 from enum import Flag, auto
 
 from nervix import verbs
 
 from nervix.serializers.string import StringSerializer
+from nervix.serializers.registry import SerializerRegistry
+from nervix.backlog.memory import MemoryBacklog
+from nervix.util.slots import SlotTable
+from nervix.util.deadlines import DeadlineQueue
+from nervix.util import delta
+from nervix.window import RequestWindow, AimdLimit
 
 logger = logging.getLogger(__name__)
 
@@ -24,27 +29,106 @@ class Channel:
     for doing requests: call the request() method.
     """
 
-    def __init__(self, connection, serializer=StringSerializer()):
+    def __init__(self, connection, serializer=StringSerializer(), backlog=None, loop=None,
+                 response_cache=None):
         """ Constructor
+
+        The optional backlog argument can be used to provide a backlog in which verbs are kept
+        while the connection is not ready, e.g. a JournalBacklog. By default a MemoryBacklog is used.
+
+        The loop argument is the Mainloop used for timers, if not given the mainloop of the
+        connection is used.
+
+        The optional response_cache argument can be used to provide a ResponseCache, which will be
+        used to answer repeated requests without sending them to the server.
         """
 
         self.core = Core(
             connection=connection,
             serializer=serializer,
+            backlog=backlog,
+            loop=loop,
+            response_cache=response_cache,
         )
 
-    def subscribe(self, name, topic):
+    def limit_requests(self, limit, name=None):
+        """ Limit the number of bidirectional requests that may be in flight at once, either for
+        the whole channel or, when a name is given, for requests to that name. Requests beyond the
+        limit wait in a queue until responses for earlier requests arrive or time out.
+
+        The limit for a name may also be an AimdLimit, which adapts the limit to the latency of the
+        responses.
+
+        A limit of None removes the limit.
+        """
+
+        self.core.request_window.set_limit(limit, name)
+
+    def adapt_requests(self, **kwargs):
+        """ Give every session name that has no limit set with limit_requests() an adaptive limit,
+        see AimdLimit for the accepted keyword arguments.
+        """
+
+        self.core.request_window.set_adaptive(lambda: AimdLimit(**kwargs))
+
+    def coalesce_requests(self, enabled=True):
+        """ When enabled, a bidirectional request with the same name and payload as a request that is
+        still in flight is not send to the server, but receives the response of the earlier request.
+        Each request keeps its own timeout. Only enable this if requests are idempotent.
+        """
+
+        self.core.coalescing = enabled
+
+    def set_serializer(self, name, serializer):
+        """ Use the given serializer for payloads and topics of subscriptions, sessions and requests
+        with the given name, instead of the serializer given to the constructor. A name that ends
+        with a '*' matches all names that start with the part before it.
+
+        The serializer is looked up once when a subscription, session or request stub is created,
+        so changes only apply to objects created afterwards. A serializer of None removes it.
+
+        Example:
+
+        .. code-block:: py
+
+            channel.set_serializer('quotes', StructSerializer(QUOTE))
+            channel.set_serializer('logs-*', CompressedSerializer(StringSerializer()))
+
+        """
+
+        self.core.serializers.register(name, serializer)
+
+    def stats(self):
+        """ Return a dict with metrics about this channel.
+        """
+
+        return self.core.stats()
+
+    def subscribe(self, name, topic, delta=False):
         """ Subscribe to a topic on a named session.
+
+        delta should be True if the session publishes the topic with delta=True.
         """
 
         return Subscription(
             self.core,
             name,
-            topic
+            topic,
+            delta,
         )
 
-    def session(self, name, force=False, persist=False, standby=False):
+    def session(self, name, force=False, persist=False, standby=False, last_value=False,
+                delta=False, executor=None):
         """ Login on a session.
+
+        When last_value is True, the session keeps the last published value of every topic, see
+        Session.publish().
+
+        When delta is True, Session.publish() sends a snapshot to every new subscriber and only the
+        changes after that. The subscribers should be created with delta=True.
+
+        When an executor is given, e.g. an OrderedExecutor, the call handlers are run by the
+        executor instead of on the mainloop. This requires the channel to have a mainloop.
         """
 
         return Session(
@@ -52,7 +136,10 @@ class Channel:
             name,
             force,
             persist,
-            standby
+            standby,
+            last_value,
+            delta,
+            executor,
         )
 
     def request(self, name=None, payload=None, timeout=None, ttl=None):
@@ -73,26 +160,48 @@ class Core:
 
     The provided Connection instance is used to actually send and receive verbs.
     The given Serializer instance is used to encode and decode payloads.
+    The given Backlog instance is used to store verbs while the connection is not ready.
+    The given Mainloop instance is used for timers, if it is not given the mainloop of the connection
+    is used.
 
     This class is used internally and should not be instantiated by the user.
 
     """
 
-    def __init__(self, connection, serializer):
+    def __init__(self, connection, serializer, backlog=None, loop=None, response_cache=None):
 
         # list of verbs that should be send immediately as soon as the connection
         # becomes ready
         self.upstream_auto_resend = list()
 
-        # list of verbs that were generated when generated at a time that the connection was not ready
-        # and are just put in this backlog, and will be send as soon as the connection becomes ready.
-        self.upstream_backlog = deque()
+        # backlog of verbs that were generated at a time that the connection was not ready, they
+        # will be send as soon as the connection becomes ready.
+        self.upstream_backlog = backlog if backlog is not None else MemoryBacklog()
+
+        # table of handler functions for messages, it hands out the unique messageref's
+        self.message_handlers = SlotTable()
+
+        # mainloop used for timers, may be None in which case no timers are used
+        self.loop = loop or getattr(connection, 'mainloop', None)
 
-        # counter used to generate unique messageref's
-        self.next_messageref = 1
+        # deadlines of messageref's of requests, when one expires a TIMEOUT message is delivered
+        # to its handler. The grace period is added to the timeout of the request to give the server
+        # the chance to report the timeout itself.
+        self.request_deadlines = DeadlineQueue(self.loop, self.__on_request_deadline)
+        self.request_deadline_grace = 2.0
 
-        # mapping of messageref's to handler functions for messages
-        self.message_handlers = dict()
+        # window that limits the number of bidirectional requests in flight
+        self.request_window = RequestWindow()
+
+        # cache of responses to requests, None if responses should not be cached
+        self.response_cache = response_cache
+
+        # flag that indicates if identical requests should be coalesced, and the mapping of
+        # (name, payload) to the request that is in flight for it
+        self.coalescing = False
+        self.flights = dict()
+        self.nr_leading_requests = 0
+        self.nr_coalesced_requests = 0
 
         # mapping of session names to handler functions for calls
         self.call_handlers = dict()
@@ -100,6 +209,10 @@ class Core:
         # mapping of session names to handler functions for interests
         self.interest_handlers = dict()
 
+        # mapping of (name, topic) to the upstream subscription that is shared by all subscriptions
+        # to that name and topic
+        self.subscriptions = dict()
+
         # set of handler functions to be called when the connection is lost
         self.connection_lost_handlers = set()
 
@@ -119,20 +232,26 @@ class Core:
         self.connection.set_ready_handler(self.__on_connection_ready)
         self.connection.set_downstream_handler(self.__on_incoming_verb)
 
-        # store the serializer that is used to encode and decode payloads
+        # store the serializer that is used to encode and decode payloads, and the registry of
+        # serializers for specific names
         self.serializer = serializer
+        self.serializers = SerializerRegistry(serializer)
 
-    def encode_payload(self, payload):
-        """ Helper function to encode a payload.
+    def serializer_for(self, name):
+        """ Return the serializer that should be used for the given name.
         """
 
-        return self.serializer.encode(payload)
+        return self.serializers.resolve(name)
 
-    def decode_payload(self, payload_raw):
-        """ Helper function to decode a payload.
+    def call_soon(self, func, *args):
+        """ Call the given function on the next iteration of the mainloop, or immediately if there
+        is no mainloop.
         """
 
-        return self.serializer.decode(payload_raw)
+        if self.loop:
+            self.loop.call_soon(func, *args)
+        else:
+            func(*args)
 
     def put_upstream(self, verb, ttl=None, auto_resend=False):
         """ Called when a new verb should be send upstream.
@@ -155,8 +274,22 @@ class Core:
 
         # if not put the verb in the backlog
         elif ttl and ttl > 0.0:
-            expires = time.monotonic() + ttl
-            self.upstream_backlog.appendleft((verb, expires))
+            self.upstream_backlog.put(verb, ttl)
+
+    def put_upstream_many(self, verb_list, ttl=None):
+        """ Called when multiple verbs should be send upstream at once, this allows the connection
+        to send them more efficiently. ttl has the same meaning as for put_upstream().
+        """
+
+        for verb in verb_list:
+            verb.validate()
+
+        if self.connection_ready:
+            self.connection.send_verbs(verb_list)
+
+        elif ttl and ttl > 0.0:
+            for verb in verb_list:
+                self.upstream_backlog.put(verb, ttl)
 
     def cancel(self, verb):
         """ Cancel the given verb from being send upstream. Returns True if the verb was indeed
@@ -168,21 +301,20 @@ class Core:
             self.upstream_auto_resend.remove(verb)
 
         # remove it from the backlog
-        if verb in self.upstream_backlog:
-            self.upstream_backlog.remove(verb)
-            return True
+        return self.upstream_backlog.cancel(verb)
 
-        return False
-
-    def new_messageref(self, handler):
+    def new_messageref(self, handler, deadline=None):
         """ Register a handler and return a new unique messageref for that handler.
+        The messageref may be reused after it is discarded.
+
+        When deadline is given, a TIMEOUT message will be delivered to the handler if the messageref
+        is not discarded within deadline seconds.
         """
 
-        # generate new unique messageref
-        messageref = self.next_messageref
-        self.next_messageref += 1
+        messageref = self.message_handlers.add(handler)
 
-        self.message_handlers[messageref] = handler
+        if deadline is not None:
+            self.request_deadlines.add(messageref, deadline)
 
         return messageref
 
@@ -190,16 +322,48 @@ class Core:
         """ Discard the given messageref.
         """
 
-        self.message_handlers.pop(messageref, None)
+        if messageref is not None:
+            self.message_handlers.remove(messageref)
+            self.request_deadlines.remove(messageref)
+
+    def subscribe(self, name, topic, handler, serializer=None, delta=False):
+        """ Add a handler for messages on the given encoded name and topic, returns the
+        UpstreamSubscription. The subscribe verb is only send for the first handler.
+        """
+
+        key = (name, topic)
+        upstream = self.subscriptions.get(key, None)
+
+        if upstream is None:
+            upstream = UpstreamSubscription(self, name, topic, serializer, delta)
+            self.subscriptions[key] = upstream
+
+        elif upstream.delta != delta:
+            raise ValueError("Subscription with and without delta to the same name and topic")
+
+        upstream.handlers.append(handler)
+
+        return upstream
+
+    def unsubscribe(self, upstream, handler):
+        """ Remove a handler from the given UpstreamSubscription. The subscription is canceled when
+        the last handler is removed.
+        """
+
+        upstream.handlers.remove(handler)
+
+        if not upstream.handlers:
+            del self.subscriptions[(upstream.name, upstream.topic)]
+            upstream.cancel()
 
     def set_call_handler(self, name, handler):
-        """ Set a handler for calls to the given name.
+        """ Set a handler for calls to the given encoded name.
         """
 
         self.call_handlers[name] = handler
 
     def set_interest_handler(self, name, handler):
-        """ Set a handler for interest to the given name.
+        """ Set a handler for interest to the given encoded name.
         """
 
         self.interest_handlers[name] = handler
@@ -216,6 +380,29 @@ class Core:
 
         self.connection_lost_handlers.remove(handler)
 
+    def stats(self):
+        """ Return a dict with metrics.
+        """
+
+        stats = {
+            'inflight_requests': len(self.request_deadlines),
+        }
+
+        stats.update(self.request_window.stats())
+
+        if self.response_cache is not None:
+            stats.update(self.response_cache.stats())
+
+        if self.coalescing:
+            total = self.nr_leading_requests + self.nr_coalesced_requests
+            stats.update({
+                'leading_requests': self.nr_leading_requests,
+                'coalesced_requests': self.nr_coalesced_requests,
+                'coalesce_ratio': self.nr_coalesced_requests / total if total else 0.0,
+            })
+
+        return stats
+
     def __on_connection_ready(self, ready):
         """ Called by the connection to inform us if the connection is ready to send data.
         """
@@ -226,18 +413,11 @@ class Core:
             logger.info("Channel is ready")
 
             # first send any verbs that are in the auto resend list
-            for verb in reversed(self.upstream_auto_resend):
-                self.upstream_backlog.appendleft((verb, None))
+            for verb in self.upstream_auto_resend:
+                self.connection.send_verb(verb)
 
             # now send all verbs that are in the backlog and not expired yet
-            now = time.monotonic()
-            while self.upstream_backlog:
-
-                verb, expire = self.upstream_backlog.pop()
-
-                if expire and now > expire:
-                    continue
-
+            for verb in self.upstream_backlog.drain():
                 self.connection.send_verb(verb)
 
         else:
@@ -281,15 +461,27 @@ class Core:
 
         handler(verb)
 
+    def __on_request_deadline(self, messageref):
+        """ Called when no response was received for a request before its deadline.
+        """
+
+        logger.info("No response received for messageref %s, delivering timeout", messageref)
+
+        self.__on_message_verb(verbs.MessageVerb(
+            messageref=messageref,
+            status=verbs.MessageVerb.STATUS_TIMEOUT,
+            payload=None,
+        ))
+
     def __on_call_verb(self, verb):
         """ Called on incoming call verbs.
         """
 
-        name = decode_name(verb.name)
-        handler = self.call_handlers.get(name, None)
+        # handlers are looked up by the encoded name, so it doesn't have to be decoded
+        handler = self.call_handlers.get(verb.name, None)
 
         if not handler:
-            logger.warning("No handler for call to %s", name)
+            logger.warning("No handler for call to %s", decode_name(verb.name))
             return
 
         handler(verb)
@@ -298,11 +490,10 @@ class Core:
         """ Called on incoming interest verbs.
         """
 
-        name = decode_name(verb.name)
-        handler = self.interest_handlers.get(name, None)
+        handler = self.interest_handlers.get(verb.name, None)
 
         if not handler:
-            logger.warning("No handler for interest to %s", name)
+            logger.warning("No handler for interest to %s", decode_name(verb.name))
             return
 
         handler(verb)
@@ -323,14 +514,7 @@ class InterestStatus(Flag):
 
     @staticmethod
     def from_verb(verb):
-        if verb.status == verbs.InterestVerb.STATUS_INTEREST:
-            return InterestStatus.INTEREST
-
-        elif verb.status == verbs.InterestVerb.STATUS_NO_INTEREST:
-            return InterestStatus.NO_INTEREST
-
-        else:
-            return InterestStatus.NONE
+        return INTEREST_STATUSES.get(verb.status, InterestStatus.NONE)
 
 
 class MessageStatus(Flag):
@@ -343,17 +527,20 @@ class MessageStatus(Flag):
 
     @staticmethod
     def from_verb(verb):
-        if verb.status == verbs.MessageVerb.STATUS_OK:
-            return MessageStatus.OK
+        return MESSAGE_STATUSES.get(verb.status, MessageStatus.NONE)
 
-        elif verb.status == verbs.MessageVerb.STATUS_TIMEOUT:
-            return MessageStatus.TIMEOUT
 
-        elif verb.status == verbs.MessageVerb.STATUS_UNREACHABLE:
-            return MessageStatus.UNREACHABLE
+# mapping of the status codes used in verbs to their status flags
+INTEREST_STATUSES = {
+    verbs.InterestVerb.STATUS_INTEREST: InterestStatus.INTEREST,
+    verbs.InterestVerb.STATUS_NO_INTEREST: InterestStatus.NO_INTEREST,
+}
 
-        else:
-            return MessageStatus.NONE
+MESSAGE_STATUSES = {
+    verbs.MessageVerb.STATUS_OK: MessageStatus.OK,
+    verbs.MessageVerb.STATUS_TIMEOUT: MessageStatus.TIMEOUT,
+    verbs.MessageVerb.STATUS_UNREACHABLE: MessageStatus.UNREACHABLE,
+}
 
 
 class Subscription:
@@ -383,53 +570,276 @@ class Subscription:
         # to unsubscribe
         sub.cancel()
 
+    Handlers that can't keep up with the rate of messages can have them conflated, in that case
+    only the latest message is delivered, at most once per mainloop iteration or per interval.
+
+    Example::
+
+        # to receive at most 10 messages per second
+        sub.conflate(interval=0.1)
+
+
+    """
+
+    def __init__(self, core, name, topic, delta=False):
+        self.core = core
+        self.name = name
+        self.topic = topic
+        self.delta = delta
+
+        self.handlers = HandlerList(MESSAGE_STATUSES)
+        self.canceled = False
+
+        # conflation settings, and the (message_verb, payload) tuple waiting to be delivered
+        self.conflating = False
+        self.conflate_interval = None
+        self.pending = None
+        self.delivery_scheduled = False
+        self.last_delivery = None
+        self.timer = None
+
+        # stats
+        self.nr_received = 0
+        self.nr_delivered = 0
+        self.nr_conflated = 0
+
+        self.serializer = self.core.serializer_for(self.name)
+
+        # subscriptions to the same name and topic share a single upstream subscription,
+        # which sends the verbs and owns the messageref
+        self.upstream = self.core.subscribe(
+            encode_name(self.name),
+            self.serializer.encode(self.topic),
+            self.__on_message,
+            self.serializer,
+            self.delta,
+        )
+
+        self.messageref = self.upstream.messageref
+        self.verb = self.upstream.verb
+
+    def add_handler(self, handler, filter=MessageStatus.ANY):
+        """ Add a handler that should be called when a message is received for this subscription.
+
+        filter is not really useful in this case as all messages send to a subscription have status=OK
+
+        The handler will be called with a Message object as it's only argument.
+
+        """
+        self.handlers.add(handler, filter)
+
+    def conflate(self, enabled=True, interval=None):
+        """ Enable or disable conflation of messages.
+
+        While enabled, messages are not delivered to the handlers directly, only the latest message
+        is delivered on the next iteration of the mainloop. If an interval is given, at most one
+        message is delivered per interval seconds.
+        """
+
+        self.conflating = enabled
+        self.conflate_interval = interval
+
+        # deliver anything that is still waiting
+        if not enabled and self.pending:
+            self.__deliver()
+
+    def stats(self):
+        """ Return a dict with metrics about this subscription.
+        """
+
+        return {
+            'received_messages': self.nr_received,
+            'delivered_messages': self.nr_delivered,
+            'conflated_messages': self.nr_conflated,
+        }
+
+    def __now(self):
+        if self.core.loop:
+            return self.core.loop.now()
+
+        return time.monotonic()
+
+    def __on_message(self, message_verb, payload):
+        """ Called when a message is received for this subscription, payload is a LazyPayload
+        that is shared by all subscriptions, or None if the status isn't OK.
+        """
+
+        self.nr_received += 1
+
+        if not self.conflating:
+            self.__call_handlers(message_verb, payload)
+            return
+
+        # replace the message that is still waiting, if any
+        if self.pending:
+            self.nr_conflated += 1
+
+        self.pending = (message_verb, payload)
+
+        if self.delivery_scheduled:
+            return
+
+        self.delivery_scheduled = True
+
+        wait = 0.0
+        if self.conflate_interval and self.last_delivery is not None:
+            wait = self.last_delivery + self.conflate_interval - self.__now()
+
+        if wait > 0.0 and self.core.loop:
+            if not self.timer:
+                self.timer = self.core.loop.timer()
+                self.timer.set_handler(self.__deliver)
+
+            self.timer.set(wait)
 
+        else:
+            self.core.call_soon(self.__deliver)
+
+    def __deliver(self):
+        """ Deliver the message that is waiting, if any.
+        """
+
+        self.delivery_scheduled = False
+
+        if not self.pending or self.canceled:
+            return
+
+        message_verb, payload = self.pending
+        self.pending = None
+        self.last_delivery = self.__now()
+
+        self.__call_handlers(message_verb, payload)
+
+    def __call_handlers(self, message_verb, payload):
+        self.nr_delivered += 1
+
+        # create Message object
+        msg = Message(self.core, message_verb, self, payload)
+
+        # send Message object to all handlers that match the status
+        self.handlers.call_status(message_verb.status, msg)
+
+    def cancel(self):
+        """ Cancel the subscription.
+        """
+
+        if self.canceled:
+            return
+
+        self.canceled = True
+        self.core.unsubscribe(self.upstream, self.__on_message)
+
+        self.pending = None
+        if self.timer:
+            self.timer.cancel()
+
+
+class UpstreamSubscription:
+    """ Class used internally to represent a subscription on the server, which may be shared by
+    multiple Subscription objects.
+
+    Objects of this type are created by Core.subscribe() and should not be instantiated directly.
     """
 
-    def __init__(self, core, name, topic):
+    def __init__(self, core, name, topic, serializer=None, delta=False):
         self.core = core
         self.name = name
         self.topic = topic
+        self.serializer = serializer or self.core.serializer
+        self.delta = delta
+
+        # handlers of the Subscription objects that share this subscription
+        self.handlers = list()
+
+        # when receiving deltas: the last complete payload and its sequence number, and whether
+        # a new snapshot was asked for
+        self.base = None
+        self.seq = None
+        self.resyncing = False
+        self.nr_resyncs = 0
 
         # generate new unique messageref
         self.messageref = self.core.new_messageref(self.__on_message)
 
-        self.handlers = HandlerList()
-
         # create verb and send it upstream, we set the auto_resend flag so that it will be automaticly
         # resend if the connection was lost
-
         self.verb = verbs.SubscribeVerb(
-            name=encode_name(self.name),
+            name=self.name,
             messageref=self.messageref,
-            topic=self.core.encode_payload(self.topic)
+            topic=self.topic,
         )
 
         self.core.put_upstream(self.verb, auto_resend=True)
 
-    def add_handler(self, handler, filter=MessageStatus.ANY):
-        """ Add a handler that should be called when a message is received for this subscription.
+    def __on_message(self, message_verb):
+        """ Called when a message is received for this subscription. The payload is decoded at
+        most once for all subscriptions, and only when a handler needs it.
+        """
 
-        filter is not really useful in this case as all messages send to a subscription have status=OK
+        payload = None
+        if message_verb.status == verbs.MessageVerb.STATUS_OK and self.delta:
+            raw = self.__apply_delta(message_verb.payload)
 
-        The handler will be called with a Message object as it's only argument.
+            if raw is None:
+                return
+
+            payload = LazyPayload(self.serializer, raw)
+
+        elif message_verb.status == verbs.MessageVerb.STATUS_OK:
+            payload = LazyPayload(self.serializer, message_verb.payload)
+
+        for handler in list(self.handlers):
+            handler(message_verb, payload)
 
+    def __apply_delta(self, frame):
+        """ Returns the complete payload for the given frame, or None if it can't be reconstructed,
+        in which case a new snapshot is asked for.
         """
-        self.handlers.add(handler, filter)
 
-    def __on_message(self, message_verb):
-        """ Called when a message is received for this subscription.
+        try:
+            kind, seq, body = delta.unpack(frame)
+
+            if kind == delta.KIND_SNAPSHOT:
+                self.base = body
+
+            elif kind == delta.KIND_DELTA and self.base is not None and seq == delta.next_seq(self.seq):
+                self.base = delta.apply(self.base, body)
+
+            else:
+                raise ValueError("Sequence gap")
+
+        except ValueError as exc:
+            self.__resync(exc)
+            return None
+
+        self.seq = seq
+        self.resyncing = False
+
+        return self.base
+
+    def __resync(self, reason):
+        """ Ask the session for a new snapshot, by subscribing again.
         """
 
-        # create Message object
-        msg = Message(self.core, message_verb, self)
+        self.base = None
 
-        # send Message object to all handlers that match the filter
-        filter = MessageStatus.from_verb(message_verb)
-        self.handlers.call(filter, msg)
+        if self.resyncing:
+            return
+
+        logger.info("Resyncing subscription to %s: %s", decode_name(self.name), reason)
+
+        self.resyncing = True
+        self.nr_resyncs += 1
+
+        self.core.put_upstream(verbs.UnsubscribeVerb(
+            name=self.name,
+            topic=self.topic,
+        ))
+
+        self.core.put_upstream(self.verb)
 
     def cancel(self):
-        """ Cancel the subscription.
+        """ Cancel the subscription on the server.
         """
 
         # try to cancel the subscribe verb
@@ -439,9 +849,9 @@ class Subscription:
         # and we thus have to send an unsubscribe to really cancel it.
         if not res:
             self.core.put_upstream(verbs.UnsubscribeVerb(
-                name=encode_name(self.name),
-                topic=self.core.encode_payload(self.topic))
-            )
+                name=self.name,
+                topic=self.topic,
+            ))
 
         # get rid of the messageref as we don't need it anymore
         self.core.discard_messageref(self.messageref)
@@ -493,10 +903,12 @@ class RequestStub:
         self.timeout = timeout
         self.ttl = ttl
 
+        self.serializer = self.core.serializer_for(self.name)
+
         self.default_timeout = 5.0
         self.default_ttl = 5.0
 
-        self.handlers = HandlerList()
+        self.handlers = HandlerList(MESSAGE_STATUSES)
 
     def add_handler(self, handler, filter=MessageStatus.ANY):
         """ Add a handler that should be called when a message is received for this subscription.
@@ -525,8 +937,11 @@ class RequestStub:
         timeout = timeout or self.default_timeout
         ttl = ttl if ttl is not None else self.default_ttl
 
+        # the serializer only has to be looked up again if another name is given
+        serializer = self.serializer if name == self.name else self.core.serializer_for(name)
+
         # create request object
-        request = Request(self.core, name, payload, timeout, ttl, self.handlers)
+        request = Request(self.core, name, payload, timeout, ttl, self.handlers, serializer)
         return request
 
 
@@ -537,55 +952,202 @@ class Request:
     the RequestStub.send() method.
     """
 
-    def __init__(self, core, name, payload, timeout, ttl, handlers):
+    def __init__(self, core, name, payload, timeout, ttl, handlers, serializer=None):
         self.core = core
         self.name = name
         self.payload = payload
         self.timeout = timeout
         self.ttl = ttl
         self.handlers = handlers
+        self.serializer = serializer or self.core.serializer_for(self.name)
 
-        unidirectional = not bool(self.handlers)
+        self.unidirectional = not bool(self.handlers)
 
-        # fetch messageref, but only if the request is bidirectional
-        if unidirectional:
-            self.messageref = None
-        else:
-            self.messageref = self.core.new_messageref(self.__on_message)
+        self.waiter = None
+        self.finished = False
+
+        # when coalescing, the request that sends the verb on our behalf, or the requests that
+        # wait for our response
+        self.leader = None
+        self.followers = list()
 
-        # create the verb and send it upstream
+        # time the verb was send, used to measure the latency of the response, this excludes the
+        # time spent waiting for the request window
+        self.sent = None
+
+        self.payload_encoded = self.serializer.encode(self.payload)
+
+        # the verb is created and validated before anything is allocated for the request, so
+        # invalid requests raise without taking a messageref or a place in the request window
         self.verb = verbs.RequestVerb(
             name=encode_name(self.name),
-            unidirectional=unidirectional,
-            messageref=self.messageref,
+            unidirectional=self.unidirectional,
+            messageref=None,
             timeout=self.timeout,
-            payload=self.core.encode_payload(self.payload),
+            payload=self.payload_encoded,
         )
+        self.verb.validate()
+
+        cached = None if self.unidirectional else self.__cached_response()
+
+        if self.unidirectional:
+            self.messageref = None
+            self.__send()
+
+        elif cached is not None:
+            # answer from the cache on the next iteration, so handlers are never called from send()
+            self.messageref = None
+            self.core.call_soon(self.__on_message, verbs.MessageVerb(
+                messageref=None,
+                status=verbs.MessageVerb.STATUS_OK,
+                payload=cached,
+            ))
+
+        else:
+            # fetch messageref, the deadline also covers the time spent waiting for the request window
+            deadline = (self.ttl or 0.0) + (self.timeout or 0.0) + self.core.request_deadline_grace
+            self.messageref = self.core.new_messageref(self.__on_message, deadline)
+            self.verb.messageref = self.messageref
 
+            leader = self.core.coalescing and self.core.flights.get(self.__flight_key(), None)
+
+            if leader:
+                # an identical request is already in flight, wait for its response
+                self.leader = leader
+                leader.followers.append(self)
+                self.core.nr_coalesced_requests += 1
+
+            else:
+                self.__lead()
+
+    def __lead(self):
+        """ Let the request go to the server, on behalf of itself and its followers.
+        """
+
+        if self.core.coalescing:
+            self.core.flights[self.__flight_key()] = self
+            self.core.nr_leading_requests += 1
+
+        # the request window decides when the request can be send
+        self.waiter = self.core.request_window.enter(self.name, self.__send)
+
+    def __flight_key(self):
+        return self.name, freeze_payload(self.payload_encoded)
+
+    def __send(self):
+        """ Send the verb upstream.
+        """
+
+        self.sent = time.monotonic()
         self.core.put_upstream(self.verb, ttl=self.ttl)
 
+    def __cached_response(self):
+        """ Return the cached response payload for this request, or None.
+        """
+
+        cache = self.core.response_cache
+
+        if cache is None:
+            return None
+
+        return cache.get(self.name, freeze_payload(self.payload_encoded))
+
     def __on_message(self, message_verb):
-        msg = Message(self.core, message_verb, self)
 
-        filter = MessageStatus.from_verb(message_verb)
-        self.handlers.call(filter, msg)
+        # the request was canceled, e.g. while its response from the cache was scheduled
+        if self.finished:
+            return
+
+        payload = LazyPayload(self.serializer, message_verb.payload)
+        msg = Message(self.core, message_verb, self, payload)
+
+        filter = msg.status
+
+        # store responses from the server in the cache
+        cache = self.core.response_cache
+        if cache is not None and filter == MessageStatus.OK and self.sent is not None:
+            cache.put(self.name, freeze_payload(self.payload_encoded), message_verb.payload)
+
+        self.handlers.call_status(message_verb.status, msg)
 
         # a messagref for a request is only used once, so we may discard it after
         # we received the response message
+        self.__finish(filter)
+
+        self.__release_followers(message_verb, filter)
+
+    def __finish(self, status=None):
+        """ Discard the messageref and free the place of the request in the request window.
+        The status is None when the request was canceled.
+        """
+
+        if self.finished:
+            return
+
+        self.finished = True
         self.core.discard_messageref(self.messageref)
 
+        if self.unidirectional:
+            return
+
+        if self.leader:
+            self.leader.followers.remove(self)
+            self.leader = None
+            return
+
+        if self.core.flights.get(self.__flight_key(), None) is self:
+            del self.core.flights[self.__flight_key()]
+
+        if self.sent is None:
+            if self.waiter:
+                self.core.request_window.cancel(self.waiter)
+
+        elif status is None:
+            self.core.request_window.leave(self.name)
+
+        else:
+            latency = time.monotonic() - self.sent
+            self.core.request_window.leave(self.name, latency, status == MessageStatus.OK)
+
+    def __release_followers(self, message_verb, status):
+        """ Deliver the response to all followers. If the request timed out or was canceled the first
+        follower takes over, as the followers may still have time left.
+        """
+
+        followers = self.followers
+        self.followers = list()
+
+        if not followers:
+            return
+
+        if status is None or status == MessageStatus.TIMEOUT:
+            leader = followers[0]
+            leader.leader = None
+            leader.followers = followers[1:]
+
+            for follower in leader.followers:
+                follower.leader = leader
+
+            leader.__lead()
+
+        else:
+            for follower in followers:
+                follower.leader = None
+                follower.__on_message(message_verb)
+
     def cancel(self):
         """ Cancel the request.
         This will only have effect if the request was not send yet because the connection was down, and
-        is still in the backlog queue.
+        is still in the backlog queue, or because it is still waiting for the request window.
         """
 
-        res = self.core.cancel(self.verb)
+        res = self.sent is None or self.core.cancel(self.verb)
 
         if not res:
             logger.info('Request cancelation had no effect as it was already send.')
 
-        self.core.discard_messageref(self.messageref)
+        self.__finish()
+        self.__release_followers(None, None)
 
 
 class Session:
@@ -608,29 +1170,79 @@ class Session:
     # to cancel the session
     sess.cancel()
 
+    When the session is created with last_value=True it keeps the last value that was published on
+    every topic. New interest in a topic that has a value is answered with that value directly,
+    without calling the interest handlers, and publishing a value that did not change is skipped.
+
+    When the session is created with delta=True, publish() sends a snapshot of the value to every
+    new interest, and after that only the difference with the previous value. Subscriptions that
+    are created with delta=True reconstruct the value, and ask for a new snapshot when they miss
+    an update.
+
+    When the session is created with an executor, the call handlers are run by the executor. The
+    calls they get are ExecutorCalls, which can be posted to from any thread.
+
     """
 
-    def __init__(self, core, name, force, persist, standby):
+    def __init__(self, core, name, force, persist, standby, last_value=False, delta=False,
+                 executor=None):
+
+        if executor is not None and not core.loop:
+            raise ValueError("A session with an executor requires a mainloop")
+
         self.core = core
         self.name = name
         self.force = force
         self.persist = persist
         self.standby = standby
+        self.executor = executor
+
+        # the name is only encoded once, incoming verbs are matched on the encoded name
+        self.name_b = encode_name(self.name)
+        self.serializer = self.core.serializer_for(self.name)
 
         # set handlers for events from core
-        self.core.set_call_handler(self.name, self.__on_call)
-        self.core.set_interest_handler(self.name, self.__on_interest)
+        self.core.set_call_handler(self.name_b, self.__on_call)
+        self.core.set_interest_handler(self.name_b, self.__on_interest)
         self.core.add_connection_lost_handler(self.__on_connection_lost)
 
         self.call_handlers = HandlerList()
-        self.interest_handlers = HandlerList()
+        self.interest_handlers = HandlerList(INTEREST_STATUSES)
 
-        # dict used to keep track of what interests present
+        # dict used to keep track of what interests present, maps topics to a dict of postrefs
+        # to interest verbs
         self.current_interest = dict()
 
+        # the topics in current_interest, used to let all interest verbs for a topic share the
+        # same bytes object
+        self.topics = dict()
+
+        # mapping of topics to the last published payload, None when the cache is disabled
+        self.last_values = dict() if last_value else None
+
+        # postrefs that were answered from the last value cache, the interest handlers don't
+        # know about these so they are not told when the interest is gone either
+        self.cached_postrefs = set()
+
+        # in delta mode: mapping of topics to (seq, payload) tuples of the last published value,
+        # and the postrefs that received a snapshot and can receive deltas
+        self.delta_values = dict() if delta else None
+        self.synced_postrefs = set()
+
+        # stats
+        self.created = time.monotonic()
+        self.nr_publishes = 0
+        self.nr_published_posts = 0
+        self.nr_suppressed_publishes = 0
+        self.nr_cached_posts = 0
+        self.nr_snapshot_posts = 0
+        self.nr_delta_posts = 0
+
+        self.default_ttl = 5.0
+
         # send login verb
         self.verb = verbs.LoginVerb(
-            name=encode_name(self.name),
+            name=self.name_b,
             enforce=self.force,
             standby=self.standby,
             persist=self.persist,
@@ -660,7 +1272,19 @@ class Session:
         self.interest_handlers.add(handler, filter)
 
     def __on_call(self, call_verb):
-        call = Call(self.core, call_verb, self)
+
+        if self.executor is not None:
+            call = ExecutorCall(self.core, call_verb, self, self.serializer)
+            self.executor.submit(call, self.__call_handlers)
+            return
+
+        call = Call(self.core, call_verb, self, self.serializer)
+        self.call_handlers.call(None, call)
+
+    def __call_handlers(self, call):
+        """ Called by the executor on one of its threads.
+        """
+
         self.call_handlers.call(None, call)
 
     def __on_interest(self, interest_verb):
@@ -670,25 +1294,202 @@ class Session:
         status = interest_verb.status
 
         # store interest in local interest_dict, this is needed to simulate NO_INTEREST
-        # verbs when the connection is lost (see __on_connection_lost method)
+        # verbs when the connection is lost (see __on_connection_lost method), and to know
+        # where to post to when publishing
         if status == verbs.InterestVerb.STATUS_INTEREST:
-            self.current_interest[topic] = interest_verb
+            topic = interest_verb.topic = self.topics.setdefault(topic, topic)
+            self.current_interest.setdefault(topic, dict())[interest_verb.postref] = interest_verb
+
         elif status == verbs.InterestVerb.STATUS_NO_INTEREST:
-            self.current_interest.pop(topic, None)
+            postrefs = self.current_interest.get(topic, None)
+
+            if postrefs is not None:
+                postrefs.pop(interest_verb.postref, None)
+
+                if not postrefs:
+                    del self.current_interest[topic]
+                    del self.topics[topic]
 
-        interest = Interest(self.core, interest_verb, self)
-        self.interest_handlers.call(interest.status, interest)
+            self.synced_postrefs.discard(interest_verb.postref)
+
+            if interest_verb.postref in self.cached_postrefs:
+                self.cached_postrefs.discard(interest_verb.postref)
+                return
+
+        # post the current value to new interest, if there is one
+        if status == verbs.InterestVerb.STATUS_INTEREST:
+            payload = self.__initial_payload(topic, interest_verb.postref)
+
+            if payload is not None:
+                self.core.put_upstream(verbs.PostVerb(
+                    postref=interest_verb.postref,
+                    payload=payload,
+                ), ttl=self.default_ttl)
+
+            # answered from the last value cache, the handlers don't have to know
+            if payload is not None and self.last_values is not None:
+                self.cached_postrefs.add(interest_verb.postref)
+                self.nr_cached_posts += 1
+                return
+
+        interest = Interest(self.core, interest_verb, self, self.serializer)
+        self.interest_handlers.call_status(interest_verb.status, interest)
+
+    def __initial_payload(self, topic, postref):
+        """ Return the payload to post to new interest in the given topic, or None if nothing
+        should be posted.
+        """
+
+        if self.delta_values is not None and topic in self.delta_values:
+            seq, payload = self.delta_values[topic]
+
+            self.synced_postrefs.add(postref)
+            self.nr_snapshot_posts += 1
+
+            return delta.pack_snapshot(seq, payload)
+
+        if self.last_values:
+            return self.last_values.get(topic, None)
+
+        return None
 
     def __on_connection_lost(self):
         """ Called when the connection is lost.
         """
 
         # simulate a NO_INTEREST verb for all currently known interests
+        self.topics.clear()
+
         while self.current_interest:
-            topic, verb = self.current_interest.popitem()
-            verb.status = verbs.InterestVerb.STATUS_NO_INTEREST
+            topic, postrefs = self.current_interest.popitem()
+
+            for verb in postrefs.values():
+                verb.status = verbs.InterestVerb.STATUS_NO_INTEREST
+
+                self.__on_interest(verb)
+
+    def publish(self, topic, value, ttl=None):
+        """ Post a value to everyone that currently has interest in the given topic.
+
+        The value is encoded only once, and the posts for all interests are send upstream at once.
+        Returns the number of posts that were made.
+
+        If the session keeps last values, the value is stored even if there is no interest in the
+        topic, and nothing is posted if the value is the same as the last published value.
+
+        In delta mode, interests that already received the previous value only receive the
+        difference with that value.
+
+        Example:
+
+        # to publish a new price to all subscribers of the 'EURUSD' topic
+        sess.publish('EURUSD', 1.0876)
+
+        """
+
+        topic = self.serializer.encode(topic)
+        postrefs = self.current_interest.get(topic, None)
+
+        self.nr_publishes += 1
+
+        # values have to be kept when caching or in delta mode, otherwise they are only encoded
+        # when someone is interested
+        if not postrefs and self.last_values is None and self.delta_values is None:
+            return 0
+
+        payload = self.serializer.encode(value)
+
+        if self.last_values is not None or self.delta_values is not None:
+            payload = freeze_payload(payload)
+
+        if self.last_values is not None:
+            if self.last_values.get(topic, None) == payload:
+                self.nr_suppressed_publishes += 1
+                return 0
 
-            self.__on_interest(verb)
+            self.last_values[topic] = payload
+
+        previous = None
+        if self.delta_values is not None:
+            previous = self.delta_values.get(topic, None)
+            seq = delta.next_seq(previous[0]) if previous else 1
+
+            self.delta_values[topic] = (seq, payload)
+
+        if not postrefs:
+            return 0
+
+        ttl = ttl or self.default_ttl
+
+        if self.delta_values is not None:
+            post_verbs = self.__delta_posts(postrefs, seq, previous, payload)
+        else:
+            post_verbs = [verbs.PostVerb(postref=postref, payload=payload) for postref in postrefs]
+
+        self.core.put_upstream_many(post_verbs, ttl=ttl)
+
+        self.nr_published_posts += len(postrefs)
+
+        return len(postrefs)
+
+    def __delta_posts(self, postrefs, seq, previous, payload):
+        """ Return the post verbs for publishing in delta mode. Interests that received the previous
+        value get a delta, others get a snapshot. Both frames are created at most once.
+        """
+
+        snapshot_frame = None
+        delta_frame = None
+
+        post_verbs = list()
+        for postref in postrefs:
+
+            if previous and postref in self.synced_postrefs:
+                if delta_frame is None:
+                    delta_frame = delta.pack_delta(seq, previous[1], payload)
+
+                post_verbs.append(verbs.PostVerb(postref=postref, payload=delta_frame))
+                self.nr_delta_posts += 1
+
+            else:
+                if snapshot_frame is None:
+                    snapshot_frame = delta.pack_snapshot(seq, payload)
+
+                post_verbs.append(verbs.PostVerb(postref=postref, payload=snapshot_frame))
+                self.synced_postrefs.add(postref)
+                self.nr_snapshot_posts += 1
+
+        return post_verbs
+
+    def stats(self):
+        """ Return a dict with metrics about publishing on this session.
+        """
+
+        elapsed = time.monotonic() - self.created
+
+        return {
+            'publishes': self.nr_publishes,
+            'published_posts': self.nr_published_posts,
+            'publish_rate': self.nr_publishes / elapsed if elapsed > 0 else 0.0,
+            'publish_fanout': self.nr_published_posts / self.nr_publishes if self.nr_publishes else 0.0,
+            'suppressed_publishes': self.nr_suppressed_publishes,
+            'cached_posts': self.nr_cached_posts,
+            'snapshot_posts': self.nr_snapshot_posts,
+            'delta_posts': self.nr_delta_posts,
+        }
+
+    def forget(self, topic=None):
+        """ Remove the last published value of the given topic, or of all topics if no topic is
+        given. New interest in the topic will be passed to the interest handlers again.
+        """
+
+        for values in (self.last_values, self.delta_values):
+            if values is None:
+                continue
+
+            if topic is None:
+                values.clear()
+            else:
+                values.pop(self.serializer.encode(topic), None)
 
     def cancel(self):
         """ Cancel the session.
@@ -698,11 +1499,11 @@ class Session:
 
         if not res:
             self.core.put_upstream(verbs.LogoutVerb(
-                name=encode_name(self.name)
+                name=self.name_b
             ))
 
-        self.core.set_call_handler(self.name, None)
-        self.core.set_interest_handler(self.name, None)
+        self.core.set_call_handler(self.name_b, None)
+        self.core.set_interest_handler(self.name_b, None)
         self.core.remove_connection_lost_handler(self.__on_connection_lost)
 
 
@@ -714,18 +1515,39 @@ class Message:
 
     """
 
-    def __init__(self, core, verb, source):
+    def __init__(self, core, verb, source, payload=None):
         self.core = core
         self.verb = verb
         self.source = source
 
         self.status = MessageStatus.from_verb(verb)
 
+        # the payload is decoded when it is first read, the caller may give a LazyPayload that
+        # is shared with other messages
         if self.status == MessageStatus.OK:
-            self.payload = self.core.decode_payload(verb.payload)
-
+            self.lazy_payload = payload or LazyPayload(self.core.serializer, verb.payload)
         else:
-            self.payload = None
+            self.lazy_payload = None
+
+    @property
+    def payload(self):
+        """ The decoded payload, or None if the status isn't OK.
+        """
+
+        if self.lazy_payload is None:
+            return None
+
+        return self.lazy_payload.get()
+
+    @property
+    def raw_payload(self):
+        """ The payload as it was received, without decoding it, or None if the status isn't OK.
+        """
+
+        if self.lazy_payload is None:
+            return None
+
+        return self.lazy_payload.raw
 
     def __repr__(self):
         return f"Message({self.status.name}, {repr(self.payload)})"
@@ -749,18 +1571,39 @@ class Call:
 
     """
 
-    def __init__(self, core, verb, source):
+    def __init__(self, core, verb, source, serializer=None):
         self.core = core
         self.verb = verb
         self.source = source
+        self.serializer = serializer or self.core.serializer
 
         self.unidirectional = verb.unidirectional
-        self.name = decode_name(verb.name)
         self.postref = verb.postref
-        self.payload = self.core.decode_payload(verb.payload)
+        self.lazy_payload = LazyPayload(self.serializer, verb.payload)
 
         self.default_ttl = 5.0
 
+    @property
+    def payload(self):
+        """ The decoded payload, decoded when it is first read.
+        """
+
+        return self.lazy_payload.get()
+
+    @property
+    def raw_payload(self):
+        """ The payload as it was received, without decoding it.
+        """
+
+        return self.verb.payload
+
+    @property
+    def name(self):
+        """ The name of the session the call was made to, decoded when it is read.
+        """
+
+        return decode_name(self.verb.name)
+
     def post(self, payload, ttl=None):
         """ Post a response to the call.
 
@@ -774,16 +1617,45 @@ class Call:
 
         ttl = ttl or self.default_ttl
 
-        post = Post(self.core, self.postref, payload, ttl)
+        post = Post(self.core, self.postref, payload, ttl, self.serializer)
         return post
 
     def __repr__(self):
         return f"Call({self.name}, {repr(self.payload)})"
 
 
+class ExecutorCall(Call):
+    """ Call that is passed to call handlers that are run by an executor, see Channel.session().
+
+    The payload of a post is encoded on the thread that posts it, sending it is handed over to the
+    mainloop, as the core may only be used from the thread that runs the mainloop.
+    """
+
+    def post(self, payload, ttl=None):
+        """ Post a response to the call, may be called from any thread. Returns None, as the post
+        is only created on the mainloop. Raises ValueError if the post is invalid.
+        """
+
+        if self.unidirectional:
+            logger.warning("Post done on unidirectional call, it will be ignored")
+            return
+
+        ttl = ttl or self.default_ttl
+
+        verb = verbs.PostVerb(
+            postref=self.postref,
+            payload=freeze_payload(self.serializer.encode(payload)),
+        )
+
+        # validate here, so an invalid post raises in the handler instead of on the mainloop
+        verb.validate()
+
+        self.core.loop.call_soon(self.core.put_upstream, verb, ttl)
+
+
 class Interest:
 
-    def __init__(self, core, verb, source):
+    def __init__(self, core, verb, source, serializer=None):
         """ Class used to represent an incoming interest.
 
         An instance of this class is passed to the handlers for interests, e.g. those set
@@ -804,14 +1676,35 @@ class Interest:
         self.core = core
         self.verb = verb
         self.source = source
+        self.serializer = serializer or self.core.serializer
 
         self.status = InterestStatus.from_verb(verb)
-        self.name = decode_name(verb.name)
         self.postref = verb.postref
-        self.topic = self.core.decode_payload(verb.topic)
+        self.lazy_topic = LazyPayload(self.serializer, verb.topic)
 
         self.default_ttl = 5.0
 
+    @property
+    def topic(self):
+        """ The decoded topic, decoded when it is first read.
+        """
+
+        return self.lazy_topic.get()
+
+    @property
+    def raw_topic(self):
+        """ The topic as it was received, without decoding it.
+        """
+
+        return self.verb.topic
+
+    @property
+    def name(self):
+        """ The name of the session the interest is for, decoded when it is read.
+        """
+
+        return decode_name(self.verb.name)
+
     def post(self, payload, ttl=None):
         """ Post a response to an interest.
 
@@ -825,10 +1718,33 @@ class Interest:
 
         ttl = ttl or self.default_ttl
 
-        post = Post(self.core, self.postref, payload, ttl)
+        post = Post(self.core, self.postref, payload, ttl, self.serializer)
         return post
 
 
+class LazyPayload:
+    """ Class used internally to decode a payload only when it is needed, and only once.
+    """
+
+    __slots__ = ('serializer', 'raw', 'value', 'decoded')
+
+    def __init__(self, serializer, raw):
+        self.serializer = serializer
+        self.raw = raw
+        self.value = None
+        self.decoded = False
+
+    def get(self):
+        """ Return the decoded payload.
+        """
+
+        if not self.decoded:
+            self.value = self.serializer.decode(self.raw)
+            self.decoded = True
+
+        return self.value
+
+
 class Post:
     """ Class used to represent a post.
 
@@ -837,15 +1753,16 @@ class Post:
 
     """
 
-    def __init__(self, core, postref, payload, ttl):
+    def __init__(self, core, postref, payload, ttl, serializer=None):
         self.core = core
         self.postref = postref
         self.payload = payload
         self.ttl = ttl
+        self.serializer = serializer or self.core.serializer
 
         self.verb = verbs.PostVerb(
             postref=self.postref,
-            payload=self.core.encode_payload(self.payload),
+            payload=self.serializer.encode(self.payload),
         )
 
         self.core.put_upstream(self.verb, ttl=self.ttl)
@@ -859,20 +1776,53 @@ class Post:
 
 class HandlerList:
     """ Class used internally to easely manage multiple handlers and allow filters to be used.
+
+    For every filter that the list is called with, a tuple of the matching handlers is compiled
+    once and reused on later calls. When a mapping of status codes to filters is given, the tuples
+    for those status codes are compiled whenever a handler is added, so call_status() can dispatch
+    on the status code of a verb directly.
     """
 
-    def __init__(self):
+    def __init__(self, statuses=None):
         self.handlers = list()
+        self.statuses = statuses or {}
+
+        # mapping of call filters to tuples of handlers, compiled on first use
+        self.tables = dict()
+
+        # mapping of status codes to tuples of handlers
+        self.status_tables = dict()
 
     def add(self, handler, filter):
         self.handlers.append((handler, filter))
 
+        self.tables.clear()
+        self.status_tables = {
+            code: self.__compile(status) for code, status in self.statuses.items()
+        }
+
     def call(self, call_filter, *args, **kwargs):
 
-        for handler, handler_filter in self.handlers:
+        try:
+            handlers = self.tables[call_filter]
+        except KeyError:
+            handlers = self.tables[call_filter] = self.__compile(call_filter)
+
+        for handler in handlers:
+            handler(*args, **kwargs)
+
+    def call_status(self, status, *args, **kwargs):
+        """ Call the handlers whose filter matches the given status code.
+        """
+
+        for handler in self.status_tables.get(status, ()):
+            handler(*args, **kwargs)
 
-            if call_filter is None or call_filter & handler_filter:
-                handler(*args, **kwargs)
+    def __compile(self, call_filter):
+        return tuple(
+            handler for handler, handler_filter in self.handlers
+            if call_filter is None or call_filter & handler_filter
+        )
 
     def __len__(self):
         return len(self.handlers)
@@ -905,3 +1855,14 @@ def decode_name(bts):
     """
 
     return bts.decode()
+
+
+def freeze_payload(payload):
+    """ Return the encoded payload as bytes. Payloads may be any buffer, but payloads that are kept
+    as keys or cached values must not change when the buffer they were encoded in is reused.
+    """
+
+    if type(payload) == bytes:
+        return payload
+
+    return bytes(payload)
@@ -0,0 +1,395 @@
+import random
+import struct
+import logging
+
+from nervix import verbs
+from nervix.channel import Request, Call, Post, Message, HandlerList, LazyPayload, MessageStatus, \
+    MESSAGE_STATUSES
+from nervix.serializers.raw import RAW
+from nervix.util.deadlines import DeadlineQueue
+
+logger = logging.getLogger(__name__)
+
+# header of every chunk frame: magic, kind, transfer id, chunk index and total size of the transfer
+FRAME = struct.Struct('>4sBQII')
+FRAME_MAGIC = b'\x00NXC'
+
+# the largest part of a payload that fits in a single frame
+CHUNK_SIZE = verbs.MAX_PAYLOAD_SIZE - FRAME.size
+
+# kinds of frames
+KIND_DATA = 1
+KIND_ACK = 2
+KIND_PULL = 3
+KIND_ERROR = 4
+
+DEFAULT_MAX_TRANSFER_SIZE = 2 ** 24
+
+
+def pack_frame(kind, transfer_id, index=0, total=0, data=b''):
+    return FRAME.pack(FRAME_MAGIC, kind, transfer_id, index, total) + data
+
+
+def unpack_frame(payload):
+    """ Returns a (kind, transfer_id, index, total, data) tuple, or None if the payload is not a
+    chunk frame.
+    """
+
+    if not payload or len(payload) < FRAME.size or payload[:len(FRAME_MAGIC)] != FRAME_MAGIC:
+        return None
+
+    _, kind, transfer_id, index, total = FRAME.unpack_from(payload)
+
+    return kind, transfer_id, index, total, payload[FRAME.size:]
+
+
+def split(data):
+    """ Split the data in chunks that fit in a frame, there is always at least one chunk.
+    """
+
+    return [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)] or [b'']
+
+
+def nr_chunks(total):
+    return max(1, (total + CHUNK_SIZE - 1) // CHUNK_SIZE)
+
+
+class ChunkedRequestStub:
+    """ Class used to send requests whose payload, or response, may be larger than the 32 KB that
+    fits in a single request or post.
+
+    The payload is split in chunks that are send as separate requests, the session reassembles
+    them and the response is retrieved chunk by chunk. This only works with sessions that use a
+    ChunkedSession, as both sides need to understand the chunk frames.
+
+    Handlers are called with a Message that holds the complete response. Chunk handlers are called
+    with (data, index, count) for every chunk of the response as it arrives, which allows large
+    responses to be processed while they are still being received.
+
+    Example:
+
+    .. code-block:: py
+
+        req = ChunkedRequestStub(channel, 'name', large_payload)
+        req.add_handler(function_to_be_called_with_the_response)
+        req.send()
+
+    """
+
+    def __init__(self, channel, name=None, payload=None, timeout=None, ttl=None,
+                 max_transfer_size=DEFAULT_MAX_TRANSFER_SIZE):
+        self.core = channel.core
+        self.name = name
+        self.payload = payload
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_transfer_size = max_transfer_size
+
+        self.default_timeout = 5.0
+        self.default_ttl = 5.0
+
+        self.handlers = HandlerList(MESSAGE_STATUSES)
+        self.chunk_handlers = list()
+
+    def add_handler(self, handler, filter=MessageStatus.ANY):
+        """ Add a handler that should be called when the complete response is received, or when the
+        transfer failed.
+        """
+
+        self.handlers.add(handler, filter)
+
+    def add_chunk_handler(self, handler):
+        """ Add a handler that should be called for every chunk of the response.
+        """
+
+        self.chunk_handlers.append(handler)
+
+    def send(self, name=None, payload=None, timeout=None, ttl=None):
+        """ Send the request, returns the ChunkedRequest.
+        """
+
+        name = name or self.name
+        payload = payload or self.payload
+        timeout = timeout or self.timeout or self.default_timeout
+        ttl = ttl if ttl is not None else self.ttl
+        ttl = ttl if ttl is not None else self.default_ttl
+
+        return ChunkedRequest(self, name, payload, timeout, ttl)
+
+
+class ChunkedRequest:
+    """ Class used to represent a single chunked request.
+
+    This class should not be instantiated directly but should only be obtained by calling
+    the ChunkedRequestStub.send() method.
+    """
+
+    def __init__(self, stub, name, payload, timeout, ttl):
+        self.core = stub.core
+        self.stub = stub
+        self.name = name
+        self.timeout = timeout
+        self.ttl = ttl
+
+        self.serializer = self.core.serializer_for(name)
+        self.transfer_id = random.getrandbits(64)
+        self.finished = False
+
+        # requests that have not been answered yet, they all share the same handler
+        self.requests = list()
+        self.handlers = HandlerList(MESSAGE_STATUSES)
+        self.handlers.add(self.__on_message, MessageStatus.ANY)
+
+        # chunks of the response, None until the first chunk arrives
+        self.chunks = None
+        self.nr_received = 0
+
+        data = self.serializer.encode(payload)
+        chunks = split(data)
+
+        for index, chunk in enumerate(chunks):
+            self.__request(pack_frame(KIND_DATA, self.transfer_id, index, len(data), chunk))
+
+    def cancel(self):
+        """ Cancel the request, handlers will not be called.
+        """
+
+        self.finished = True
+
+        for request in self.requests:
+            request.cancel()
+
+        self.requests = list()
+
+    def __request(self, frame):
+        self.requests.append(
+            Request(self.core, self.name, frame, self.timeout, self.ttl, self.handlers, RAW)
+        )
+
+    def __on_message(self, msg):
+
+        if msg.source in self.requests:
+            self.requests.remove(msg.source)
+
+        if self.finished:
+            return
+
+        if msg.status != MessageStatus.OK:
+            self.__fail(msg.verb.status)
+            return
+
+        frame = unpack_frame(msg.raw_payload)
+
+        if frame is None or frame[0] == KIND_ERROR:
+            logger.warning("Chunked request to %s failed: %s", self.name,
+                           "invalid response" if frame is None else frame[4].decode(errors='replace'))
+            self.__fail(verbs.MessageVerb.STATUS_UNREACHABLE)
+            return
+
+        kind, transfer_id, index, total, data = frame
+
+        if kind != KIND_DATA:
+            return
+
+        if self.chunks is None:
+            if total > self.stub.max_transfer_size:
+                logger.warning("Response to chunked request exceeds %d bytes",
+                               self.stub.max_transfer_size)
+                self.__fail(verbs.MessageVerb.STATUS_UNREACHABLE)
+                return
+
+            # the first chunk tells how many chunks to pull
+            self.chunks = [None] * nr_chunks(total)
+
+            for pull_index in range(1, len(self.chunks)):
+                self.__request(pack_frame(KIND_PULL, transfer_id, pull_index))
+
+        if index >= len(self.chunks) or self.chunks[index] is not None:
+            return
+
+        self.chunks[index] = data
+        self.nr_received += 1
+
+        for handler in self.stub.chunk_handlers:
+            handler(data, index, len(self.chunks))
+
+        if self.nr_received == len(self.chunks):
+            self.__finish(verbs.MessageVerb.STATUS_OK, b''.join(self.chunks))
+
+    def __fail(self, status):
+        self.cancel()
+        self.__finish(status, None)
+
+    def __finish(self, status, payload):
+        self.finished = True
+        self.chunks = None
+
+        verb = verbs.MessageVerb(messageref=None, status=status, payload=payload)
+        msg = Message(self.core, verb, self, LazyPayload(self.serializer, payload))
+
+        self.stub.handlers.call_status(status, msg)
+
+
+class ChunkedSession:
+    """ Class used to receive chunked requests on a session, see ChunkedRequestStub.
+
+    Chunks of a request are collected until the request is complete, then the call handlers are
+    called with a Call that holds the complete payload. Posts to such calls are split in chunks as
+    well, which the requester retrieves one by one. Calls that were not chunked are passed to the
+    call handlers unchanged.
+
+    Transfers larger than max_transfer_size are refused. Transfers that are not completed within
+    timeout seconds are discarded, as are responses that are not retrieved within that time.
+
+    The session can not have an executor, as the chunks are collected and posted on the mainloop.
+
+    Example:
+
+    .. code-block:: py
+
+        sess = channel.session('name')
+        chunked = ChunkedSession(sess)
+        chunked.add_call_handler(function_to_be_called_on_incoming_calls)
+
+    """
+
+    def __init__(self, session, max_transfer_size=DEFAULT_MAX_TRANSFER_SIZE, timeout=30.0):
+
+        if session.executor is not None:
+            raise ValueError("A ChunkedSession can not be used on a session with an executor")
+
+        self.session = session
+        self.core = session.core
+        self.max_transfer_size = max_transfer_size
+        self.timeout = timeout
+
+        self.call_handlers = HandlerList()
+
+        # transfers that are being received, mapping of transfer ids to lists of chunks
+        self.incoming = dict()
+
+        # responses that are being retrieved, mapping of transfer ids to lists of chunks, and the
+        # number of chunks that still have to be pulled
+        self.outgoing = dict()
+        self.nr_unpulled = dict()
+
+        self.deadlines = DeadlineQueue(self.core.loop, self.__on_expired)
+
+        self.session.add_call_handler(self.__on_call)
+
+    def add_call_handler(self, handler):
+        """ Add a handler that should be called on incoming calls, chunked or not.
+        """
+
+        self.call_handlers.add(handler, None)
+
+    def respond(self, postref, payload, ttl):
+        """ Post the given encoded payload in chunks, called by ChunkedCall.post().
+        """
+
+        chunks = split(payload)
+        transfer_id = random.getrandbits(64)
+
+        if len(chunks) > 1:
+            self.outgoing[transfer_id] = chunks
+            self.nr_unpulled[transfer_id] = len(chunks) - 1
+            self.deadlines.add(('out', transfer_id), self.timeout)
+
+        return self.__post(postref, pack_frame(KIND_DATA, transfer_id, 0, len(payload), chunks[0]),
+                           ttl)
+
+    def __post(self, postref, frame, ttl=None):
+        return Post(self.core, postref, frame, ttl or 5.0, RAW)
+
+    def __on_call(self, call):
+        frame = unpack_frame(call.raw_payload)
+
+        if frame is None:
+            self.call_handlers.call(None, call)
+            return
+
+        kind, transfer_id, index, total, data = frame
+
+        if kind == KIND_DATA:
+            self.__on_data(call, transfer_id, index, total, data)
+
+        elif kind == KIND_PULL:
+            chunks = self.outgoing.get(transfer_id, None)
+
+            if chunks is None or index >= len(chunks):
+                self.__post(call.postref, pack_frame(KIND_ERROR, transfer_id, data=b'unknown transfer'))
+                return
+
+            self.__post(call.postref, pack_frame(KIND_DATA, transfer_id, index, 0, chunks[index]))
+
+            self.nr_unpulled[transfer_id] -= 1
+            if not self.nr_unpulled[transfer_id]:
+                self.__discard('out', transfer_id)
+
+    def __on_data(self, call, transfer_id, index, total, data):
+
+        if total > self.max_transfer_size:
+            self.__post(call.postref, pack_frame(KIND_ERROR, transfer_id, data=b'transfer too large'))
+            return
+
+        chunks = self.incoming.get(transfer_id, None)
+
+        if chunks is None:
+            chunks = self.incoming[transfer_id] = [None] * nr_chunks(total)
+            self.deadlines.add(('in', transfer_id), self.timeout)
+
+        if index >= len(chunks):
+            self.__post(call.postref, pack_frame(KIND_ERROR, transfer_id, data=b'invalid chunk'))
+            return
+
+        chunks[index] = data
+
+        if any(chunk is None for chunk in chunks):
+            self.__post(call.postref, pack_frame(KIND_ACK, transfer_id, index))
+            return
+
+        self.__discard('in', transfer_id)
+
+        # the call that completes the transfer is the one that gets the response
+        verb = verbs.CallVerb(
+            unidirectional=False,
+            postref=call.postref,
+            name=call.verb.name,
+            payload=b''.join(chunks),
+        )
+
+        self.call_handlers.call(None, ChunkedCall(self, verb, self.session, call.serializer))
+
+    def __discard(self, direction, transfer_id):
+        if direction == 'in':
+            self.incoming.pop(transfer_id, None)
+        else:
+            self.outgoing.pop(transfer_id, None)
+            self.nr_unpulled.pop(transfer_id, None)
+
+        self.deadlines.remove((direction, transfer_id))
+
+    def __on_expired(self, key):
+        direction, transfer_id = key
+
+        logger.info("Chunked transfer %x expired", transfer_id)
+
+        self.__discard(direction, transfer_id)
+
+
+class ChunkedCall(Call):
+    """ Call of which the response is posted in chunks, passed to the handlers of a ChunkedSession
+    when a chunked request is complete.
+    """
+
+    def __init__(self, chunked_session, verb, source, serializer=None):
+        Call.__init__(self, chunked_session.core, verb, source, serializer)
+        self.chunked_session = chunked_session
+
+    def post(self, payload, ttl=None):
+        """ Post a response to the call, the response may be larger than 32 KB.
+        """
+
+        ttl = ttl or self.default_ttl
+
+        return self.chunked_session.respond(self.postref, self.serializer.encode(payload), ttl)
@@ -0,0 +1,82 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class OrderedExecutor:
+    """ Runs call handlers in a pool of threads, see Channel.session().
+
+    The key function is called with every item, e.g. a Call, and items with the same key are handled
+    one after the other in the order they were submitted. Items with different keys are handled in
+    parallel. Without key function, or when it returns None, items are handled in any order.
+
+    Example:
+
+    .. code-block:: py
+
+        # calls with the same payload are handled in order
+        executor = OrderedExecutor(max_workers=8, key=lambda call: call.raw_payload)
+        sess = channel.session('name', executor=executor)
+
+    """
+
+    def __init__(self, max_workers=4, key=None):
+        self.key = key
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='nervix-executor')
+
+        # mapping of keys to the queues of items that wait for the item that is being handled, a key
+        # is in the mapping as long as one of its items is being handled
+        self.queues = dict()
+        self.lock = threading.Lock()
+
+    def submit(self, item, func):
+        """ Call func with the given item on one of the threads.
+        """
+
+        key = self.key(item) if self.key else None
+
+        if key is None:
+            self.pool.submit(self.__call, func, item)
+            return
+
+        with self.lock:
+            queue = self.queues.get(key, None)
+
+            if queue is not None:
+                queue.append((func, item))
+                return
+
+            self.queues[key] = deque(((func, item),))
+
+        self.pool.submit(self.__run, key)
+
+    def shutdown(self, wait=True):
+        """ Stop the threads, after the items that were submitted are handled if wait is True.
+        """
+
+        self.pool.shutdown(wait)
+
+    def __run(self, key):
+        """ Handle the items of the given key until its queue is empty.
+        """
+
+        while True:
+            with self.lock:
+                queue = self.queues[key]
+
+                if not queue:
+                    del self.queues[key]
+                    return
+
+                func, item = queue.popleft()
+
+            self.__call(func, item)
+
+    def __call(self, func, item):
+        try:
+            func(item)
+        except Exception:
+            logger.exception("Exception in handler running in executor")
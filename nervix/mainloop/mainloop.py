@@ -1,5 +1,7 @@
 import time
 import heapq
+import threading
+from collections import deque
 
 import selectors
 
@@ -32,6 +34,10 @@ class Mainloop:
     The run_forever method will run the loop forever until the
     shutdown() method is called. The mainloop will then run for at most
     one more cycle.
+
+    Functions can be scheduled to run on the next cycle by calling the
+    call_soon() method, this is the only method that may be called from
+    other threads than the one running the mainloop.
     """
 
     SIG_WAKEUP = 0
@@ -50,6 +56,11 @@ class Mainloop:
 
         self.control = Control(self)
 
+        # deque of (func, args, kwargs) tuples to be called on the next cycle, the lock makes sure
+        # that a call is never added without wakeup while the loop takes the calls out
+        self.pending_calls = deque()
+        self.pending_calls_lock = threading.Lock()
+
         self.shutdown_flag = False
 
     def now(self):
@@ -61,6 +72,21 @@ class Mainloop:
     def shutdown(self):
         self.control.signal(Mainloop.SIG_SHUTDOWN)
 
+    def call_soon(self, func, *args, **kwargs):
+        """
+        Schedule the given function to be called on the next cycle of
+        the mainloop. This method is thread safe.
+        """
+
+        # only wake up the mainloop if it wasn't woken up already for an earlier call
+        with self.pending_calls_lock:
+            wakeup = not self.pending_calls
+
+            self.pending_calls.append((func, args, kwargs))
+
+        if wakeup:
+            self.control.signal(Mainloop.SIG_WAKEUP)
+
     def run_forever(self):
 
         while not self.shutdown_flag:
@@ -76,6 +102,7 @@ class Mainloop:
         nr_writes = 0
         nr_reads = 0
         nr_signals = 0
+        nr_calls = 0
 
         # retrieve the remaining time for the first timer to expire
         timer_timeout = self._get_next_timer_deadline()
@@ -92,6 +119,10 @@ class Mainloop:
         elif timer_timeout:
             timeout = timer_timeout
 
+        # don't wait if there are calls pending
+        if self.pending_calls:
+            timeout = 0
+
         # wait for events
         events = self.selector.select(timeout)
 
@@ -136,7 +167,17 @@ class Mainloop:
             if signal == Mainloop.SIG_SHUTDOWN:
                 self.shutdown_flag = True
 
-        return nr_timers + nr_writes + nr_reads + nr_signals
+        # process pending calls, calls that are scheduled by these calls will run on the next cycle
+        for _ in range(len(self.pending_calls)):
+
+            nr_calls += 1
+
+            with self.pending_calls_lock:
+                func, args, kwargs = self.pending_calls.popleft()
+
+            func(*args, **kwargs)
+
+        return nr_timers + nr_writes + nr_reads + nr_signals + nr_calls
 
     def register(self, fd):
         """
@@ -11,6 +11,13 @@ class BaseConnection:
     def send_verb(self, verb):
         raise NotImplementedError()
 
+    def send_verbs(self, verb_list):
+        """ Send multiple verbs at once. Subclasses may override this to send them more efficiently.
+        """
+
+        for verb in verb_list:
+            self.send_verb(verb)
+
 
 def host_port_parser(address_str):
     """ Function to parse an address string and return a (host, port) tuple.
@@ -87,7 +87,7 @@ class NxtcpConnection(BaseConnection):
             decoder.InterestPacket: self.__on_interest_packet,
         }
 
-        # mapping of handlers verbs that are to be encoded
+        # mapping of handlers that create packets for verbs that are to be encoded
         self.verb_handlers = {
             verbs.LoginVerb: self.__on_login_verb,
             verbs.LogoutVerb: self.__on_logout_verb,
@@ -125,6 +125,29 @@ class NxtcpConnection(BaseConnection):
         """ Called from Core when a verb should be send upstream.
         """
 
+        packet = self.__verb_packet(verb)
+
+        # encode the packet and start writing
+        self.encoder.encode(packet)
+        self.proxy.start_writing()
+
+    def send_verbs(self, verb_list):
+        """ Called from Core when multiple verbs should be send upstream at once. The packets are
+        encoded together, only large payloads are kept as separate chunks.
+        """
+
+        packets = [self.__verb_packet(verb) for verb in verb_list]
+
+        if not packets:
+            return
+
+        self.encoder.add_encoded_chunks([buffer for packet in packets for buffer in packet.get_buffers()])
+        self.proxy.start_writing()
+
+    def __verb_packet(self, verb):
+        """ Create the packet for the given verb.
+        """
+
         handler = self.verb_handlers.get(type(verb), None)
 
         if not handler:
@@ -133,7 +156,7 @@ class NxtcpConnection(BaseConnection):
         if not self.encoder:
             raise RuntimeError("Connection not ready")
 
-        handler(verb)
+        return handler(verb)
 
     def evaluate_state(self):
         """ Evaluate the statemachine. This statemachine is responsible for taking action when a
@@ -505,78 +528,66 @@ class NxtcpConnection(BaseConnection):
         """ Called when Core wants us to send a login packet.
         """
 
-        # encode a login packet and start writing
-        self.encoder.encode(encoder.LoginPacket(
+        # create the packet
+        return encoder.LoginPacket(
             name=verb.name,
             enforce=verb.enforce,
             standby=verb.standby,
             persist=verb.persist,
-        ))
-
-        self.proxy.start_writing()
+        )
 
     def __on_logout_verb(self, verb):
         """ Called when Core wants us to send a logout packet.
         """
 
-        # encode a login packet and start writing
-        self.encoder.encode(encoder.LogoutPacket(
+        # create the packet
+        return encoder.LogoutPacket(
             name=verb.name,
-        ))
-
-        self.proxy.start_writing()
+        )
 
     def __on_request_verb(self, verb):
         """ Called when Core wants us to send a request packet.
         """
 
-        # encode a login packet and start writing
-        self.encoder.encode(encoder.RequestPacket(
+        # create the packet
+        return encoder.RequestPacket(
             name=verb.name,
             unidirectional=verb.unidirectional,
             messageref=verb.messageref,
             timeout=verb.timeout,
             payload=verb.payload,
-        ))
-
-        self.proxy.start_writing()
+        )
 
     def __on_post_verb(self, verb):
         """ Called when Core wants us to send a post packet.
         """
 
-        # encode a login packet and start writing
-        self.encoder.encode(encoder.PostPacket(
+        # create the packet
+        return encoder.PostPacket(
             postref=verb.postref,
             payload=verb.payload,
-        ))
-
-        self.proxy.start_writing()
+        )
 
     def __on_subscribe_verb(self, verb):
         """ Called when core wants us to send a subscribe packet.
         """
 
-        # encode a login packet and start writing
-        self.encoder.encode(encoder.SubscribePacket(
+        # create the packet
+        return encoder.SubscribePacket(
             messageref=verb.messageref,
             name=verb.name,
             topic=verb.topic
-        ))
-
-        self.proxy.start_writing()
+        )
 
     def __on_unsubscribe_verb(self, verb):
         """ Called when Core wants us to send an unsubscribe packet.
         """
 
-        # encode a login packet and start writing
-        self.encoder.encode(encoder.UnsubscribePacket(
+        # create the packet
+        return encoder.UnsubscribePacket(
             name=verb.name,
             topic=verb.topic
-        ))
-
-        self.proxy.start_writing()
+        )
 
     def __update_ready(self, state):
         """ Internal function used to update the connection's state.
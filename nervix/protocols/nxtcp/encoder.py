@@ -1,6 +1,6 @@
 from struct import pack_into, pack
 
-from nervix.util.encoder import BaseEncoder
+from nervix.util.encoder import BaseEncoder, as_view
 
 from .defines import *
 
@@ -13,26 +13,39 @@ class Encoder(BaseEncoder):
         chunkbuffer.
         """
 
-        chunk = packet.get_chunk()
-
-        self.add_encoded_chunk(chunk)
+        self.add_encoded_chunks(packet.get_buffers())
 
 
 class BasePacket:
 
     def __init__(self):
         self.chunk = bytearray(5)
+        self.payload = None
 
     def get_chunk(self):
         """
         Return a bytes object which contains the encoded data.
         """
 
+        return b''.join(self.get_buffers())
+
+    def get_buffers(self):
+        """
+        Return a list of buffers which together contain the encoded
+        data. The payload, if any, is not copied.
+        """
+
         length = len(self.chunk) - 5
 
+        if self.payload is not None:
+            length += len(self.payload)
+
         pack_into('>i', self.chunk, 0, length)
 
-        return bytes(self.chunk)
+        if self.payload is None:
+            return [bytes(self.chunk)]
+
+        return [bytes(self.chunk), self.payload]
 
     def set_type(self, packettype):
         """
@@ -72,6 +85,17 @@ class BasePacket:
         self.add_uint32_field(len(value))
         self.chunk.extend(value)
 
+    def add_payload_field(self, value):
+        """
+        Add a blob field that holds the payload, this must be the last
+        field of the packet. The value may be any contiguous buffer and
+        is not copied.
+        """
+        view = as_view(value)
+
+        self.add_uint32_field(len(view))
+        self.payload = view
+
 
 class LoginPacket(BasePacket):
     """
@@ -145,7 +169,7 @@ class RequestPacket(BasePacket):
         self.add_uint32_field(encode_timeout(timeout))
 
         # write pay load
-        self.add_blob_field(payload)
+        self.add_payload_field(payload)
 
 
 class PostPacket(BasePacket):
@@ -164,7 +188,7 @@ class PostPacket(BasePacket):
         self.add_uint32_field(postref)
 
         # add payload
-        self.add_blob_field(payload)
+        self.add_payload_field(payload)
 
 
 class SubscribePacket(BasePacket):
@@ -0,0 +1,146 @@
+import zlib
+import lzma
+import logging
+
+from nervix.verbs import MAX_PAYLOAD_SIZE
+
+from .base import BaseSerializer, EncodingError
+
+logger = logging.getLogger(__name__)
+
+# values of the header byte
+HEADER_RAW = 0
+HEADER_ZLIB = 1
+HEADER_LZMA = 2
+
+
+class CompressedSerializer(BaseSerializer):
+    """ Serializer that compresses the payloads encoded by another serializer.
+
+    Every payload starts with a header byte that tells whether the rest of the payload is
+    compressed and how. Payloads smaller than threshold bytes, and payloads that don't get smaller
+    when compressed, are sent uncompressed. Because of the header byte both sides of a session
+    need to use this serializer.
+
+    The method is either 'zlib' or 'lzma'. For zlib a preset dictionary can be given with zdict,
+    which makes small payloads that share content with the dictionary compress a lot better. Both
+    sides need to use the same dictionary.
+
+    Decoded payloads larger than max_decoded_size bytes are rejected, so a small payload can't
+    expand to an excessive amount of memory.
+
+    Example:
+
+    .. code-block:: py
+
+        serializer = CompressedSerializer(StringSerializer(), threshold=512)
+        chan = Channel(connection, serializer)
+
+    """
+
+    def __init__(self, serializer, threshold=256, method='zlib', level=6, zdict=None,
+                 max_decoded_size=2 ** 20):
+
+        if method not in ('zlib', 'lzma'):
+            raise ValueError("Unknown compression method '%s'" % method)
+
+        if zdict is not None and method != 'zlib':
+            raise ValueError("A preset dictionary is only supported with zlib")
+
+        self.serializer = serializer
+        self.threshold = threshold
+        self.method = method
+        self.level = level
+        self.zdict = zdict
+        self.max_decoded_size = max_decoded_size
+
+        # lzma is used without container, so the filter chain has to be known to both sides
+        self.lzma_filters = [{'id': lzma.FILTER_LZMA2, 'preset': level}]
+
+    def encode(self, obj):
+        payload = self.serializer.encode(obj)
+
+        if len(payload) >= self.threshold:
+            compressed = self.__compress(payload)
+
+            if len(compressed) < len(payload):
+                payload = compressed
+            else:
+                payload = bytes((HEADER_RAW,)) + payload
+
+        else:
+            payload = bytes((HEADER_RAW,)) + payload
+
+        if len(payload) > MAX_PAYLOAD_SIZE:
+            raise EncodingError("Compressed payload exceeds %d bytes" % MAX_PAYLOAD_SIZE)
+
+        return payload
+
+    def decode(self, bts):
+
+        if not bts:
+            logger.warning("Failed to decode payload: missing header")
+            return None
+
+        header = bts[0]
+
+        try:
+            if header == HEADER_RAW:
+                payload = bts[1:]
+
+            elif header == HEADER_ZLIB:
+                payload = self.__decompress(self.__zlib_decompressor(), bts[1:])
+
+            elif header == HEADER_LZMA:
+                payload = self.__decompress(
+                    lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=self.lzma_filters),
+                    bts[1:],
+                )
+
+            else:
+                raise ValueError("unknown header %d" % header)
+
+        except (ValueError, zlib.error, lzma.LZMAError) as exc:
+            logger.warning("Failed to decode payload: %s", exc)
+            return None
+
+        return self.serializer.decode(payload)
+
+    def __compress(self, payload):
+        """ Compress the payload and prefix it with the header byte.
+        """
+
+        if self.method == 'lzma':
+            return bytes((HEADER_LZMA,)) + lzma.compress(
+                payload,
+                format=lzma.FORMAT_RAW,
+                filters=self.lzma_filters,
+            )
+
+        if self.zdict is not None:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=self.zdict)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+
+        return bytes((HEADER_ZLIB,)) + compressor.compress(payload) + compressor.flush()
+
+    def __zlib_decompressor(self):
+        if self.zdict is not None:
+            return zlib.decompressobj(-15, zdict=self.zdict)
+
+        return zlib.decompressobj(-15)
+
+    def __decompress(self, decompressor, data):
+        """ Decompress the data, without producing more than max_decoded_size bytes.
+        Raises ValueError if the data is truncated.
+        """
+
+        payload = decompressor.decompress(data, self.max_decoded_size + 1)
+
+        if len(payload) > self.max_decoded_size:
+            raise ValueError("decoded payload exceeds %d bytes" % self.max_decoded_size)
+
+        if not decompressor.eof:
+            raise ValueError("compressed data is truncated")
+
+        return payload
@@ -0,0 +1,119 @@
+import struct
+import logging
+
+from nervix.verbs import MAX_PAYLOAD_SIZE
+
+from .base import BaseSerializer, EncodingError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+# start of the header: length of the dtype string and number of dimensions
+HEADER = struct.Struct('>BB')
+
+
+class NdarraySerializer(BaseSerializer):
+    """ Serializer for numpy arrays, requires numpy to be installed.
+
+    The payload consists of a small header with the dtype, shape and strides of the array followed
+    by the raw data of the array. Arrays that are contiguous are send as they are, other arrays are
+    made contiguous first.
+
+    Decoded arrays are read-only views on the received payload, the data is not copied.
+
+    Example:
+
+    .. code-block:: py
+
+        sess = channel.session('sensor')
+        channel.set_serializer('sensor', NdarraySerializer())
+
+        call.post(numpy.zeros(1000, dtype=numpy.float32))
+
+    """
+
+    def __init__(self):
+        if numpy is None:
+            raise ImportError("NdarraySerializer requires numpy")
+
+    def encode(self, obj):
+        array = numpy.asanyarray(obj)
+
+        if array.dtype.hasobject:
+            raise EncodingError("Arrays of python objects can't be serialized")
+
+        if not (array.flags.c_contiguous or array.flags.f_contiguous):
+            array = numpy.ascontiguousarray(array)
+
+        # the strides are derived from the shape, as numpy may use any stride for dimensions of
+        # size 1
+        order = 'C' if array.flags.c_contiguous else 'F'
+        strides = contiguous_strides(array.shape, array.itemsize, order)
+
+        dtype = array.dtype.str.encode()
+
+        header = HEADER.pack(len(dtype), array.ndim) + dtype + struct.pack(
+            '>%dQ%dq' % (array.ndim, array.ndim), *array.shape, *strides
+        )
+
+        if len(header) + array.nbytes > MAX_PAYLOAD_SIZE:
+            raise EncodingError("Encoded array exceeds %d bytes" % MAX_PAYLOAD_SIZE)
+
+        return header + array.tobytes(order='A')
+
+    def decode(self, bts):
+
+        try:
+            dtype_len, ndim = HEADER.unpack_from(bts)
+            offset = HEADER.size
+
+            dtype = numpy.dtype(bytes(bts[offset:offset + dtype_len]).decode())
+            offset += dtype_len
+
+            dims = struct.unpack_from('>%dQ%dq' % (ndim, ndim), bts, offset)
+            offset += 16 * ndim
+
+            shape, strides = dims[:ndim], dims[ndim:]
+
+            count = 1
+            for size in shape:
+                count *= size
+
+            if offset + count * dtype.itemsize != len(bts):
+                raise ValueError("size of data does not match shape")
+
+            # only strides of contiguous arrays are accepted, other strides could point outside
+            # of the payload
+            if count > 1 and strides == contiguous_strides(shape, dtype.itemsize, 'C'):
+                order = 'C'
+            elif count > 1 and strides == contiguous_strides(shape, dtype.itemsize, 'F'):
+                order = 'F'
+            elif count <= 1:
+                order = 'C'
+            else:
+                raise ValueError("strides of a non contiguous array")
+
+            # a view on the payload, without copying the data
+            return numpy.frombuffer(bts, dtype, count, offset).reshape(shape, order=order)
+
+        except (ValueError, TypeError, struct.error) as exc:
+            logger.warning("Failed to decode payload: %s", exc)
+            return None
+
+
+def contiguous_strides(shape, itemsize, order):
+    """ Return the strides of a contiguous array with the given shape, in 'C' or 'F' order.
+    """
+
+    strides = list()
+    stride = itemsize
+
+    for size in (reversed(shape) if order == 'C' else shape):
+        strides.append(stride)
+        stride *= size
+
+    return tuple(reversed(strides)) if order == 'C' else tuple(strides)
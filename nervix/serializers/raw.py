@@ -0,0 +1,18 @@
+from .base import BaseSerializer
+
+
+class RawSerializer(BaseSerializer):
+    """ Pass-through serializer.
+
+    Used for payloads that are already bytes, e.g. when forwarding or packing payloads that were
+    encoded by another serializer. Objects are returned unchanged by both encode and decode.
+    """
+
+    def encode(self, obj):
+        return obj
+
+    def decode(self, bts):
+        return bts
+
+
+RAW = RawSerializer()
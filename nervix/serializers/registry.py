@@ -0,0 +1,74 @@
+class SerializerRegistry:
+    """ Maps session names to serializers.
+
+    A serializer can be registered for a single name, or for all names that start with a prefix by
+    ending the name with a '*'. An exact match takes precedence over a prefix, and a longer prefix
+    over a shorter one. Names that don't match anything use the default serializer.
+
+    Example:
+
+    .. code-block:: py
+
+        registry = SerializerRegistry(StringSerializer())
+        registry.register('quotes', StructSerializer(QUOTE))
+        registry.register('raw-*', RawSerializer())
+
+        registry.resolve('raw-images')  # returns the RawSerializer
+
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+        # mapping of names to serializers, and of prefixes to serializers
+        self.names = dict()
+        self.prefixes = dict()
+
+        # names that were resolved before, cleared whenever the registry changes
+        self.resolved = dict()
+
+    def register(self, name, serializer):
+        """ Register a serializer for the given name, or for a prefix if the name ends with a '*'.
+        A serializer of None removes the registration.
+        """
+
+        if name.endswith('*'):
+            table, key = self.prefixes, name[:-1]
+        else:
+            table, key = self.names, name
+
+        if serializer is None:
+            table.pop(key, None)
+        else:
+            table[key] = serializer
+
+        self.resolved.clear()
+
+    def resolve(self, name):
+        """ Return the serializer to use for the given name.
+        """
+
+        serializer = self.resolved.get(name, None)
+
+        if serializer is None:
+            serializer = self.resolved[name] = self.__lookup(name)
+
+        return serializer
+
+    def __lookup(self, name):
+
+        if name is None:
+            return self.default
+
+        serializer = self.names.get(name, None)
+        if serializer is not None:
+            return serializer
+
+        # try the longest prefix first
+        for length in range(len(name), -1, -1):
+            serializer = self.prefixes.get(name[:length], None)
+
+            if serializer is not None:
+                return serializer
+
+        return self.default
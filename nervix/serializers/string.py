@@ -4,13 +4,13 @@ from .base import BaseSerializer
 class StringSerializer(BaseSerializer):
     """ Basic serializer.
 
-    Encodes objects into bytes.
+    Encodes objects into bytes, bytes-like objects are passed on without copying.
     Decodes bytes into UTF8 strings.
     """
 
     def encode(self, obj):
 
-        if isinstance(obj, bytes):
+        if isinstance(obj, (bytes, bytearray, memoryview)):
             return obj
 
         if not isinstance(obj, str):
@@ -0,0 +1,363 @@
+import struct
+import logging
+import operator
+
+from nervix.verbs import MAX_PAYLOAD_SIZE
+
+from .base import BaseSerializer, EncodingError
+
+logger = logging.getLogger(__name__)
+
+# struct format characters of the scalar types
+SCALAR_TYPES = {
+    'bool': '?',
+    'int8': 'b',
+    'uint8': 'B',
+    'int16': 'h',
+    'uint16': 'H',
+    'int32': 'i',
+    'uint32': 'I',
+    'int64': 'q',
+    'uint64': 'Q',
+    'float32': 'f',
+    'float64': 'd',
+}
+
+# prefix used for the length of variable sized fields and lists
+LENGTH = struct.Struct('>H')
+
+
+class Bytes:
+    """ Schema type for a bytes field. With a size the field always takes size bytes, shorter
+    values are padded with zeros. Without a size the field is prefixed with its length.
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+
+
+class String(Bytes):
+    """ Schema type for a string field, which is encoded as utf-8. With a size the field always
+    takes size bytes, trailing zeros are removed when decoding. Without a size the field is
+    prefixed with its length.
+    """
+
+
+class List:
+    """ Schema type for a list of items of the given type.
+    """
+
+    def __init__(self, item_type):
+        self.item_type = item_type
+
+
+class Record:
+    """ Schema type for a record, the fields are given as (name, type) tuples. Records are encoded
+    from and decoded to dicts.
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+
+
+class StructSerializer(BaseSerializer):
+    """ Serializer that encodes objects into a compact binary format described by a schema.
+
+    The schema is compiled once, consecutive fixed size fields of a record are packed and unpacked
+    with a single precompiled struct.Struct. All numbers are encoded in network byte order.
+
+    The types that can be used in a schema are the names of the scalar types ('bool', 'int8',
+    'uint8', 'int16', 'uint16', 'int32', 'uint32', 'int64', 'uint64', 'float32' and 'float64'),
+    and the Bytes, String, List and Record types.
+
+    Example:
+
+    .. code-block:: py
+
+        serializer = StructSerializer(Record(
+            ('symbol', String(8)),
+            ('time', 'float64'),
+            ('bids', List(Record(('price', 'float64'), ('size', 'uint32')))),
+            ('comment', String()),
+        ))
+
+        chan = Channel(connection, serializer)
+
+    Payloads that cannot be decoded are logged, and decoded as None.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.codec = compile_type(schema)
+
+    def encode(self, obj):
+
+        parts = list()
+
+        try:
+            self.codec.encode(obj, parts)
+        except (KeyError, TypeError, ValueError, AttributeError, struct.error) as exc:
+            raise EncodingError("Object does not match schema: %s" % exc) from exc
+
+        payload = b''.join(parts)
+
+        if len(payload) > MAX_PAYLOAD_SIZE:
+            raise EncodingError("Encoded payload exceeds %d bytes" % MAX_PAYLOAD_SIZE)
+
+        return payload
+
+    def decode(self, bts):
+
+        try:
+            obj, offset = self.codec.decode(bts, 0)
+
+            if offset != len(bts):
+                raise ValueError("%d trailing bytes" % (len(bts) - offset))
+
+        except (ValueError, struct.error) as exc:
+            logger.warning("Failed to decode payload: %s", exc)
+            return None
+
+        return obj
+
+
+def compile_type(schema_type):
+    """ Return the codec for the given schema type.
+    """
+
+    if isinstance(schema_type, Record):
+        return RecordCodec(schema_type)
+
+    if isinstance(schema_type, List):
+        return ListCodec(schema_type)
+
+    if isinstance(schema_type, Bytes) and schema_type.size is None:
+        return VariableBytesCodec(isinstance(schema_type, String))
+
+    if isinstance(schema_type, Bytes) or schema_type in SCALAR_TYPES:
+        return FixedCodec([('', schema_type)])
+
+    raise ValueError("Unknown schema type %r" % (schema_type,))
+
+
+def fixed_format(schema_type):
+    """ Return the struct format of a fixed size type, or None if the type isn't fixed size.
+    """
+
+    if isinstance(schema_type, Bytes):
+        return None if schema_type.size is None else '%ds' % schema_type.size
+
+    if isinstance(schema_type, (List, Record)):
+        return None
+
+    return SCALAR_TYPES.get(schema_type, None)
+
+
+def encode_string(value):
+    return value.encode()
+
+
+def decode_fixed_string(value):
+    return value.rstrip(b'\0').decode()
+
+
+class FixedCodec:
+    """ Codec for a group of fixed size fields, which are packed with a single struct.Struct. A
+    group with a single field named '' encodes and decodes a bare value instead of a dict.
+    """
+
+    def __init__(self, fields):
+        self.names = [name for name, _ in fields]
+        self.struct = struct.Struct('>' + ''.join(fixed_format(t) for _, t in fields))
+
+        # strings need to be converted, and bytes need to be checked as struct would silently
+        # truncate them, all other fixed size values are passed as is
+        self.strings = [isinstance(t, String) for _, t in fields]
+        self.has_strings = any(self.strings)
+
+        self.sizes = [t.size if isinstance(t, Bytes) else None for _, t in fields]
+        self.has_bytes = any(size is not None for size in self.sizes)
+
+        self.bare = self.names == ['']
+
+        # returns the values of the fields from a dict as a tuple
+        self.getter = operator.itemgetter(*self.names)
+
+    def pack_values(self, values):
+        if self.has_strings:
+            values = [encode_string(v) if s else v for v, s in zip(values, self.strings)]
+
+        if self.has_bytes:
+            for v, size in zip(values, self.sizes):
+                if size is not None and len(v) > size:
+                    raise ValueError("Value of %d bytes exceeds field size %d" % (len(v), size))
+
+        return self.struct.pack(*values)
+
+    def unpack_values(self, bts, offset):
+        values = self.struct.unpack_from(bts, offset)
+
+        if self.has_strings:
+            values = [decode_fixed_string(v) if s else v for v, s in zip(values, self.strings)]
+
+        return values, offset + self.struct.size
+
+    def encode(self, value, parts):
+        if self.bare:
+            values = (value,)
+        elif len(self.names) == 1:
+            values = (value[self.names[0]],)
+        else:
+            values = self.getter(value)
+
+        parts.append(self.pack_values(values))
+
+    def decode(self, bts, offset):
+        values, offset = self.unpack_values(bts, offset)
+
+        if self.bare:
+            return values[0], offset
+
+        return dict(zip(self.names, values)), offset
+
+
+class VariableBytesCodec:
+    """ Codec for bytes or strings that are prefixed with their length.
+    """
+
+    def __init__(self, is_string):
+        self.is_string = is_string
+
+    def encode(self, value, parts):
+        if self.is_string:
+            value = value.encode()
+
+        elif not isinstance(value, bytes):
+            raise TypeError("Expected bytes, got '%s'" % type(value).__name__)
+
+        parts.append(LENGTH.pack(len(value)))
+        parts.append(value)
+
+    def decode(self, bts, offset):
+        length, = LENGTH.unpack_from(bts, offset)
+        offset += LENGTH.size
+
+        value = bytes(bts[offset:offset + length])
+
+        if len(value) != length:
+            raise ValueError("Field exceeds payload")
+
+        if self.is_string:
+            value = value.decode()
+
+        return value, offset + length
+
+
+class ListCodec:
+    """ Codec for lists, which are prefixed with the number of items. Lists of scalars are packed
+    with a single struct call, lists of records that only have plain fixed size fields are packed
+    and unpacked item by item with the precompiled struct of the record.
+    """
+
+    def __init__(self, schema_type):
+        self.scalar = SCALAR_TYPES.get(schema_type.item_type, None) \
+            if isinstance(schema_type.item_type, str) else None
+
+        self.item_codec = None if self.scalar else compile_type(schema_type.item_type)
+
+        # the group of a record that consists of a single group without strings or bytes
+        self.plain_record = None
+        if isinstance(self.item_codec, RecordCodec) and len(self.item_codec.steps) == 1:
+            group = self.item_codec.steps[0][1]
+
+            if not group.has_bytes and len(group.names) > 1:
+                self.plain_record = group
+
+    def encode(self, value, parts):
+        parts.append(LENGTH.pack(len(value)))
+
+        if self.scalar:
+            parts.append(struct.pack('>%d%s' % (len(value), self.scalar), *value))
+            return
+
+        if self.plain_record:
+            pack = self.plain_record.struct.pack
+            getter = self.plain_record.getter
+            parts.append(b''.join([pack(*getter(item)) for item in value]))
+            return
+
+        for item in value:
+            self.item_codec.encode(item, parts)
+
+    def decode(self, bts, offset):
+        count, = LENGTH.unpack_from(bts, offset)
+        offset += LENGTH.size
+
+        if self.scalar:
+            items_struct = struct.Struct('>%d%s' % (count, self.scalar))
+            return list(items_struct.unpack_from(bts, offset)), offset + items_struct.size
+
+        if self.plain_record:
+            names = self.plain_record.names
+            end = offset + count * self.plain_record.struct.size
+
+            if end > len(bts):
+                raise ValueError("List exceeds payload")
+
+            return [
+                dict(zip(names, values))
+                for values in self.plain_record.struct.iter_unpack(bts[offset:end])
+            ], end
+
+        items = list()
+        for _ in range(count):
+            item, offset = self.item_codec.decode(bts, offset)
+            items.append(item)
+
+        return items, offset
+
+
+class RecordCodec:
+    """ Codec for records. Consecutive fixed size fields are grouped in a FixedCodec, every other
+    field is encoded with a codec of its own.
+    """
+
+    def __init__(self, schema_type):
+
+        # list of (name, codec) tuples, name is None for groups of fixed size fields
+        self.steps = list()
+
+        group = list()
+        for name, field_type in schema_type.fields:
+
+            if fixed_format(field_type):
+                group.append((name, field_type))
+                continue
+
+            if group:
+                self.steps.append((None, FixedCodec(group)))
+                group = list()
+
+            self.steps.append((name, compile_type(field_type)))
+
+        if group:
+            self.steps.append((None, FixedCodec(group)))
+
+    def encode(self, value, parts):
+        for name, codec in self.steps:
+            if name is None:
+                codec.encode(value, parts)
+            else:
+                codec.encode(value[name], parts)
+
+    def decode(self, bts, offset):
+        record = dict()
+
+        for name, codec in self.steps:
+            if name is None:
+                values, offset = codec.unpack_values(bts, offset)
+                record.update(zip(codec.names, values))
+            else:
+                record[name], offset = codec.decode(bts, offset)
+
+        return record, offset
@@ -0,0 +1,240 @@
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from nervix import create_connection
+from nervix.mainloop import Mainloop
+from nervix.channel import Channel, MessageStatus
+
+logger = logging.getLogger(__name__)
+
+
+class RequestError(RuntimeError):
+    """ Raised by SyncChannel.call() when a request did not result in an OK message.
+    The message attribute holds the Message that was received.
+    """
+
+    def __init__(self, message):
+        RuntimeError.__init__(self, "Request failed with status %s" % message.status.name)
+        self.message = message
+
+
+def create_sync_channel(uri, **kwargs):
+    """ Creates a SyncChannel instance based on the given uri, the mainloop is started in a
+    background thread. Any keyword arguments are passed to the Channel constructor.
+    """
+
+    loop = Mainloop()
+    connection = create_connection(loop, uri)
+    chan = Channel(connection, loop=loop, **kwargs)
+
+    return SyncChannel(loop, chan)
+
+
+class SyncChannel:
+    """ Synchronous interface for programs that cannot run the mainloop themselves.
+
+    The mainloop is run in a background thread that is owned by this object. All methods of this
+    class may be called from any thread, the work is handed over to the mainloop thread. Handlers
+    that are set on subscriptions and sessions are called from the mainloop thread.
+
+    An instance of this class can be obtained by calling the create_sync_channel() function.
+
+    Example:
+
+    .. code-block:: py
+
+        chan = create_sync_channel('nxtcp://localhost:9999')
+
+        # blocking request
+        answer = chan.call('demo', 'payload', timeout=2.0)
+
+        # request that returns a concurrent.futures.Future
+        future = chan.request('demo', 'payload')
+        message = future.result()
+
+        chan.close()
+
+    """
+
+    def __init__(self, loop, channel):
+        self.loop = loop
+        self.channel = channel
+
+        # seconds to wait for the mainloop thread to run a function, e.g. when subscribing
+        self.wait_timeout = 10.0
+
+        self.thread = threading.Thread(
+            target=self.loop.run_forever,
+            name='nervix-mainloop',
+            daemon=True,
+        )
+        self.thread.start()
+
+    def run(self, func, *args, **kwargs):
+        """ Run the given function in the mainloop thread, returns a Future for its result.
+        """
+
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        if self.in_loop_thread():
+            run()
+        else:
+            self.loop.call_soon(run)
+
+        return future
+
+    def request(self, name, payload=None, timeout=None, ttl=None):
+        """ Issue a request, returns a Future that will be resolved with the response Message.
+
+        The message may have a status other than OK, the future is resolved regardless.
+        """
+
+        future = Future()
+
+        def send():
+            if not future.set_running_or_notify_cancel():
+                return
+
+            try:
+                self.__send(future, name, payload, timeout, ttl)
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        if self.in_loop_thread():
+            send()
+        else:
+            self.loop.call_soon(send)
+
+        return future
+
+    def call(self, name, payload=None, timeout=5.0, ttl=None):
+        """ Issue a request and block until the response arrives, returns the decoded payload.
+
+        Raises RequestError if the response has a status other than OK. Raises
+        concurrent.futures.TimeoutError if no response is received at all, which should only
+        happen when no mainloop is running, the request is canceled in that case.
+
+        This method may not be called from the mainloop thread.
+        """
+
+        if self.in_loop_thread():
+            raise RuntimeError("Blocking call from the mainloop thread")
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        request = self.__wait(lambda: self.__send(future, name, payload, timeout, ttl))
+
+        # the server, or the request deadline, will report a timeout well before this expires, the
+        # request holds the ttl and timeout after the defaults of the stub were applied
+        wait = request.ttl + request.timeout + self.channel.core.request_deadline_grace + 1.0
+
+        try:
+            message = future.result(wait)
+        except TimeoutError:
+            self.run(request.cancel)
+            raise
+
+        if message.status != MessageStatus.OK:
+            raise RequestError(message)
+
+        return message.payload
+
+    def subscribe(self, name, topic, handler=None):
+        """ Subscribe to a topic on a named session, returns the Subscription.
+        The handler is called from the mainloop thread.
+        """
+
+        def subscribe():
+            sub = self.channel.subscribe(name, topic)
+            if handler:
+                sub.add_handler(handler)
+            return sub
+
+        return self.__wait(subscribe)
+
+    def unsubscribe(self, sub):
+        """ Cancel the given subscription.
+        """
+
+        self.__wait(sub.cancel)
+
+    def session(self, name, call_handler=None, interest_handler=None, **kwargs):
+        """ Login on a session, returns the Session. Any keyword arguments are passed to
+        Channel.session(). The handlers are called from the mainloop thread.
+        """
+
+        def session():
+            sess = self.channel.session(name, **kwargs)
+            if call_handler:
+                sess.add_call_handler(call_handler)
+            if interest_handler:
+                sess.add_interest_handler(interest_handler)
+            return sess
+
+        return self.__wait(session)
+
+    def logout(self, sess):
+        """ Cancel the given session.
+        """
+
+        self.__wait(sess.cancel)
+
+    def close(self, timeout=None):
+        """ Stop the mainloop and wait for its thread to end.
+        """
+
+        self.loop.shutdown()
+
+        if not self.in_loop_thread():
+            self.thread.join(timeout)
+
+    def in_loop_thread(self):
+        """ Returns True if called from the mainloop thread.
+        """
+
+        return threading.current_thread() is self.thread
+
+    def __send(self, future, name, payload, timeout, ttl):
+        """ Send a request that resolves the future with the response Message, returns the Request.
+        Must be called from the mainloop thread.
+        """
+
+        def on_message(message):
+            if not future.done():
+                future.set_result(message)
+
+        req = self.channel.request(name, payload, timeout, ttl)
+        req.add_handler(on_message, MessageStatus.ANY)
+
+        return req.send()
+
+    def __wait(self, func):
+        """ Run the function in the mainloop thread and wait for its result. Raises
+        concurrent.futures.TimeoutError if the mainloop doesn't run it within wait_timeout seconds,
+        e.g. because the channel is closed.
+        """
+
+        future = self.run(func)
+
+        try:
+            return future.result(self.wait_timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,102 @@
+import time
+import heapq
+
+
+class DeadlineQueue:
+    """ Keeps track of many deadlines using a single mainloop timer.
+
+    Deadlines are stored in a heap, the timer is only (re)armed when the earliest deadline changes.
+    Removed deadlines are not taken out of the heap immediately but are skipped when they come up.
+    When a deadline expires the handler is called with the key of that deadline.
+
+    If no mainloop is given, deadlines are still recorded but will never expire.
+    """
+
+    def __init__(self, loop, handler):
+        self.loop = loop
+        self.handler = handler
+
+        # heap of (deadline, key) tuples, may contain entries of removed keys
+        self.heap = list()
+
+        # mapping of keys to their current deadline
+        self.deadlines = dict()
+
+        # the deadline the timer is currently armed for
+        self.armed_deadline = None
+
+        self.timer = None
+        if self.loop:
+            self.timer = self.loop.timer()
+            self.timer.set_handler(self.__on_timer)
+
+    def now(self):
+        if self.loop:
+            return self.loop.now()
+
+        return time.monotonic()
+
+    def add(self, key, timeout):
+        """ Add a deadline that expires after timeout seconds for the given key.
+        """
+
+        deadline = self.now() + timeout
+
+        self.deadlines[key] = deadline
+        heapq.heappush(self.heap, (deadline, key))
+
+        # get rid of removed entries once they make up the majority of the heap
+        if len(self.heap) > 2 * len(self.deadlines) + 64:
+            self.heap = [(d, k) for k, d in self.deadlines.items()]
+            heapq.heapify(self.heap)
+
+        if self.armed_deadline is None or deadline < self.armed_deadline:
+            self.__arm(deadline)
+
+    def remove(self, key):
+        """ Remove the deadline for the given key, if any.
+        """
+
+        self.deadlines.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.deadlines
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def __arm(self, deadline):
+        """ Arm the timer so it expires at the given deadline.
+        """
+
+        if not self.timer:
+            return
+
+        self.timer.cancel()
+        self.timer.set(max(0.0, deadline - self.now()))
+        self.armed_deadline = deadline
+
+    def __on_timer(self):
+        """ Called by the mainloop when the timer expires.
+        """
+
+        self.armed_deadline = None
+
+        now = self.now()
+
+        while self.heap and self.heap[0][0] <= now:
+            deadline, key = heapq.heappop(self.heap)
+
+            # skip entries of keys that were removed or have been given another deadline
+            if self.deadlines.get(key) != deadline:
+                continue
+
+            del self.deadlines[key]
+            self.handler(key)
+
+        # drop removed entries from the top of the heap, and arm the timer for the next deadline
+        while self.heap and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+        if self.heap and (self.armed_deadline is None or self.heap[0][0] < self.armed_deadline):
+            self.__arm(self.heap[0][0])
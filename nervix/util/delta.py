@@ -0,0 +1,103 @@
+import struct
+
+# header of every frame: kind and sequence number
+FRAME = struct.Struct('>BI')
+
+# header of the body of a delta frame: length of the common prefix and suffix
+DELTA = struct.Struct('>II')
+
+KIND_SNAPSHOT = 0
+KIND_DELTA = 1
+
+# sequence numbers wrap around, as they have to fit in the frame header
+SEQ_MASK = 0xFFFFFFFF
+
+
+def common_prefix(a, b):
+    """ Return the length of the common prefix of a and b. Uses a binary search, so the actual
+    comparing is done by the bytes implementation.
+    """
+
+    low, high = 0, min(len(a), len(b))
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def common_suffix(a, b, limit):
+    """ Return the length of the common suffix of a and b, which is at most limit.
+    """
+
+    low, high = 0, min(len(a), len(b), limit)
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def next_seq(seq):
+    """ Return the sequence number that follows seq.
+    """
+
+    return (seq + 1) & SEQ_MASK
+
+
+def pack_snapshot(seq, payload):
+    """ Return a frame that holds the complete payload.
+    """
+
+    return FRAME.pack(KIND_SNAPSHOT, seq) + payload
+
+
+def pack_delta(seq, old, new):
+    """ Return a frame that holds the difference between the old and the new payload. The
+    difference is described by the length of the part at the start and at the end that did not
+    change, and the bytes in between.
+    """
+
+    prefix = common_prefix(old, new)
+    suffix = common_suffix(old, new, min(len(old), len(new)) - prefix)
+
+    return FRAME.pack(KIND_DELTA, seq) + DELTA.pack(prefix, suffix) + new[prefix:len(new) - suffix]
+
+
+def unpack(frame):
+    """ Return a (kind, seq, body) tuple for the given frame.
+    Raises ValueError if the frame is invalid.
+    """
+
+    if len(frame) < FRAME.size:
+        raise ValueError("Frame too short")
+
+    kind, seq = FRAME.unpack_from(frame)
+
+    return kind, seq, frame[FRAME.size:]
+
+
+def apply(base, body):
+    """ Apply the body of a delta frame to the base payload, and return the new payload.
+    Raises ValueError if the delta doesn't fit the base.
+    """
+
+    if len(body) < DELTA.size:
+        raise ValueError("Delta too short")
+
+    prefix, suffix = DELTA.unpack_from(body)
+
+    if prefix + suffix > len(base):
+        raise ValueError("Delta does not match base")
+
+    return base[:prefix] + body[DELTA.size:] + base[len(base) - suffix:]
@@ -5,8 +5,19 @@ logger = logging.getLogger(__name__)
 
 
 class BaseEncoder:
-    def __init__(self, chunksize=1024):
+    """
+    Buffers encoded chunks until they are written to a socket.
+
+    Chunks may be any contiguous buffer. They are kept as views, not
+    copied, so a buffer must not be modified until it is written.
+    Small chunks that are added together are joined, as copying those
+    is cheaper than writing them one by one.
+    """
+
+    def __init__(self, chunksize=1024, copy_threshold=1024, max_buffers=64):
         self.chunksize = chunksize
+        self.copy_threshold = copy_threshold
+        self.max_buffers = max_buffers
 
         self.chunkbuffer = deque()
         self.currentchunk = None
@@ -20,15 +31,29 @@ class BaseEncoder:
         if not given, the default chunksize (specified via __init__)
         will be used.
 
-        Returns True if ...
+        If the socket supports sendmsg(), multiple chunks are written
+        at once without joining them first.
+
+        Returns the number of bytes written.
         """
 
-        chunk = self.fetch_chunk(chunksize)
+        sendmsg = getattr(socket, 'sendmsg', None)
 
         n = 0
 
-        if chunk:
-            n = socket.send(chunk)
+        if sendmsg is None:
+            chunk = self.fetch_chunk(chunksize)
+
+            if chunk:
+                n = socket.send(chunk)
+                self.commit(n)
+
+            return n
+
+        buffers = self.fetch_buffers(chunksize)
+
+        if buffers:
+            n = sendmsg(buffers)
             self.commit(n)
 
         return n
@@ -38,14 +63,29 @@ class BaseEncoder:
         Returns a chunk of bytes with maximum length of chunksize.
         Returns None if no chunks are available.
 
-        An empty bytes object is returned if all bytes from the current
-        chunk are fetched but not commited yet. The user should first
-        commit all fetched bytes.
+        The chunk starts at the first byte that is not committed yet.
+        """
+
+        buffers = self.fetch_buffers(chunksize, 1)
+
+        if buffers is None:
+            return None
+
+        return buffers[0]
+
+    def fetch_buffers(self, chunksize=None, max_buffers=None):
+        """
+        Returns a list of views on the chunks that are not committed
+        yet, with a total length of at most chunksize. Returns None if
+        no chunks are available.
         """
 
         if not chunksize:
             chunksize = self.chunksize
 
+        if not max_buffers:
+            max_buffers = self.max_buffers
+
         if not self.currentchunk:
 
             if len(self.chunkbuffer) > 0:
@@ -56,18 +96,20 @@ class BaseEncoder:
             else:
                 return None
 
-        startpos = self.commitpos
+        buffers = [self.currentchunk[self.commitpos:self.commitpos + chunksize]]
+        size = len(buffers[0])
 
-        endpos = min(
-            startpos + len(self.currentchunk),
-            startpos + chunksize
-        )
+        # the chunkbuffer is filled from the left, so the oldest chunk is on the right
+        for chunk in reversed(self.chunkbuffer):
+            if size >= chunksize or len(buffers) >= max_buffers:
+                break
 
-        chunk = self.currentchunk[startpos:endpos]
+            buffers.append(chunk[:chunksize - size])
+            size += len(buffers[-1])
 
-        self.fetchpos += len(chunk)
+        self.fetchpos = max(self.fetchpos, self.commitpos + size)
 
-        return chunk
+        return buffers
 
     def commit(self, amount):
         """
@@ -75,22 +117,73 @@ class BaseEncoder:
         chunkbuffer.
         """
 
+        if self.commitpos + amount > self.fetchpos:
+            raise ValueError(
+                "Commit of {} bytes is not possible as that number of bytes are not fetched yet".format(amount))
+
         self.commitpos += amount
 
-        if self.commitpos == len(self.currentchunk):
+        # drop the chunks that are completely written, positions are relative to the current chunk
+        while self.commitpos >= len(self.currentchunk):
+            self.commitpos -= len(self.currentchunk)
+            self.fetchpos -= len(self.currentchunk)
             self.currentchunk = None
 
-        elif self.commitpos > self.fetchpos:
-            raise ValueError(
-                "Commit of {} bytes is not possible as that number of bytes are not fetched yet".format(amount))
+            if not self.fetchpos:
+                break
+
+            self.currentchunk = self.chunkbuffer.pop()
 
     def add_encoded_chunk(self, chunk):
         """
-        Add a chunk of bytes to the internal chunkbuffer. The argument
-        must be a bytes object.
+        Add a chunk to the internal chunkbuffer. The argument must be
+        a contiguous buffer, like a bytes, bytearray or memoryview
+        object.
         """
 
-        if not isinstance(chunk, bytes):
-            raise TypeError("Given chunk is not an instance of bytes")
+        view = as_view(chunk)
+
+        if view:
+            self.chunkbuffer.appendleft(view)
+
+    def add_encoded_chunks(self, chunks):
+        """
+        Add multiple chunks to the internal chunkbuffer. Consecutive
+        chunks smaller than copy_threshold are joined, larger chunks are
+        added as they are.
+        """
+
+        small = bytearray()
+
+        for chunk in chunks:
+            view = as_view(chunk)
+
+            if len(view) < self.copy_threshold:
+                small += view
+                continue
+
+            if small:
+                self.chunkbuffer.appendleft(memoryview(small))
+                small = bytearray()
+
+            self.chunkbuffer.appendleft(view)
+
+        if small:
+            self.chunkbuffer.appendleft(memoryview(small))
+
+
+def as_view(chunk):
+    """
+    Return a memoryview of single bytes on the given buffer.
+    Raises TypeError if the chunk is not a C-contiguous buffer.
+    """
+
+    try:
+        view = memoryview(chunk)
+    except TypeError:
+        raise TypeError("Given chunk is not a bytes-like object")
+
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
 
-        self.chunkbuffer.appendleft(chunk)
+    return view
@@ -0,0 +1,92 @@
+from array import array
+
+
+class SlotTable:
+    """ Compact table that maps reference numbers to handlers.
+
+    References are handed out by add() and are only valid until they are given back with
+    remove(). Slots that are removed are reused by later calls to add(), so the reference numbers
+    stay within 32 bits no matter how many references are handed out over time.
+
+    A reference consists of a slot number in the lower slot_bits bits and the generation of that
+    slot in the remaining upper bits. The generation is incremented, and wraps around, every time
+    a slot is freed. This way a reference that was removed does not collide with the reference
+    that reuses its slot, so a late message for an old reference won't reach the new handler.
+
+    Slot 0 is never used, so a reference is never zero.
+    """
+
+    def __init__(self, slot_bits=22):
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        self.generation_mask = (1 << (32 - slot_bits)) - 1
+
+        # handlers indexed by slot number
+        self.handlers = [None]
+
+        # current generation of every slot
+        self.generations = array('H', [0])
+
+        # stack of slot numbers that are free to be reused
+        self.free_slots = array('L')
+
+        # number of references currently in use
+        self.size = 0
+
+    def add(self, handler):
+        """ Store the handler and return the reference for it.
+        Raises OverflowError when all slots are in use.
+        """
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+
+        else:
+            slot = len(self.handlers)
+
+            if slot > self.slot_mask:
+                raise OverflowError("No free slots left")
+
+            self.handlers.append(None)
+            self.generations.append(0)
+
+        self.handlers[slot] = handler
+        self.size += 1
+
+        return (self.generations[slot] << self.slot_bits) | slot
+
+    def get(self, ref, default=None):
+        """ Return the handler for the given reference, or default if the reference is not in use.
+        """
+
+        slot = ref & self.slot_mask
+
+        if slot >= len(self.handlers) or self.generations[slot] != ref >> self.slot_bits:
+            return default
+
+        handler = self.handlers[slot]
+
+        if handler is None:
+            return default
+
+        return handler
+
+    def remove(self, ref):
+        """ Free the slot of the given reference. Does nothing if the reference is not in use.
+        """
+
+        if self.get(ref) is None:
+            return
+
+        slot = ref & self.slot_mask
+
+        self.handlers[slot] = None
+        self.generations[slot] = (self.generations[slot] + 1) & self.generation_mask
+        self.free_slots.append(slot)
+        self.size -= 1
+
+    def __contains__(self, ref):
+        return self.get(ref) is not None
+
+    def __len__(self):
+        return self.size
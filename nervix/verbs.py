@@ -1,3 +1,7 @@
+# maximum size in bytes of a payload or topic
+MAX_PAYLOAD_SIZE = 2 ** 15
+
+
 class BaseVerb:
 
     def validate(self):
@@ -151,7 +155,7 @@ class SubscribeVerb(BaseVerb):
     def validate(self):
         validate_name(self.name)
         validate_refnr(self.messageref)
-        validate_payload(self.topic)
+        validate_topic(self.topic)
 
     def __repr__(self):
         return "{cls}({name}, message_ref={messageref}, '{topic}')".format(
@@ -174,7 +178,7 @@ class InterestVerb(BaseVerb):
         validate_refnr(self.postref)
         validate_name(self.name)
         validate_enum(self.status, [self.STATUS_NO_INTEREST, self.STATUS_INTEREST])
-        validate_payload(self.topic)
+        validate_topic(self.topic)
 
     def __repr__(self):
         return "{cls}({postref}, {status_str}, '{topic}')".format(
@@ -192,7 +196,7 @@ class UnsubscribeVerb(BaseVerb):
 
     def validate(self):
         validate_name(self.name)
-        validate_payload(self.topic)
+        validate_topic(self.topic)
 
     def __repr__(self):
         return "{cls}({name}, '{topic}')".format(
@@ -242,16 +246,51 @@ def validate_timeout(timeout):
 
 
 def validate_payload(payload):
+    """ Payloads may be any C-contiguous buffer, like bytes, bytearray or memoryview objects. They
+    are passed to the connection as they are, so buffers are not copied before they are send.
+    Buffers that are only contiguous in Fortran order can't be send without copying them.
+    """
+
     if payload is None:
         return
 
-    if type(payload) != bytes:
-        raise ValueError("Payload is of type '%s' not bytes" % type(payload))
-
-    if len(payload) > 2 ** 15:
+    if payload_size(payload) > MAX_PAYLOAD_SIZE:
         raise ValueError("Payload size should not exceed 32Kb")
 
 
+def validate_topic(topic):
+    """ Topics are used as keys, so unlike payloads they must be bytes.
+    """
+
+    if topic is None:
+        return
+
+    if type(topic) != bytes:
+        raise ValueError("Topic is of type '%s' not bytes" % type(topic))
+
+    if len(topic) > MAX_PAYLOAD_SIZE:
+        raise ValueError("Topic size should not exceed 32Kb")
+
+
+def payload_size(payload):
+    """ Return the size in bytes of the given payload, which may be any C-contiguous buffer.
+    Raises ValueError if the payload is not such a buffer.
+    """
+
+    if type(payload) == bytes:
+        return len(payload)
+
+    try:
+        view = memoryview(payload)
+    except TypeError:
+        raise ValueError("Payload is of type '%s' not a bytes-like object" % type(payload))
+
+    if not view.c_contiguous:
+        raise ValueError("Payload is not a C-contiguous buffer")
+
+    return view.nbytes
+
+
 def validate_enum(value, allowed_values):
     if value is None:
         return
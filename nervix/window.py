@@ -0,0 +1,305 @@
+import time
+from collections import deque
+
+
+class RequestWindow:
+    """ Limits the number of bidirectional requests that are in flight.
+
+    A limit can be set for the channel as a whole, and for individual session names. Requests that
+    do not fit in the window wait in a FIFO queue per name, and are started as soon as other
+    requests leave the window. When multiple names are able to start a request, the one that has
+    been waiting the longest goes first.
+
+    A limit for a name can either be a number or an AimdLimit object, which adapts the limit to the
+    observed latency of the requests to that name.
+
+    This class is used internally by Core and should not be instantiated by the user.
+    """
+
+    def __init__(self):
+
+        # limit for the channel as a whole, None means unlimited
+        self.limit = None
+
+        # mapping of names to their limit, either a number or an AimdLimit
+        self.name_limits = dict()
+
+        # when set, names without a limit of their own get an adaptive limit created by this function
+        self.adaptive_factory = None
+
+        # number of requests in the window, in total and per name
+        self.inflight = 0
+        self.inflight_per_name = dict()
+
+        # mapping of names to a deque of Waiter objects
+        self.waiting = dict()
+        self.nr_waiting = 0
+
+        # sequence number used to determine which waiter came first
+        self.next_seq = 1
+
+        # stats
+        self.nr_waited = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def set_limit(self, limit, name=None):
+        """ Set the maximum number of requests in flight for the given name, or for the channel
+        if no name is given. A limit of None removes the limit.
+        """
+
+        if name is None:
+            self.limit = limit
+
+        elif limit is None:
+            self.name_limits.pop(name, None)
+
+        else:
+            self.name_limits[name] = limit
+
+        self.__release()
+
+    def get_limit(self, name=None):
+        """ Return the limit for the given name, or for the channel if no name is given.
+        """
+
+        if name is None:
+            return self.limit
+
+        return limit_value(self.name_limits.get(name, None))
+
+    def set_adaptive(self, factory):
+        """ Give every name that has no limit of its own an adaptive limit, created by calling the
+        given factory. A factory of None disables this.
+        """
+
+        self.adaptive_factory = factory
+
+    def enter(self, name, start):
+        """ Let a request to the given name enter the window. The start function is called as soon
+        as there is room for the request, which may be immediately.
+
+        Returns a Waiter object if the request has to wait, or None if it was started immediately.
+        """
+
+        if self.adaptive_factory and name not in self.name_limits:
+            self.name_limits[name] = self.adaptive_factory()
+
+        if not self.nr_waiting and self.__has_room(name):
+            self.__start(name, start)
+            return None
+
+        waiter = Waiter(self.next_seq, name, start)
+        self.next_seq += 1
+
+        self.waiting.setdefault(name, deque()).append(waiter)
+        self.nr_waiting += 1
+
+        self.__release()
+
+        return waiter
+
+    def leave(self, name, latency=None, ok=True):
+        """ Called when a request that was started leaves the window.
+
+        The latency of the request and whether it succeeded are used to update the limit of the
+        name if it is adaptive. A latency of None means the request was canceled.
+        """
+
+        name_limit = self.name_limits.get(name, None)
+
+        if latency is not None and isinstance(name_limit, AimdLimit):
+            name_limit.update(latency, ok, self.inflight_per_name[name])
+
+        self.inflight -= 1
+
+        remaining = self.inflight_per_name[name] - 1
+        if remaining:
+            self.inflight_per_name[name] = remaining
+        else:
+            del self.inflight_per_name[name]
+
+        self.__release()
+
+    def cancel(self, waiter):
+        """ Remove a waiting request from the queue.
+        """
+
+        queue = self.waiting.get(waiter.name, None)
+
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self.nr_waiting -= 1
+
+            if not queue:
+                del self.waiting[waiter.name]
+
+    def stats(self):
+        """ Return a dict with metrics.
+        """
+
+        return {
+            'queued_requests': self.nr_waiting,
+            'request_wait_count': self.nr_waited,
+            'request_wait_total': self.total_wait_time,
+            'request_wait_max': self.max_wait_time,
+            'request_limits': {name: limit_value(limit) for name, limit in self.name_limits.items()},
+        }
+
+    def __has_room(self, name):
+        """ Returns True if a request to the given name fits in the window.
+        """
+
+        if self.limit is not None and self.inflight >= self.limit:
+            return False
+
+        name_limit = limit_value(self.name_limits.get(name, None))
+
+        if name_limit is not None and self.inflight_per_name.get(name, 0) >= name_limit:
+            return False
+
+        return True
+
+    def __start(self, name, start):
+        self.inflight += 1
+        self.inflight_per_name[name] = self.inflight_per_name.get(name, 0) + 1
+
+        start()
+
+    def __release(self):
+        """ Start waiting requests for as long as they fit in the window.
+        """
+
+        while self.nr_waiting:
+
+            if self.limit is not None and self.inflight >= self.limit:
+                return
+
+            # find the longest waiting request among the names that have room
+            first = None
+            for name, queue in self.waiting.items():
+                if self.__has_room(name) and (first is None or queue[0].seq < first.seq):
+                    first = queue[0]
+
+            if not first:
+                return
+
+            queue = self.waiting[first.name]
+            queue.popleft()
+            self.nr_waiting -= 1
+
+            if not queue:
+                del self.waiting[first.name]
+
+            wait_time = time.monotonic() - first.since
+            self.nr_waited += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+            self.__start(first.name, first.start)
+
+
+class Waiter:
+    """ A request that is waiting to enter the window.
+    """
+
+    def __init__(self, seq, name, start):
+        self.seq = seq
+        self.name = name
+        self.start = start
+        self.since = time.monotonic()
+
+
+class AimdLimit:
+    """ Concurrency limit that adapts to the latency of requests, using additive increase and
+    multiplicative decrease.
+
+    The lowest latency seen during the last sample_window responses is used as the baseline. While
+    responses arrive within tolerance times the baseline, the limit grows by about one every time a
+    full window of requests completes, as long as the window is actually being used. When the
+    latency rises above that, or a request fails with TIMEOUT or UNREACHABLE, the limit is
+    multiplied by backoff. After backing off, the responses to the requests that were already in
+    flight are not used to back off again.
+
+    Example:
+
+    .. code-block:: py
+
+        channel.limit_requests(AimdLimit(initial=10), 'slow_service')
+
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=1000, backoff=0.9, tolerance=2.0,
+                 sample_window=100):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.sample_window = sample_window
+
+        # the baseline latency, and the lowest latency seen in the current sample window
+        self.baseline = None
+        self.window_min = None
+        self.nr_samples = 0
+
+        # number of responses to ignore before backing off again
+        self.cooldown = 0
+
+        # exponential moving average of the latency, only used for reporting
+        self.avg_latency = None
+
+    def update(self, latency, ok, inflight):
+        """ Update the limit with the latency of a request that just completed. inflight is the
+        number of requests that were in flight when it completed, including the request itself.
+        """
+
+        # failed requests say nothing about the latency of the service
+        if ok:
+            self.__sample(latency)
+
+        if self.cooldown:
+            self.cooldown -= 1
+
+        if not ok or self.baseline is None or latency > self.baseline * self.tolerance:
+            if not self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self.cooldown = inflight
+
+        elif inflight * 2 >= self.limit:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def __sample(self, latency):
+        """ Keep track of the baseline and average latency.
+        """
+
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency += (latency - self.avg_latency) * 0.1
+
+        if self.window_min is None or latency < self.window_min:
+            self.window_min = latency
+
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+
+        # start a new sample window, so the baseline can follow when the service gets slower
+        self.nr_samples += 1
+        if self.nr_samples >= self.sample_window:
+            self.baseline = self.window_min
+            self.window_min = None
+            self.nr_samples = 0
+
+    def __int__(self):
+        return int(self.limit)
+
+
+def limit_value(limit):
+    """ Return the current value of a limit, which is either None, a number or an AimdLimit.
+    """
+
+    if isinstance(limit, AimdLimit):
+        return int(limit)
+
+    return limit
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from nervix.channel import Channel
+from nervix.backlog.journal import JournalBacklog
+from nervix import verbs
+
+from tests.util.mockedconnection import MockedConnection
+
+
+def request_verb(payload, unidirectional=True, messageref=None):
+    return verbs.RequestVerb(
+        name=b'name',
+        unidirectional=unidirectional,
+        messageref=messageref,
+        timeout=5.0,
+        payload=payload,
+    )
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def segment_files(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.seg'))
+
+    def test_drain_order(self):
+        """ Test if verbs are drained in the order they were put in the backlog.
+        """
+
+        backlog = JournalBacklog(self.directory)
+
+        backlog.put(request_verb(b'payload0'), 5.0)
+        backlog.put(request_verb(b'payload1', False, 1), 5.0)
+        backlog.put(request_verb(b'payload2'), 5.0)
+
+        payloads = [verb.payload for verb in backlog.drain()]
+
+        self.assertEqual(payloads, [b'payload0', b'payload1', b'payload2'])
+        self.assertEqual(len(backlog), 0)
+
+    def test_restart_1(self):
+        """ Test if unidirectional requests survive a restart, but bidirectional requests don't.
+        """
+
+        backlog = JournalBacklog(self.directory)
+        backlog.put(request_verb(b'payload0'), 5.0)
+        backlog.put(request_verb(b'payload1', False, 1), 5.0)
+        backlog.put(request_verb(b'payload2'), 5.0)
+        backlog.close()
+
+        backlog = JournalBacklog(self.directory)
+
+        self.assertEqual(list(backlog.drain()), [
+            request_verb(b'payload0'),
+            request_verb(b'payload2'),
+        ])
+
+    def test_restart_expired(self):
+        """ Test if requests whose ttl expired while the process was down are discarded.
+        """
+
+        with patch('time.time', return_value=1000.0):
+            backlog = JournalBacklog(self.directory)
+            backlog.put(request_verb(b'payload0'), 2.0)
+            backlog.put(request_verb(b'payload1'), 10.0)
+            backlog.close()
+
+        with patch('time.time', return_value=1005.0):
+            backlog = JournalBacklog(self.directory)
+
+        self.assertEqual(list(backlog.drain()), [request_verb(b'payload1')])
+
+    def test_cancel(self):
+        """ Test if a canceled request is not loaded again after a restart.
+        """
+
+        backlog = JournalBacklog(self.directory)
+
+        verb = request_verb(b'payload0')
+        backlog.put(verb, 5.0)
+        backlog.put(request_verb(b'payload1'), 5.0)
+
+        self.assertTrue(backlog.cancel(verb))
+        self.assertFalse(backlog.cancel(verb))
+        backlog.close()
+
+        backlog = JournalBacklog(self.directory)
+
+        self.assertEqual(list(backlog.drain()), [request_verb(b'payload1')])
+
+    def test_compaction(self):
+        """ Test if segments are deleted once all their records are consumed.
+        """
+
+        backlog = JournalBacklog(self.directory, segment_size=256)
+
+        for i in range(10):
+            backlog.put(request_verb(b'payload%d' % i), 5.0)
+
+        self.assertGreater(len(self.segment_files()), 1)
+
+        self.assertEqual(len(list(backlog.drain())), 10)
+
+        self.assertEqual(self.segment_files(), [])
+
+    def test_channel_replay(self):
+        """ Test if a request queued before a restart is send when the connection becomes ready.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn, backlog=JournalBacklog(self.directory))
+
+        conn.mock_connection_ready(False)
+        chan.request('name', 'payload').send(ttl=60.0)
+        chan.core.upstream_backlog.close()
+
+        conn = MockedConnection()
+        chan = Channel(conn, backlog=JournalBacklog(self.directory))
+
+        conn.mock_connection_ready(True)
+
+        conn.assert_upstream_verb(verbs.RequestVerb(
+            name=b'name',
+            unidirectional=True,
+            messageref=None,
+            timeout=5.0,
+            payload=b'payload'
+        ))
+
+        conn.assert_upstream_verb(None)
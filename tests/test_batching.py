@@ -0,0 +1,153 @@
+import unittest
+from unittest.mock import Mock
+
+from nervix.channel import MessageStatus
+from nervix.batching import BatchingRequestStub, BatchingSession, pack_envelope, unpack_envelope, \
+    KIND_REQUEST, ITEM_OK
+
+from tests.util.mockedbroker import MockedBroker
+from tests.util.mockedloop import MockedLoop
+from tests.util.mockedtime import patch_time
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = MockedLoop()
+        self.broker = MockedBroker(self.loop)
+
+        self.requester = self.broker.requester
+        self.session = self.broker.session
+
+    def test_envelope_roundtrip(self):
+        """ Test if envelopes are packed and unpacked, and invalid envelopes are rejected.
+        """
+
+        items = [(ITEM_OK, b'one'), (ITEM_OK, b''), (ITEM_OK, b'three')]
+        envelope = pack_envelope(KIND_REQUEST, items)
+
+        self.assertEqual(unpack_envelope(envelope), (KIND_REQUEST, items))
+        self.assertIsNone(unpack_envelope(envelope[:-1]))
+        self.assertIsNone(unpack_envelope(envelope + b'x'))
+        self.assertIsNone(unpack_envelope(b'plain payload'))
+
+    def test_batched_requests(self):
+        """ Test if requests within the window are send in one envelope, and every request gets
+        its own response.
+        """
+
+        sess = self.session.session('name')
+        batching = BatchingSession(sess)
+        calls = list()
+
+        def on_call(call):
+            calls.append(call.payload)
+            call.post(call.payload.upper())
+
+        batching.add_call_handler(on_call)
+
+        req = BatchingRequestStub(self.requester, 'name', window=0.01)
+        handler = Mock()
+        req.add_handler(handler)
+
+        with patch_time() as time:
+            for payload in ('a', 'b', 'c'):
+                req.send(payload)
+
+            self.broker.pump()
+            self.assertEqual(self.broker.nr_requests, 0)
+
+            time.sleep(0.02)
+            self.loop.run_timers()
+            self.broker.pump()
+
+        self.assertEqual(self.broker.nr_requests, 1)
+        self.assertEqual(calls, ['a', 'b', 'c'])
+
+        messages = [call[0][0] for call in handler.call_args_list]
+        self.assertEqual([msg.status for msg in messages], [MessageStatus.OK] * 3)
+        self.assertEqual([msg.payload for msg in messages], ['A', 'B', 'C'])
+
+        self.assertEqual(req.stats(), {'requests': 3, 'envelopes': 1})
+
+    def test_max_items(self):
+        """ Test if an envelope is send as soon as it holds max_items requests, and a single
+        request is send without envelope.
+        """
+
+        sess = self.session.session('name')
+        on_call = Mock(side_effect=lambda call: call.post(call.payload))
+        BatchingSession(sess).add_call_handler(on_call)
+
+        req = BatchingRequestStub(self.requester, 'name', window=10.0, max_items=2)
+        handler = Mock()
+        req.add_handler(handler)
+
+        req.send('a')
+        req.send('b')
+        req.send('c')
+
+        self.broker.pump()
+        self.assertEqual(self.broker.nr_requests, 1)
+        self.assertEqual(handler.call_count, 2)
+
+        req.flush()
+        self.broker.pump()
+
+        self.assertEqual(self.broker.nr_requests, 2)
+        self.assertEqual(on_call.call_args[0][0].raw_payload, b'c')
+        self.assertEqual([call[0][0].payload for call in handler.call_args_list], ['a', 'b', 'c'])
+
+    def test_unanswered(self):
+        """ Test if calls that are not answered before the deadline are reported as unreachable,
+        while the others get their response.
+        """
+
+        sess = self.session.session('name')
+        batching = BatchingSession(sess, timeout=1.0)
+
+        def on_call(call):
+            if call.payload != 'ignored':
+                call.post(call.payload)
+
+        batching.add_call_handler(on_call)
+
+        req = BatchingRequestStub(self.requester, 'name', window=0.0)
+        handler = Mock()
+        req.add_handler(handler)
+
+        with patch_time() as time:
+            req.send('answered')
+            req.send('ignored')
+
+            self.loop.run_calls()
+            self.broker.pump()
+            handler.assert_not_called()
+
+            time.sleep(1.5)
+            self.loop.run_timers()
+            self.broker.pump()
+
+        messages = [call[0][0] for call in handler.call_args_list]
+        self.assertEqual([msg.status for msg in messages], [MessageStatus.OK, MessageStatus.UNREACHABLE])
+        self.assertEqual(messages[0].payload, 'answered')
+
+    def test_cancel(self):
+        """ Test if canceled requests are not send, and their handlers are not called.
+        """
+
+        sess = self.session.session('name')
+        on_call = Mock(side_effect=lambda call: call.post(call.payload))
+        BatchingSession(sess).add_call_handler(on_call)
+
+        req = BatchingRequestStub(self.requester, 'name')
+        handler = Mock()
+        req.add_handler(handler)
+
+        req.send('a').cancel()
+        req.send('b')
+        req.flush()
+        self.broker.pump()
+
+        self.assertEqual(on_call.call_count, 1)
+        self.assertEqual([call[0][0].payload for call in handler.call_args_list], ['b'])
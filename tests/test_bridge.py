@@ -0,0 +1,133 @@
+import unittest
+from unittest.mock import Mock
+
+from nervix.channel import Channel
+from nervix.bridge import Bridge
+from nervix import verbs
+
+from tests.util.mockedconnection import MockedConnection
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        # serializers that should never be used
+        self.serializer = Mock()
+
+        self.source_conn = MockedConnection()
+        self.source = Channel(self.source_conn, self.serializer)
+
+        self.target_conn = MockedConnection()
+        self.target = Channel(self.target_conn, self.serializer)
+
+        self.source_conn.mock_connection_ready(True)
+        self.target_conn.mock_connection_ready(True)
+
+        self.bridge = Bridge(self.source, self.target)
+
+    def test_forward(self):
+        """ Test if calls are forwarded and responses are posted back, without touching the
+        payloads.
+        """
+
+        self.bridge.add('name', target_name='remote')
+
+        self.source_conn.assert_upstream_verb(verbs.LoginVerb(
+            name=b'name',
+            enforce=False,
+            standby=False,
+            persist=False,
+        ))
+
+        call_payload = bytes(bytearray(b'call payload'))
+
+        self.source_conn.mock_downstream_verb(verbs.CallVerb(
+            unidirectional=False,
+            postref=11,
+            name=b'name',
+            payload=call_payload,
+        ))
+
+        request_verb = self.target_conn.upstream_verbs.popleft()
+
+        self.assertEqual(request_verb.name, b'remote')
+        self.assertIs(request_verb.payload, call_payload)
+
+        response_payload = bytes(bytearray(b'response payload'))
+
+        self.target_conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=request_verb.messageref,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=response_payload,
+        ))
+
+        post_verb = self.source_conn.upstream_verbs.popleft()
+
+        self.assertEqual(post_verb.postref, 11)
+        self.assertIs(post_verb.payload, response_payload)
+
+        self.assertEqual(self.serializer.method_calls, [])
+        self.assertEqual(self.bridge.stats(), {
+            'calls': 1,
+            'responses': 1,
+            'failures': 0,
+            'in_flight': 0,
+        })
+
+    def test_forward_unidirectional(self):
+        """ Test if unidirectional calls are forwarded as unidirectional requests.
+        """
+
+        self.bridge.add('name')
+        self.source_conn.upstream_verbs.clear()
+
+        self.source_conn.mock_downstream_verb(verbs.CallVerb(
+            unidirectional=True,
+            postref=None,
+            name=b'name',
+            payload=b'payload',
+        ))
+
+        self.target_conn.assert_upstream_verb(verbs.RequestVerb(
+            name=b'name',
+            unidirectional=True,
+            messageref=None,
+            timeout=5.0,
+            payload=b'payload',
+        ))
+
+        self.assertEqual(self.bridge.stats()['in_flight'], 0)
+
+    def test_failure(self):
+        """ Test if nothing is posted back when the forwarded request fails.
+        """
+
+        self.bridge.add('name')
+        self.source_conn.upstream_verbs.clear()
+
+        self.source_conn.mock_downstream_verb(verbs.CallVerb(
+            unidirectional=False,
+            postref=11,
+            name=b'name',
+            payload=b'payload',
+        ))
+
+        request_verb = self.target_conn.upstream_verbs.popleft()
+
+        self.target_conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=request_verb.messageref,
+            status=verbs.MessageVerb.STATUS_UNREACHABLE,
+            payload=None,
+        ))
+
+        self.source_conn.assert_upstream_verb(None)
+        self.assertEqual(self.bridge.stats()['failures'], 1)
+
+    def test_add_twice(self):
+        """ Test if bridging the same session twice raises a ValueError.
+        """
+
+        self.bridge.add('name')
+
+        with self.assertRaises(ValueError):
+            self.bridge.add('name')
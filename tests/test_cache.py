@@ -0,0 +1,88 @@
+import unittest
+
+from nervix.cache import ResponseCache
+
+from tests.util.mockedtime import patch_time
+
+
+class Test(unittest.TestCase):
+
+    def test_get_put_1(self):
+        cache = ResponseCache()
+        cache.set_ttl('name', 5.0)
+
+        self.assertIsNone(cache.get('name', b'payload'))
+
+        cache.put('name', b'payload', b'response')
+
+        self.assertEqual(cache.get('name', b'payload'), b'response')
+        self.assertIsNone(cache.get('name', b'other'))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+
+    def test_no_ttl_1(self):
+        """ Test if names without a ttl are not cached and not counted.
+        """
+
+        cache = ResponseCache()
+
+        cache.put('name', b'payload', b'response')
+
+        self.assertIsNone(cache.get('name', b'payload'))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.misses, 0)
+
+    def test_default_ttl_1(self):
+        cache = ResponseCache(default_ttl=5.0)
+        cache.set_ttl('uncached', None)
+
+        cache.put('name', b'payload', b'response')
+        cache.put('uncached', b'payload', b'response')
+
+        self.assertEqual(len(cache), 1)
+
+    def test_expire_1(self):
+        with patch_time() as time:
+            cache = ResponseCache()
+            cache.set_ttl('name', 5.0)
+            cache.put('name', b'payload', b'response')
+
+            time.sleep(4.999)
+            self.assertEqual(cache.get('name', b'payload'), b'response')
+
+            time.sleep(0.002)
+            self.assertIsNone(cache.get('name', b'payload'))
+
+        self.assertEqual(cache.expirations, 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction_1(self):
+        """ Test if the least recently used entry is evicted when there are too many entries.
+        """
+
+        cache = ResponseCache(default_ttl=5.0, max_entries=2)
+
+        cache.put('name', b'1', b'response1')
+        cache.put('name', b'2', b'response2')
+        cache.get('name', b'1')
+        cache.put('name', b'3', b'response3')
+
+        self.assertEqual(cache.get('name', b'1'), b'response1')
+        self.assertIsNone(cache.get('name', b'2'))
+        self.assertEqual(cache.get('name', b'3'), b'response3')
+        self.assertEqual(cache.evictions, 1)
+
+    def test_size_eviction_1(self):
+        """ Test if entries are evicted when the cached responses exceed max_bytes.
+        """
+
+        cache = ResponseCache(default_ttl=5.0, max_bytes=10)
+
+        cache.put('name', b'1', b'12345')
+        cache.put('name', b'2', b'12345')
+        self.assertEqual(len(cache), 2)
+
+        cache.put('name', b'3', b'1')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nr_bytes, 6)
+        self.assertIsNone(cache.get('name', b'1'))
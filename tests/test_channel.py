@@ -4,9 +4,14 @@ from unittest.mock import Mock
 from nervix.channel import Channel, Message, Post, Interest, Call, MessageStatus, InterestStatus, HandlerList
 from nervix import channel
 from nervix import verbs
+from nervix.util import delta
+from nervix.cache import ResponseCache
+from nervix.window import AimdLimit
+from nervix.serializers.string import StringSerializer
 
 from tests.util.mockedconnection import MockedConnection
 from tests.util.mockedtime import patch_time
+from tests.util.mockedloop import MockedLoop
 
 
 class Test(unittest.TestCase):
@@ -124,6 +129,254 @@ class Test(unittest.TestCase):
             payload='payload2',
         )
 
+    def test_subscribe_shared_1(self):
+        """ Test if subscriptions to the same name and topic share one upstream subscription, and
+        every subscription receives the messages.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        handler1 = Mock()
+        sub1 = chan.subscribe('name', 'topic')
+        sub1.add_handler(handler1)
+
+        handler2 = Mock()
+        sub2 = chan.subscribe('name', 'topic')
+        sub2.add_handler(handler2)
+
+        conn.assert_upstream_verb(verbs.SubscribeVerb(
+            name=b'name',
+            topic=b'topic',
+            messageref=1,
+        ))
+
+        conn.assert_upstream_verb(None)
+
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=1,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=b'payload',
+        ))
+
+        self.__verify_handler_call(handler1, Message, status=MessageStatus.OK, payload='payload',
+                                   source=sub1)
+        self.__verify_handler_call(handler2, Message, status=MessageStatus.OK, payload='payload',
+                                   source=sub2)
+
+        # only canceling the last subscription sends the unsubscribe verb
+        sub1.cancel()
+        sub1.cancel()
+        conn.assert_upstream_verb(None)
+
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=1,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=b'payload',
+        ))
+
+        handler1.assert_not_called()
+        handler2.assert_called_once()
+
+        sub2.cancel()
+
+        conn.assert_upstream_verb(verbs.UnsubscribeVerb(
+            name=b'name',
+            topic=b'topic',
+        ))
+
+        conn.assert_upstream_verb(None)
+
+    def test_subscribe_lazy_payload(self):
+        """ Test if the payload is only decoded when a handler reads it, and only once for all
+        subscriptions that share the upstream subscription.
+        """
+
+        serializer = Mock(wraps=StringSerializer())
+
+        conn = MockedConnection()
+        chan = Channel(conn, serializer=serializer)
+
+        conn.mock_connection_ready(True)
+
+        raw_handler = Mock()
+        sub1 = chan.subscribe('name', 'topic')
+        sub1.add_handler(lambda msg: raw_handler(msg.raw_payload))
+
+        message_verb = verbs.MessageVerb(
+            messageref=1,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=b'payload',
+        )
+
+        conn.mock_downstream_verb(message_verb)
+
+        raw_handler.assert_called_once_with(b'payload')
+        serializer.decode.assert_not_called()
+
+        payloads = list()
+        for _ in range(2):
+            sub = chan.subscribe('name', 'topic')
+            sub.add_handler(lambda msg: payloads.append(msg.payload))
+
+        conn.mock_downstream_verb(message_verb)
+
+        self.assertEqual(payloads, ['payload', 'payload'])
+        serializer.decode.assert_called_once_with(b'payload')
+
+    def test_subscribe_shared_2(self):
+        """ Test if subscribing again after all subscriptions were canceled sends a new subscribe verb.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        chan.subscribe('name', 'topic').cancel()
+        chan.subscribe('name', 'topic')
+
+        sent = [type(verb) for verb in conn.upstream_verbs]
+        self.assertEqual(sent, [verbs.SubscribeVerb, verbs.UnsubscribeVerb, verbs.SubscribeVerb])
+
+    def test_subscribe_conflate_1(self):
+        """ Test if only the latest message is delivered on the next iteration of the mainloop.
+        """
+
+        conn = MockedConnection()
+        loop = MockedLoop()
+        chan = Channel(conn, loop=loop)
+
+        conn.mock_connection_ready(True)
+
+        sub = chan.subscribe('name', 'topic')
+        sub.conflate()
+        handler = Mock()
+        sub.add_handler(handler)
+
+        for i in range(3):
+            conn.mock_downstream_verb(verbs.MessageVerb(
+                messageref=sub.messageref,
+                status=verbs.MessageVerb.STATUS_OK,
+                payload=b'payload%d' % i,
+            ))
+
+        handler.assert_not_called()
+
+        loop.run_calls()
+
+        self.__verify_handler_call(
+            handler,
+            Message,
+            status=MessageStatus.OK,
+            payload='payload2',
+            source=sub,
+        )
+
+        self.assertEqual(sub.stats(), {
+            'received_messages': 3,
+            'delivered_messages': 1,
+            'conflated_messages': 2,
+        })
+
+    def test_subscribe_conflate_interval(self):
+        """ Test if at most one message is delivered per interval.
+        """
+
+        conn = MockedConnection()
+        loop = MockedLoop()
+
+        with patch_time() as time:
+            chan = Channel(conn, loop=loop)
+
+            conn.mock_connection_ready(True)
+
+            sub = chan.subscribe('name', 'topic')
+            sub.conflate(interval=1.0)
+            handler = Mock()
+            sub.add_handler(handler)
+
+            def message(payload):
+                conn.mock_downstream_verb(verbs.MessageVerb(
+                    messageref=sub.messageref,
+                    status=verbs.MessageVerb.STATUS_OK,
+                    payload=payload,
+                ))
+
+            # the first message is delivered on the next iteration
+            message(b'payload0')
+            loop.run_calls()
+            self.assertEqual(handler.call_count, 1)
+
+            # the next ones have to wait for the interval to pass
+            time.sleep(0.5)
+            message(b'payload1')
+            message(b'payload2')
+            self.assertEqual(loop.run_calls(), 0)
+            loop.run_timers()
+            self.assertEqual(handler.call_count, 1)
+
+            time.sleep(0.5)
+            loop.run_timers()
+
+        self.assertEqual(handler.call_count, 2)
+        self.assertEqual(handler.call_args[0][0].payload, 'payload2')
+
+    def test_serializer_per_name(self):
+        """ Test if the serializer registered for a name is used for requests and subscriptions to
+        that name, and the default serializer for other names.
+        """
+
+        serializer = Mock()
+        serializer.encode.return_value = b'encoded'
+        serializer.decode.return_value = 'decoded'
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+        chan.set_serializer('binary-*', serializer)
+
+        conn.mock_connection_ready(True)
+
+        chan.request('binary-name', 'payload').send()
+        chan.request('name', 'payload').send()
+
+        conn.assert_upstream_verb(verbs.RequestVerb(
+            name=b'binary-name',
+            unidirectional=True,
+            messageref=None,
+            timeout=5.0,
+            payload=b'encoded',
+        ))
+
+        conn.assert_upstream_verb(verbs.RequestVerb(
+            name=b'name',
+            unidirectional=True,
+            messageref=None,
+            timeout=5.0,
+            payload=b'payload',
+        ))
+
+        sub = chan.subscribe('binary-name', 'topic')
+        handler = Mock()
+        sub.add_handler(handler)
+
+        conn.assert_upstream_verb(verbs.SubscribeVerb(
+            name=b'binary-name',
+            topic=b'encoded',
+            messageref=sub.messageref,
+        ))
+
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=sub.messageref,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=b'raw',
+        ))
+
+        self.assertEqual(handler.call_args[0][0].payload, 'decoded')
+        serializer.decode.assert_called_once_with(b'raw')
+
     def test_login_logout_1(self):
         """ Test if the login and logout verbs are pushed when the sesison is created after the
         connection became ready.
@@ -559,6 +812,29 @@ class Test(unittest.TestCase):
         not_ok_handler.assert_called_once()
         any_handler.assert_called_once()
 
+    def test_handlerlist_status(self):
+        """ Test if handlers are called based on the status code, also for handlers that were added
+        after the list was called before.
+        """
+
+        ok_handler = Mock()
+        not_ok_handler = Mock()
+
+        hl = HandlerList(channel.MESSAGE_STATUSES)
+        hl.add(ok_handler, MessageStatus.OK)
+
+        hl.call_status(verbs.MessageVerb.STATUS_OK)
+        hl.call(MessageStatus.TIMEOUT)
+
+        hl.add(not_ok_handler, MessageStatus.NOT_OK)
+
+        hl.call_status(verbs.MessageVerb.STATUS_TIMEOUT)
+        hl.call(MessageStatus.UNREACHABLE)
+        hl.call_status(99)
+
+        self.assertEqual(ok_handler.call_count, 1)
+        self.assertEqual(not_ok_handler.call_count, 2)
+
     def test_message_ok_1(self):
         """ Test if a response message to a request results in the handler being called correctly.
         """
@@ -643,101 +919,898 @@ class Test(unittest.TestCase):
             source=reqi,
         )
 
-    def test_interest_1(self):
-        """ Test if the sessions interest handler is called when an interest packet is received.
+    def test_request_deadline_1(self):
+        """ Test if a timeout message is delivered and the messageref is freed when no response
+        arrives before the deadline.
         """
 
         conn = MockedConnection()
-        chan = Channel(conn)
+        loop = MockedLoop()
 
-        conn.mock_connection_ready(True)
+        with patch_time() as time:
+            chan = Channel(conn, loop=loop)
 
-        session = chan.session('name')
-        handler = Mock()
-        session.add_interest_handler(handler)
+            conn.mock_connection_ready(True)
 
-        conn.mock_downstream_verb(verbs.InterestVerb(
-            postref=1,
-            name=b'name',
-            status=verbs.InterestVerb.STATUS_INTEREST,
-            topic=b'topic'
-        ))
+            req = chan.request('name', 'payload', timeout=5.0, ttl=0)
+            handler = Mock()
+            req.add_handler(handler, MessageStatus.ANY)
+            reqi = req.send()
+
+            self.assertEqual(chan.stats()['inflight_requests'], 1)
+
+            time.sleep(6.999)
+            loop.run_timers()
+            handler.assert_not_called()
+
+            time.sleep(0.002)
+            loop.run_timers()
 
         self.__verify_handler_call(
             handler,
-            Interest,
-            status=InterestStatus.INTEREST,
-            name='name',
-            topic='topic',
-            source=session,
+            Message,
+            status=MessageStatus.TIMEOUT,
+            payload=None,
+            source=reqi,
         )
 
-    def test_interest_2(self):
-        """ Test if the sessions interest handler is called when an interest packet is received.
+        self.assertEqual(chan.stats()['inflight_requests'], 0)
+        self.assertEqual(len(chan.core.message_handlers), 0)
+
+    def test_request_deadline_2(self):
+        """ Test if the deadline is disarmed when a response arrives in time.
+        """
+
+        conn = MockedConnection()
+        loop = MockedLoop()
+
+        with patch_time() as time:
+            chan = Channel(conn, loop=loop)
+
+            conn.mock_connection_ready(True)
+
+            req = chan.request('name', 'payload', timeout=5.0, ttl=0)
+            handler = Mock()
+            req.add_handler(handler, MessageStatus.ANY)
+            req.send()
+
+            conn.mock_downstream_verb(verbs.MessageVerb(
+                messageref=1,
+                status=verbs.MessageVerb.STATUS_OK,
+                payload=b'response'
+            ))
+
+            handler.assert_called_once()
+            handler.reset_mock()
+
+            time.sleep(10.0)
+            loop.run_timers()
+
+        handler.assert_not_called()
+        self.assertEqual(chan.stats()['inflight_requests'], 0)
+
+    def test_request_window_1(self):
+        """ Test if requests beyond the channel limit wait until a response frees their place.
         """
 
         conn = MockedConnection()
         chan = Channel(conn)
+        chan.limit_requests(1)
 
         conn.mock_connection_ready(True)
 
-        session = chan.session('name')
-        handler = Mock()
-        session.add_interest_handler(handler)
+        req = chan.request('name')
+        req.add_handler(Mock())
+        req.send(payload='payload0')
+        req.send(payload='payload1')
 
-        conn.mock_downstream_verb(verbs.InterestVerb(
-            postref=1,
+        conn.assert_upstream_verb(verbs.RequestVerb(
             name=b'name',
-            status=verbs.InterestVerb.STATUS_NO_INTEREST,
-            topic=b'topic'
+            unidirectional=False,
+            messageref=1,
+            timeout=5.0,
+            payload=b'payload0'
         ))
 
-        self.__verify_handler_call(
-            handler,
-            Interest,
-            status=InterestStatus.NO_INTEREST,
-            name='name',
-            topic='topic',
-            source=session,
-        )
+        conn.assert_upstream_verb(None)
+        self.assertEqual(chan.stats()['queued_requests'], 1)
 
-    def test_interest_connection_lost_1(self):
-        """ Test if the interest is lost when the connection is lost.
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=1,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=b'response'
+        ))
+
+        conn.assert_upstream_verb(verbs.RequestVerb(
+            name=b'name',
+            unidirectional=False,
+            messageref=2,
+            timeout=5.0,
+            payload=b'payload1'
+        ))
+
+        self.assertEqual(chan.stats()['queued_requests'], 0)
+        self.assertEqual(chan.stats()['request_wait_count'], 1)
+
+    def test_request_window_2(self):
+        """ Test if a per name limit only holds back requests to that name, and unidirectional
+        requests are never held back.
         """
 
         conn = MockedConnection()
         chan = Channel(conn)
+        chan.limit_requests(1, 'slow')
 
         conn.mock_connection_ready(True)
 
-        session = chan.session('name')
-        handler = Mock()
-        session.add_interest_handler(handler)
+        slow = chan.request('slow', 'payload')
+        slow.add_handler(Mock())
+        slow.send()
+        slow.send()
 
-        conn.mock_downstream_verb(verbs.InterestVerb(
-            postref=1,
-            name=b'name',
-            status=verbs.InterestVerb.STATUS_INTEREST,
-            topic=b'topic'
-        ))
+        fast = chan.request('fast', 'payload')
+        fast.add_handler(Mock())
+        fast.send()
 
-        self.__verify_handler_call(
-            handler,
-            Interest,
-            status=InterestStatus.INTEREST,
-            topic='topic',
-            source=session,
-        )
+        chan.request('slow', 'payload').send()
 
-        conn.mock_connection_ready(False)
+        sent = [(verb.name, verb.unidirectional) for verb in conn.upstream_verbs]
+        self.assertEqual(sent, [(b'slow', False), (b'fast', False), (b'slow', True)])
 
-        self.__verify_handler_call(
-            handler,
-            Interest,
-            status=InterestStatus.NO_INTEREST,
-            topic='topic',
-            source=session,
-        )
+    def test_request_window_timeout(self):
+        """ Test if a waiting request that reaches its deadline gets a timeout without being send.
+        """
+
+        conn = MockedConnection()
+        loop = MockedLoop()
+
+        with patch_time() as time:
+            chan = Channel(conn, loop=loop)
+            chan.limit_requests(1)
+
+            conn.mock_connection_ready(True)
+
+            req = chan.request('name', 'payload', ttl=0)
+            handler = Mock()
+            req.add_handler(handler, MessageStatus.TIMEOUT)
+            req.send(timeout=60.0)
+            req.send(timeout=1.0)
+
+            time.sleep(3.001)
+            loop.run_timers()
+
+        handler.assert_called_once()
+        self.assertEqual(len(conn.upstream_verbs), 1)
+        self.assertEqual(chan.stats()['queued_requests'], 0)
+
+    def test_request_window_invalid(self):
+        """ Test if an invalid request raises without taking a messageref or a place in the window.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+        chan.limit_requests(1)
+
+        conn.mock_connection_ready(True)
+
+        req = chan.request('name')
+        req.add_handler(Mock())
+
+        with self.assertRaises(ValueError):
+            req.send(payload=bytes(2 ** 15 + 1))
+
+        with self.assertRaises(ValueError):
+            req.send(name='invalid name', payload='payload')
+
+        self.assertEqual(len(chan.core.message_handlers), 0)
+        self.assertEqual(chan.stats()['inflight_requests'], 0)
+
+        req.send(payload='payload')
+
+        conn.assert_upstream_verb(verbs.RequestVerb(
+            name=b'name',
+            unidirectional=False,
+            messageref=1,
+            timeout=5.0,
+            payload=b'payload'
+        ))
+
+    def test_request_adaptive_1(self):
+        """ Test if an adaptive limit backs off when requests to a name become unreachable.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+        chan.adapt_requests(initial=4, backoff=0.5)
+
+        conn.mock_connection_ready(True)
+
+        req = chan.request('name', 'payload')
+        req.add_handler(Mock())
+        req.send()
+
+        self.assertEqual(chan.stats()['request_limits'], {'name': 4})
+
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=1,
+            status=verbs.MessageVerb.STATUS_UNREACHABLE,
+        ))
+
+        self.assertEqual(chan.stats()['request_limits'], {'name': 2})
+
+    def test_request_adaptive_burst(self):
+        """ Test if time spent waiting for the request window is not counted as latency, so a burst
+        of requests to a service with a constant latency doesn't make the limit back off.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+        chan.limit_requests(AimdLimit(initial=10), 'name')
+
+        conn.mock_connection_ready(True)
+        conn.upstream_verbs.clear()
+
+        handler = Mock()
+
+        with patch_time() as time:
+            for _ in range(200):
+                req = chan.request('name', 'payload')
+                req.add_handler(handler)
+                req.send()
+
+            while conn.upstream_verbs:
+                in_flight = list(conn.upstream_verbs)
+                conn.upstream_verbs.clear()
+
+                # the service answers everything after 10 ms
+                time.sleep(0.01)
+
+                for verb in in_flight:
+                    conn.mock_downstream_verb(verbs.MessageVerb(
+                        messageref=verb.messageref,
+                        status=verbs.MessageVerb.STATUS_OK,
+                        payload=b'response',
+                    ))
+
+        self.assertEqual(handler.call_count, 200)
+        self.assertGreaterEqual(chan.stats()['request_limits']['name'], 10)
+
+    def test_request_cache_1(self):
+        """ Test if a repeated request is answered from the cache on the next loop iteration,
+        without being send upstream.
+        """
+
+        conn = MockedConnection()
+        loop = MockedLoop()
+        cache = ResponseCache()
+        cache.set_ttl('name', 10.0)
+
+        with patch_time() as time:
+            chan = Channel(conn, loop=loop, response_cache=cache)
+
+            conn.mock_connection_ready(True)
+
+            req = chan.request('name', 'payload')
+            handler = Mock()
+            req.add_handler(handler)
+            req.send()
+
+            conn.mock_downstream_verb(verbs.MessageVerb(
+                messageref=1,
+                status=verbs.MessageVerb.STATUS_OK,
+                payload=b'response'
+            ))
+
+            handler.reset_mock()
+            conn.upstream_verbs.clear()
+
+            reqi = req.send()
+
+            handler.assert_not_called()
+            loop.run_calls()
+
+            self.__verify_handler_call(
+                handler,
+                Message,
+                status=MessageStatus.OK,
+                payload='response',
+                source=reqi,
+            )
+
+            conn.assert_upstream_verb(None)
+
+            # after the ttl the request is send upstream again
+            time.sleep(10.001)
+            req.send()
+
+            self.assertEqual(len(conn.upstream_verbs), 1)
+
+        self.assertEqual(chan.stats()['cache_hits'], 1)
+        self.assertEqual(chan.stats()['cache_misses'], 2)
+        self.assertEqual(chan.stats()['cache_expirations'], 1)
+
+    def test_request_cache_2(self):
+        """ Test if only names with a ttl and only OK responses are cached.
+        """
+
+        conn = MockedConnection()
+        cache = ResponseCache()
+        cache.set_ttl('cached', 10.0)
+        chan = Channel(conn, response_cache=cache)
+
+        conn.mock_connection_ready(True)
+
+        for name, status in [('cached', verbs.MessageVerb.STATUS_UNREACHABLE),
+                             ('uncached', verbs.MessageVerb.STATUS_OK)]:
+
+            req = chan.request(name, 'payload')
+            req.add_handler(Mock())
+            req.send()
+
+            verb = conn.upstream_verbs[-1]
+            conn.mock_downstream_verb(verbs.MessageVerb(
+                messageref=verb.messageref,
+                status=status,
+                payload=b'response'
+            ))
+
+        self.assertEqual(len(cache), 0)
+
+    def test_request_cache_cancel(self):
+        """ Test if canceling a request that is answered from the cache prevents the handler from
+        being called.
+        """
+
+        conn = MockedConnection()
+        loop = MockedLoop()
+        cache = ResponseCache()
+        cache.set_ttl('name', 10.0)
+        cache.put('name', b'payload', b'response')
+
+        chan = Channel(conn, loop=loop, response_cache=cache)
+
+        conn.mock_connection_ready(True)
+
+        req = chan.request('name', 'payload')
+        handler = Mock()
+        req.add_handler(handler)
+        req.send().cancel()
+
+        loop.run_calls()
+
+        handler.assert_not_called()
+
+    def test_request_coalesce_1(self):
+        """ Test if identical requests result in a single request verb, and all handlers receive
+        the response.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+        chan.coalesce_requests()
+
+        conn.mock_connection_ready(True)
+
+        handler1 = Mock()
+        req1 = chan.request('name', 'payload')
+        req1.add_handler(handler1)
+        reqi1 = req1.send()
+
+        handler2 = Mock()
+        req2 = chan.request('name', 'payload')
+        req2.add_handler(handler2)
+        reqi2 = req2.send()
+
+        other = chan.request('name', 'other')
+        other.add_handler(Mock())
+        other.send()
+
+        self.assertEqual([verb.payload for verb in conn.upstream_verbs], [b'payload', b'other'])
+
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=conn.upstream_verbs[0].messageref,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=b'response'
+        ))
+
+        self.__verify_handler_call(handler1, Message, status=MessageStatus.OK, payload='response',
+                                   source=reqi1)
+        self.__verify_handler_call(handler2, Message, status=MessageStatus.OK, payload='response',
+                                   source=reqi2)
+
+        self.assertEqual(chan.stats()['coalesced_requests'], 1)
+        self.assertEqual(chan.stats()['leading_requests'], 2)
+        self.assertEqual(len(chan.core.flights), 1)
+
+    def test_request_coalesce_timeout(self):
+        """ Test if a follower with its own deadline gets its own timeout, and takes over when
+        the leader times out.
+        """
+
+        conn = MockedConnection()
+        loop = MockedLoop()
+
+        with patch_time() as time:
+            chan = Channel(conn, loop=loop)
+            chan.coalesce_requests()
+
+            conn.mock_connection_ready(True)
+
+            handlers = [Mock(), Mock(), Mock()]
+            for handler, timeout in zip(handlers, [1.0, 0.5, 10.0]):
+                req = chan.request('name', 'payload', timeout=timeout, ttl=0)
+                req.add_handler(handler)
+                req.send()
+
+            self.assertEqual(len(conn.upstream_verbs), 1)
+
+            # the second request times out on its own deadline
+            time.sleep(2.6)
+            loop.run_timers()
+            handlers[0].assert_not_called()
+            handlers[1].assert_called_once()
+            self.assertEqual(handlers[1].call_args[0][0].status, MessageStatus.TIMEOUT)
+
+            # the server reports a timeout for the first request, the third request is send instead
+            conn.mock_downstream_verb(verbs.MessageVerb(
+                messageref=conn.upstream_verbs[0].messageref,
+                status=verbs.MessageVerb.STATUS_TIMEOUT,
+            ))
+
+        handlers[0].assert_called_once()
+        handlers[2].assert_not_called()
+
+        self.assertEqual(len(conn.upstream_verbs), 2)
+        self.assertEqual(conn.upstream_verbs[1].timeout, 10.0)
+
+    def test_interest_1(self):
+        """ Test if the sessions interest handler is called when an interest packet is received.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name')
+        handler = Mock()
+        session.add_interest_handler(handler)
+
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'topic'
+        ))
+
+        self.__verify_handler_call(
+            handler,
+            Interest,
+            status=InterestStatus.INTEREST,
+            name='name',
+            topic='topic',
+            source=session,
+        )
+
+    def test_interest_2(self):
+        """ Test if the sessions interest handler is called when an interest packet is received.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name')
+        handler = Mock()
+        session.add_interest_handler(handler)
+
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_NO_INTEREST,
+            topic=b'topic'
+        ))
+
+        self.__verify_handler_call(
+            handler,
+            Interest,
+            status=InterestStatus.NO_INTEREST,
+            name='name',
+            topic='topic',
+            source=session,
+        )
+
+    def test_interest_connection_lost_1(self):
+        """ Test if the interest is lost when the connection is lost.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name')
+        handler = Mock()
+        session.add_interest_handler(handler)
+
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'topic'
+        ))
+
+        self.__verify_handler_call(
+            handler,
+            Interest,
+            status=InterestStatus.INTEREST,
+            topic='topic',
+            source=session,
+        )
+
+        conn.mock_connection_ready(False)
+
+        self.__verify_handler_call(
+            handler,
+            Interest,
+            status=InterestStatus.NO_INTEREST,
+            topic='topic',
+            source=session,
+        )
+
+    def test_publish_1(self):
+        """ Test if a publish results in a post for every postref that has interest in the topic.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name')
+        conn.upstream_verbs.clear()
+
+        for postref in (1, 2):
+            conn.mock_downstream_verb(verbs.InterestVerb(
+                postref=postref,
+                name=b'name',
+                status=verbs.InterestVerb.STATUS_INTEREST,
+                topic=b'topic'
+            ))
+
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=3,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'other'
+        ))
+
+        self.assertEqual(session.publish('topic', 'value'), 2)
+
+        conn.assert_upstream_verb(verbs.PostVerb(postref=1, payload=b'value'))
+        conn.assert_upstream_verb(verbs.PostVerb(postref=2, payload=b'value'))
+        conn.assert_upstream_verb(None)
+
+        # after one of the interests is gone, only the other one gets the post
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_NO_INTEREST,
+            topic=b'topic'
+        ))
+
+        self.assertEqual(session.publish('topic', 'value'), 1)
+
+        conn.assert_upstream_verb(verbs.PostVerb(postref=2, payload=b'value'))
+        conn.assert_upstream_verb(None)
+
+        self.assertEqual(session.publish('unknown', 'value'), 0)
+        conn.assert_upstream_verb(None)
+
+        stats = session.stats()
+        self.assertEqual(stats['publishes'], 3)
+        self.assertEqual(stats['published_posts'], 3)
+
+    def test_publish_connection_lost(self):
+        """ Test if all interests of a topic are lost when the connection is lost.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name')
+        handler = Mock()
+        session.add_interest_handler(handler)
+
+        for postref in (1, 2):
+            conn.mock_downstream_verb(verbs.InterestVerb(
+                postref=postref,
+                name=b'name',
+                status=verbs.InterestVerb.STATUS_INTEREST,
+                topic=b'topic'
+            ))
+
+        handler.reset_mock()
+        conn.mock_connection_ready(False)
+
+        self.assertEqual(handler.call_count, 2)
+        self.assertEqual(session.current_interest, {})
+        self.assertEqual(session.publish('topic', 'value'), 0)
+
+    def test_publish_last_value(self):
+        """ Test if new interest is answered from the last value cache without calling the
+        interest handler, and if unchanged values are not published again.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name', last_value=True)
+        handler = Mock()
+        session.add_interest_handler(handler)
+        conn.upstream_verbs.clear()
+
+        # no interest yet, the value is only stored
+        self.assertEqual(session.publish('topic', 'value'), 0)
+        conn.assert_upstream_verb(None)
+
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'topic'
+        ))
+
+        conn.assert_upstream_verb(verbs.PostVerb(postref=1, payload=b'value'))
+        conn.assert_upstream_verb(None)
+        handler.assert_not_called()
+
+        # unchanged value is suppressed, changed value is posted
+        self.assertEqual(session.publish('topic', 'value'), 0)
+        conn.assert_upstream_verb(None)
+
+        self.assertEqual(session.publish('topic', 'value2'), 1)
+        conn.assert_upstream_verb(verbs.PostVerb(postref=1, payload=b'value2'))
+
+        # the handler is not told about interest it never saw
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_NO_INTEREST,
+            topic=b'topic'
+        ))
+
+        handler.assert_not_called()
+
+        # topics without a value still go to the handler
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=2,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'other'
+        ))
+
+        self.assertEqual(handler.call_count, 1)
+        conn.assert_upstream_verb(None)
+
+        stats = session.stats()
+        self.assertEqual(stats['suppressed_publishes'], 1)
+        self.assertEqual(stats['cached_posts'], 1)
+
+    def test_publish_buffer(self):
+        """ Test if buffers are posted without copying, but cached values are copies.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        buffer = bytearray(b'value')
+
+        chan.request('name', memoryview(buffer)).send()
+        self.assertIs(conn.upstream_verbs[-1].payload.obj, buffer)
+
+        session = chan.session('name', last_value=True)
+        session.publish('topic', buffer)
+
+        buffer[:] = b'other'
+
+        conn.upstream_verbs.clear()
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'topic'
+        ))
+
+        conn.assert_upstream_verb(verbs.PostVerb(postref=1, payload=b'value'))
+
+    def test_publish_delta(self):
+        """ Test if new interest gets a snapshot and later publishes only a delta.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name', delta=True)
+        handler = Mock()
+        session.add_interest_handler(handler)
+        conn.upstream_verbs.clear()
+
+        self.assertEqual(session.publish('topic', 'value 1 of topic'), 0)
+        conn.assert_upstream_verb(None)
+
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'topic'
+        ))
+
+        conn.assert_upstream_verb(verbs.PostVerb(
+            postref=1,
+            payload=delta.pack_snapshot(1, b'value 1 of topic'),
+        ))
+        self.assertEqual(handler.call_count, 1)
+
+        self.assertEqual(session.publish('topic', 'value 2 of topic'), 1)
+        conn.assert_upstream_verb(verbs.PostVerb(
+            postref=1,
+            payload=delta.pack_delta(2, b'value 1 of topic', b'value 2 of topic'),
+        ))
+
+        # interest that arrives later starts with a snapshot as well
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=2,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'topic'
+        ))
+
+        conn.assert_upstream_verb(verbs.PostVerb(
+            postref=2,
+            payload=delta.pack_snapshot(2, b'value 2 of topic'),
+        ))
+
+        self.assertEqual(session.publish('topic', 'value 3 of topic'), 2)
+        frame = delta.pack_delta(3, b'value 2 of topic', b'value 3 of topic')
+        conn.assert_upstream_verb(verbs.PostVerb(postref=1, payload=frame))
+        conn.assert_upstream_verb(verbs.PostVerb(postref=2, payload=frame))
+
+        stats = session.stats()
+        self.assertEqual(stats['snapshot_posts'], 2)
+        self.assertEqual(stats['delta_posts'], 3)
+
+    def test_subscribe_delta(self):
+        """ Test if a delta subscription reconstructs the values, and subscribes again to get a
+        new snapshot when an update is missed.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        handler = Mock()
+        sub = chan.subscribe('name', 'topic', delta=True)
+        sub.add_handler(handler)
+        conn.upstream_verbs.clear()
+
+        for frame in (delta.pack_snapshot(1, b'value 1 of topic'),
+                      delta.pack_delta(2, b'value 1 of topic', b'value 2 of topic')):
+
+            conn.mock_downstream_verb(verbs.MessageVerb(
+                messageref=1,
+                status=verbs.MessageVerb.STATUS_OK,
+                payload=frame,
+            ))
+
+        self.assertEqual([call[0][0].payload for call in handler.call_args_list],
+                         ['value 1 of topic', 'value 2 of topic'])
+
+        # update 3 is missed
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=1,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=delta.pack_delta(4, b'value 3 of topic', b'value 4 of topic'),
+        ))
+
+        self.assertEqual(handler.call_count, 2)
+
+        conn.assert_upstream_verb(verbs.UnsubscribeVerb(name=b'name', topic=b'topic'))
+        conn.assert_upstream_verb(verbs.SubscribeVerb(name=b'name', messageref=1, topic=b'topic'))
+        conn.assert_upstream_verb(None)
+
+        conn.mock_downstream_verb(verbs.MessageVerb(
+            messageref=1,
+            status=verbs.MessageVerb.STATUS_OK,
+            payload=delta.pack_snapshot(4, b'value 4 of topic'),
+        ))
+
+        self.assertEqual(handler.call_args[0][0].payload, 'value 4 of topic')
+
+    def test_delta_seq_wraparound(self):
+        """ Test if publishing and applying deltas continues when the sequence number wraps around.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name', delta=True)
+        handler = Mock()
+        sub = chan.subscribe('name', 'topic', delta=True)
+        sub.add_handler(handler)
+        conn.upstream_verbs.clear()
+
+        conn.mock_downstream_verb(verbs.InterestVerb(
+            postref=1,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=b'topic'
+        ))
+
+        session.publish('topic', 'value 1 of topic')
+        session.delta_values[b'topic'] = (2 ** 32 - 1, b'value 1 of topic')
+        session.publish('topic', 'value 2 of topic')
+
+        frame = delta.pack_delta(0, b'value 1 of topic', b'value 2 of topic')
+        snapshot = delta.pack_snapshot(1, b'value 1 of topic')
+        conn.assert_upstream_verb(verbs.PostVerb(postref=1, payload=snapshot))
+        conn.assert_upstream_verb(verbs.PostVerb(postref=1, payload=frame))
+
+        for frame in (delta.pack_snapshot(2 ** 32 - 1, b'value 1 of topic'), frame):
+            conn.mock_downstream_verb(verbs.MessageVerb(
+                messageref=1,
+                status=verbs.MessageVerb.STATUS_OK,
+                payload=frame,
+            ))
+
+        self.assertEqual([call[0][0].payload for call in handler.call_args_list],
+                         ['value 1 of topic', 'value 2 of topic'])
+        conn.assert_upstream_verb(None)
+
+    def test_interest_topic_shared(self):
+        """ Test if interest verbs for the same topic share a single topic object.
+        """
+
+        conn = MockedConnection()
+        chan = Channel(conn)
+
+        conn.mock_connection_ready(True)
+
+        session = chan.session('name')
+
+        interest_verbs = [verbs.InterestVerb(
+            postref=postref,
+            name=b'name',
+            status=verbs.InterestVerb.STATUS_INTEREST,
+            topic=bytes(bytearray(b'topic')),
+        ) for postref in (1, 2)]
+
+        for verb in interest_verbs:
+            conn.mock_downstream_verb(verb)
+
+        self.assertIs(interest_verbs[0].topic, interest_verbs[1].topic)
+
+        for verb in interest_verbs:
+            conn.mock_downstream_verb(verbs.InterestVerb(
+                postref=verb.postref,
+                name=b'name',
+                status=verbs.InterestVerb.STATUS_NO_INTEREST,
+                topic=b'topic',
+            ))
+
+        self.assertEqual(session.topics, {})
 
     def test_call_uni_1(self):
         """ Test if the sessions call handler is called when a call packet is received.
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import Mock
+
+from nervix.channel import MessageStatus
+from nervix.chunking import ChunkedRequestStub, ChunkedSession, CHUNK_SIZE
+
+from tests.util.mockedbroker import MockedBroker
+
+
+LARGE = ''.join('%06d' % i for i in range(20000))
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.broker = MockedBroker()
+
+        self.requester = self.broker.requester
+        self.session = self.broker.session
+
+    def test_large_request_and_response(self):
+        """ Test if a request and response larger than a single payload are transferred.
+        """
+
+        sess = self.session.session('name')
+        chunked = ChunkedSession(sess)
+        calls = list()
+
+        def on_call(call):
+            calls.append(call.payload)
+            call.post(call.payload[::-1])
+
+        chunked.add_call_handler(on_call)
+
+        req = ChunkedRequestStub(self.requester, 'name', LARGE)
+        handler = Mock()
+        chunk_handler = Mock()
+        req.add_handler(handler)
+        req.add_chunk_handler(chunk_handler)
+        req.send()
+
+        self.broker.pump()
+
+        nr_chunks = len(LARGE) // CHUNK_SIZE + 1
+
+        self.assertEqual(calls, [LARGE])
+        self.assertEqual(self.broker.nr_requests, 2 * nr_chunks - 1)
+
+        handler.assert_called_once()
+        msg = handler.call_args[0][0]
+        self.assertEqual(msg.status, MessageStatus.OK)
+        self.assertEqual(msg.payload, LARGE[::-1])
+
+        self.assertEqual(chunk_handler.call_count, nr_chunks)
+        self.assertEqual(chunk_handler.call_args[0][1:], (nr_chunks - 1, nr_chunks))
+
+        self.assertEqual(chunked.incoming, {})
+        self.assertEqual(chunked.outgoing, {})
+
+    def test_small_request(self):
+        """ Test if chunked and plain requests both reach the handler.
+        """
+
+        sess = self.session.session('name')
+        chunked = ChunkedSession(sess)
+        chunked.add_call_handler(lambda call: call.post('answer'))
+
+        req = ChunkedRequestStub(self.requester, 'name', 'small')
+        handler = Mock()
+        req.add_handler(handler)
+        req.send()
+
+        plain = self.requester.request('name', 'plain')
+        plain_handler = Mock()
+        plain.add_handler(plain_handler)
+        plain.send()
+
+        self.broker.pump()
+
+        self.assertEqual(handler.call_args[0][0].payload, 'answer')
+        self.assertEqual(plain_handler.call_args[0][0].payload, 'answer')
+
+    def test_transfer_too_large(self):
+        """ Test if the session refuses transfers above its limit.
+        """
+
+        sess = self.session.session('name')
+        chunked = ChunkedSession(sess, max_transfer_size=2 * CHUNK_SIZE)
+        call_handler = Mock()
+        chunked.add_call_handler(call_handler)
+
+        req = ChunkedRequestStub(self.requester, 'name', LARGE)
+        handler = Mock()
+        req.add_handler(handler)
+
+        with self.assertLogs('nervix.chunking'):
+            req.send()
+            self.broker.pump()
+
+        call_handler.assert_not_called()
+        handler.assert_called_once()
+        self.assertEqual(handler.call_args[0][0].status, MessageStatus.UNREACHABLE)
+        self.assertEqual(chunked.incoming, {})
@@ -0,0 +1,173 @@
+import time
+import threading
+import unittest
+from unittest.mock import Mock
+
+from nervix.batching import BatchingSession
+from nervix.channel import Channel, ExecutorCall
+from nervix.chunking import ChunkedSession
+from nervix.executor import OrderedExecutor
+from nervix import verbs
+
+from tests.util.mockedconnection import MockedConnection
+from tests.util.mockedloop import MockedLoop
+
+
+class Test(unittest.TestCase):
+
+    def test_order_per_key(self):
+        """ Test if items with the same key are handled in the order they were submitted.
+        """
+
+        executor = OrderedExecutor(max_workers=4, key=lambda item: item[0])
+        handled = list()
+
+        def handler(item):
+            # give other items a chance to overtake this one
+            time.sleep(0.001 * (item[1] % 3))
+            handled.append(item)
+
+        items = [(key, nr) for nr in range(20) for key in 'abc']
+
+        for item in items:
+            executor.submit(item, handler)
+
+        executor.shutdown()
+
+        self.assertEqual(len(handled), len(items))
+
+        for key in 'abc':
+            self.assertEqual([nr for k, nr in handled if k == key], list(range(20)))
+
+        self.assertEqual(executor.queues, {})
+
+    def test_parallel_keys(self):
+        """ Test if items with different keys are handled at the same time.
+        """
+
+        executor = OrderedExecutor(max_workers=2, key=lambda item: item)
+        barrier = threading.Barrier(2, timeout=5.0)
+        passed = list()
+
+        def handler(item):
+            barrier.wait()
+            passed.append(item)
+
+        executor.submit('a', handler)
+        executor.submit('b', handler)
+        executor.shutdown()
+
+        self.assertEqual(sorted(passed), ['a', 'b'])
+
+    def test_exception(self):
+        """ Test if an exception in a handler doesn't stop the items after it.
+        """
+
+        executor = OrderedExecutor(max_workers=1, key=lambda item: 'key')
+        handler = Mock(side_effect=[ValueError('failed'), None])
+
+        with self.assertLogs('nervix.executor'):
+            executor.submit(1, handler)
+            executor.submit(2, handler)
+            executor.shutdown()
+
+        self.assertEqual(handler.call_count, 2)
+
+    def test_session_executor(self):
+        """ Test if call handlers run on the executor, and posts are send from the mainloop.
+        """
+
+        loop = MockedLoop()
+        conn = MockedConnection()
+        chan = Channel(conn, loop=loop)
+
+        conn.mock_connection_ready(True)
+
+        executor = OrderedExecutor(key=lambda call: call.raw_payload)
+        session = chan.session('name', executor=executor)
+
+        threads = list()
+
+        def on_call(call):
+            threads.append(threading.current_thread())
+            self.assertIsInstance(call, ExecutorCall)
+            call.post(call.payload.upper())
+
+        session.add_call_handler(on_call)
+        conn.upstream_verbs.clear()
+
+        conn.mock_downstream_verb(verbs.CallVerb(
+            unidirectional=False,
+            postref=11,
+            name=b'name',
+            payload=b'payload',
+        ))
+
+        executor.shutdown()
+
+        self.assertIsNot(threads[0], threading.current_thread())
+        conn.assert_upstream_verb(None)
+
+        loop.run_calls()
+        conn.assert_upstream_verb(verbs.PostVerb(postref=11, payload=b'PAYLOAD'))
+
+    def test_session_executor_invalid_post(self):
+        """ Test if an invalid post raises in the handler, and nothing is handed to the mainloop.
+        """
+
+        loop = MockedLoop()
+        conn = MockedConnection()
+        chan = Channel(conn, loop=loop)
+
+        conn.mock_connection_ready(True)
+
+        executor = OrderedExecutor()
+        session = chan.session('name', executor=executor)
+
+        errors = list()
+
+        def on_call(call):
+            try:
+                call.post('x' * 40000)
+            except ValueError as exc:
+                errors.append(exc)
+
+        session.add_call_handler(on_call)
+
+        conn.mock_downstream_verb(verbs.CallVerb(
+            unidirectional=False,
+            postref=11,
+            name=b'name',
+            payload=b'payload',
+        ))
+
+        executor.shutdown()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(loop.run_calls(), 0)
+
+    def test_session_executor_requires_loop(self):
+        """ Test if a session with an executor can't be created without mainloop.
+        """
+
+        chan = Channel(MockedConnection())
+
+        with self.assertRaises(ValueError):
+            chan.session('name', executor=OrderedExecutor())
+
+    def test_session_executor_adapters(self):
+        """ Test if the batching and chunking adapters refuse a session with an executor, as they
+        post from the call handlers.
+        """
+
+        chan = Channel(MockedConnection(), loop=MockedLoop())
+        executor = OrderedExecutor()
+        sess = chan.session('name', executor=executor)
+
+        with self.assertRaises(ValueError):
+            BatchingSession(sess)
+
+        with self.assertRaises(ValueError):
+            ChunkedSession(sess)
+
+        executor.shutdown()
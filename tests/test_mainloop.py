@@ -0,0 +1,55 @@
+import time
+import threading
+import unittest
+from collections import deque
+
+from nervix.mainloop import Mainloop
+
+
+class RacingDeque(deque):
+    """ Deque that lets the mainloop run while another thread is between checking whether the
+    deque is empty and appending to it.
+    """
+
+    def __init__(self, iterable, worker_checked):
+        deque.__init__(self, iterable)
+        self.worker_checked = worker_checked
+        self.worker_thread = None
+
+    def append(self, item):
+        if threading.current_thread() is self.worker_thread:
+            self.worker_checked.set()
+            time.sleep(0.2)
+
+        deque.append(self, item)
+
+
+class Test(unittest.TestCase):
+
+    def test_call_soon_wakeup(self):
+        """ Test if a call scheduled from another thread wakes up the mainloop, when the mainloop
+        takes out the earlier calls while the call is being scheduled.
+        """
+
+        loop = Mainloop()
+        worker_checked = threading.Event()
+        ran = threading.Event()
+
+        loop.pending_calls = RacingDeque([(lambda: None, (), {})], worker_checked)
+
+        thread = threading.Thread(target=loop.call_soon, args=(ran.set,))
+        loop.pending_calls.worker_thread = thread
+        thread.start()
+
+        worker_checked.wait(1.0)
+
+        # takes out the earlier call
+        loop.run_once(0)
+
+        start = time.monotonic()
+        loop.run_once(1.0)
+
+        thread.join()
+
+        self.assertTrue(ran.is_set())
+        self.assertLess(time.monotonic() - start, 0.5)
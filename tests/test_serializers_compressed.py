@@ -0,0 +1,79 @@
+import os
+import unittest
+
+from nervix.serializers.base import EncodingError
+from nervix.serializers.string import StringSerializer
+from nervix.serializers.compressed import CompressedSerializer
+
+
+DOCUMENT = "".join("line %d of a repetitive document\n" % (i % 50) for i in range(3000))
+
+
+class Test(unittest.TestCase):
+
+    def test_small_payload_1(self):
+        s = CompressedSerializer(StringSerializer(), threshold=16)
+        res = s.encode("short")
+        self.assertEqual(res, b"\x00short")
+        self.assertEqual(s.decode(res), "short")
+
+    def test_zlib_roundtrip(self):
+        s = CompressedSerializer(StringSerializer())
+        res = s.encode(DOCUMENT)
+
+        self.assertEqual(res[0], 1)
+        self.assertLess(len(res), len(DOCUMENT) // 5)
+        self.assertEqual(s.decode(res), DOCUMENT)
+
+    def test_lzma_roundtrip(self):
+        s = CompressedSerializer(StringSerializer(), method='lzma')
+        res = s.encode(DOCUMENT)
+
+        self.assertEqual(res[0], 2)
+        self.assertEqual(s.decode(res), DOCUMENT)
+
+    def test_preset_dictionary(self):
+        zdict = b'{"symbol": "EURUSD", "bid": , "ask": , "time": }'
+        payload = '{"symbol": "EURUSD", "bid": 1.08765, "ask": 1.08766, "time": 1700000000}'
+
+        plain = CompressedSerializer(StringSerializer(), threshold=0)
+        preset = CompressedSerializer(StringSerializer(), threshold=0, zdict=zdict)
+
+        res = preset.encode(payload)
+
+        self.assertLess(len(res), len(plain.encode(payload)))
+        self.assertEqual(preset.decode(res), payload)
+
+    def test_incompressible(self):
+        s = CompressedSerializer(StringSerializer(), threshold=0)
+        res = s.encode(bytes(range(256)))
+        self.assertEqual(res, b"\x00" + bytes(range(256)))
+
+    def test_too_large(self):
+        s = CompressedSerializer(StringSerializer())
+
+        with self.assertRaises(EncodingError):
+            s.encode(os.urandom(40000))
+
+    def test_decode_invalid(self):
+        s = CompressedSerializer(StringSerializer())
+
+        with self.assertLogs('nervix.serializers.compressed'):
+            self.assertIsNone(s.decode(b"\x01not compressed"))
+
+        with self.assertLogs('nervix.serializers.compressed'):
+            self.assertIsNone(s.decode(b"\x07"))
+
+        for method in ('zlib', 'lzma'):
+            s = CompressedSerializer(StringSerializer(), method=method)
+            res = s.encode(DOCUMENT)
+
+            with self.assertLogs('nervix.serializers.compressed'):
+                self.assertIsNone(s.decode(res[:len(res) // 2]))
+
+    def test_decode_too_large(self):
+        s = CompressedSerializer(StringSerializer(), max_decoded_size=1000)
+        res = CompressedSerializer(StringSerializer()).encode(DOCUMENT)
+
+        with self.assertLogs('nervix.serializers.compressed'):
+            self.assertIsNone(s.decode(res))
@@ -0,0 +1,74 @@
+import unittest
+
+from nervix.serializers.base import EncodingError
+from nervix.serializers.ndarray import NdarraySerializer, contiguous_strides
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Test(unittest.TestCase):
+
+    def test_contiguous_strides(self):
+        self.assertEqual(contiguous_strides((2, 3, 4), 4, 'C'), (48, 16, 4))
+        self.assertEqual(contiguous_strides((2, 3, 4), 4, 'F'), (4, 8, 24))
+        self.assertEqual(contiguous_strides((), 8, 'C'), ())
+
+    @unittest.skipIf(numpy is not None, "numpy is installed")
+    def test_without_numpy(self):
+        with self.assertRaises(ImportError):
+            NdarraySerializer()
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_roundtrip_1(self):
+        s = NdarraySerializer()
+        array = numpy.arange(12, dtype=numpy.float32).reshape(3, 4)
+
+        res = s.decode(s.encode(array))
+
+        self.assertEqual(res.dtype, numpy.float32)
+        self.assertTrue(numpy.array_equal(res, array))
+        self.assertFalse(res.flags.writeable)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_roundtrip_fortran_order(self):
+        s = NdarraySerializer()
+        array = numpy.asfortranarray(numpy.arange(12, dtype='>i8').reshape(3, 4))
+
+        res = s.decode(s.encode(array))
+
+        self.assertTrue(numpy.array_equal(res, array))
+        self.assertTrue(res.flags.f_contiguous)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_roundtrip_non_contiguous(self):
+        s = NdarraySerializer()
+        array = numpy.arange(24, dtype=numpy.int16).reshape(4, 6)[::2, 1::2]
+
+        self.assertTrue(numpy.array_equal(s.decode(s.encode(array)), array))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_decode_view(self):
+        s = NdarraySerializer()
+        payload = s.encode(numpy.ones(100, dtype=numpy.float64))
+
+        res = s.decode(payload)
+
+        self.assertIsNotNone(res.base)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_encode_too_large(self):
+        s = NdarraySerializer()
+
+        with self.assertRaises(EncodingError):
+            s.encode(numpy.zeros(5000, dtype=numpy.float64))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_decode_invalid(self):
+        s = NdarraySerializer()
+        payload = s.encode(numpy.ones(10, dtype=numpy.float32))
+
+        with self.assertLogs('nervix.serializers.ndarray'):
+            self.assertIsNone(s.decode(payload[:-1]))
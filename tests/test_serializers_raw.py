@@ -0,0 +1,16 @@
+import unittest
+
+from nervix.serializers.raw import RawSerializer
+
+
+class Test(unittest.TestCase):
+
+    def test_encode(self):
+        s = RawSerializer()
+        payload = memoryview(b"test bytes")
+        self.assertIs(s.encode(payload), payload)
+
+    def test_decode(self):
+        s = RawSerializer()
+        payload = b"test bytes\xfe"
+        self.assertIs(s.decode(payload), payload)
@@ -0,0 +1,35 @@
+import unittest
+
+from nervix.serializers.registry import SerializerRegistry
+
+
+class Test(unittest.TestCase):
+
+    def test_resolve_1(self):
+        r = SerializerRegistry('default')
+        r.register('quotes', 'exact')
+        r.register('quo*', 'short')
+        r.register('quotes-*', 'long')
+
+        self.assertEqual(r.resolve('quotes'), 'exact')
+        self.assertEqual(r.resolve('quotes-eu'), 'long')
+        self.assertEqual(r.resolve('quota'), 'short')
+        self.assertEqual(r.resolve('other'), 'default')
+        self.assertEqual(r.resolve(None), 'default')
+
+    def test_resolve_catch_all(self):
+        r = SerializerRegistry('default')
+        r.register('*', 'all')
+
+        self.assertEqual(r.resolve('anything'), 'all')
+
+    def test_register_after_resolve(self):
+        r = SerializerRegistry('default')
+
+        self.assertEqual(r.resolve('name'), 'default')
+
+        r.register('na*', 'prefix')
+        self.assertEqual(r.resolve('name'), 'prefix')
+
+        r.register('na*', None)
+        self.assertEqual(r.resolve('name'), 'default')
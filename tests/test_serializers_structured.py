@@ -0,0 +1,96 @@
+import unittest
+
+from nervix.serializers.base import EncodingError
+from nervix.serializers.structured import StructSerializer, Record, List, Bytes, String
+
+
+QUOTE = Record(
+    ('symbol', String(8)),
+    ('time', 'float64'),
+    ('sequence', 'uint32'),
+    ('bids', List(Record(('price', 'float64'), ('size', 'uint32')))),
+    ('flags', List('uint8')),
+    ('comment', String()),
+    ('raw', Bytes()),
+    ('id', Bytes(4)),
+    ('closed', 'bool'),
+)
+
+
+def quote():
+    return {
+        'symbol': 'EURUSD',
+        'time': 1234.5,
+        'sequence': 7,
+        'bids': [{'price': 1.25, 'size': 100}, {'price': 1.5, 'size': 200}],
+        'flags': [1, 2, 3],
+        'comment': 'café',
+        'raw': b'\x00\x01',
+        'id': b'abcd',
+        'closed': False,
+    }
+
+
+class Test(unittest.TestCase):
+
+    def test_roundtrip_1(self):
+        s = StructSerializer(QUOTE)
+        res = s.decode(s.encode(quote()))
+        self.assertEqual(res, quote())
+
+    def test_encode_layout(self):
+        s = StructSerializer(Record(('a', 'uint16'), ('b', 'int8'), ('c', String())))
+        res = s.encode({'a': 258, 'b': -1, 'c': 'xy'})
+        self.assertEqual(res, b'\x01\x02\xff\x00\x02xy')
+
+    def test_bare_types(self):
+        s = StructSerializer('float64')
+        self.assertEqual(s.decode(s.encode(1.5)), 1.5)
+
+        s = StructSerializer(List(String()))
+        self.assertEqual(s.decode(s.encode(['a', 'bc'])), ['a', 'bc'])
+
+    def test_encode_missing_field(self):
+        s = StructSerializer(QUOTE)
+        obj = quote()
+        del obj['time']
+
+        with self.assertRaises(EncodingError):
+            s.encode(obj)
+
+    def test_encode_wrong_type(self):
+        s = StructSerializer(QUOTE)
+
+        obj = quote()
+        obj['sequence'] = 'seven'
+        with self.assertRaises(EncodingError):
+            s.encode(obj)
+
+        obj = quote()
+        obj['raw'] = 'text'
+        with self.assertRaises(EncodingError):
+            s.encode(obj)
+
+    def test_encode_fixed_too_long(self):
+        s = StructSerializer(QUOTE)
+        obj = quote()
+        obj['symbol'] = 'TOOLONGSYMBOL'
+
+        with self.assertRaises(EncodingError):
+            s.encode(obj)
+
+    def test_encode_too_large(self):
+        s = StructSerializer(List('float64'))
+
+        with self.assertRaises(EncodingError):
+            s.encode([0.0] * 5000)
+
+    def test_decode_invalid(self):
+        s = StructSerializer(QUOTE)
+        payload = s.encode(quote())
+
+        with self.assertLogs('nervix.serializers.structured'):
+            self.assertIsNone(s.decode(payload[:-1]))
+
+        with self.assertLogs('nervix.serializers.structured'):
+            self.assertIsNone(s.decode(payload + b'\x00'))
@@ -0,0 +1,153 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+from concurrent.futures import Future, TimeoutError
+
+from nervix.mainloop import Mainloop
+from nervix.channel import Channel, MessageStatus, Call
+from nervix.sync import SyncChannel, RequestError
+from nervix import verbs
+
+from tests.util.mockedconnection import MockedConnection
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = Mainloop()
+        self.conn = MockedConnection()
+        self.chan = SyncChannel(self.loop, Channel(self.conn, loop=self.loop))
+
+        self.chan.run(self.conn.mock_connection_ready, True).result(1.0)
+
+    def tearDown(self):
+        self.chan.close(1.0)
+
+    def respond(self, status, payload=None):
+        self.chan.run(self.conn.mock_downstream_verb, verbs.MessageVerb(
+            messageref=1,
+            status=status,
+            payload=payload,
+        )).result(1.0)
+
+    def test_request_1(self):
+        """ Test if the future is resolved with the response message.
+        """
+
+        future = self.chan.request('name', 'payload')
+
+        self.chan.run(lambda: None).result(1.0)
+        self.assertFalse(future.done())
+
+        self.respond(verbs.MessageVerb.STATUS_OK, b'response')
+
+        message = future.result(1.0)
+        self.assertEqual(message.status, MessageStatus.OK)
+        self.assertEqual(message.payload, 'response')
+
+    def test_call_1(self):
+        """ Test if call() blocks until the response arrives and returns the payload.
+        """
+
+        result = []
+        caller = threading.Thread(target=lambda: result.append(self.chan.call('name', 'payload')))
+        caller.start()
+
+        # wait for the request to be send before responding
+        while not self.chan.run(lambda: len(self.conn.upstream_verbs)).result(1.0):
+            pass
+
+        self.respond(verbs.MessageVerb.STATUS_OK, b'response')
+
+        caller.join(1.0)
+        self.assertEqual(result, ['response'])
+
+    def test_call_unreachable(self):
+        """ Test if call() raises a RequestError when the response is not OK.
+        """
+
+        errors = []
+
+        def call():
+            try:
+                self.chan.call('name', 'payload')
+            except RequestError as exc:
+                errors.append(exc)
+
+        caller = threading.Thread(target=call)
+        caller.start()
+
+        while not self.chan.run(lambda: len(self.conn.upstream_verbs)).result(1.0):
+            pass
+
+        self.respond(verbs.MessageVerb.STATUS_UNREACHABLE)
+
+        caller.join(1.0)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].message.status, MessageStatus.UNREACHABLE)
+
+    def test_call_no_response(self):
+        """ Test if call() waits as long as the request deadline with the default ttl, and cancels
+        the request when no response arrives at all.
+        """
+
+        waits = []
+
+        class TimingOutFuture(Future):
+            def result(self, timeout=None):
+                if timeout == 1.0:
+                    return Future.result(self, timeout)
+
+                waits.append(timeout)
+                raise TimeoutError()
+
+        self.chan.wait_timeout = 1.0
+
+        with patch('nervix.sync.Future', TimingOutFuture):
+            with self.assertRaises(TimeoutError):
+                self.chan.call('name', 'payload', timeout=2.0)
+
+        self.assertEqual(waits, [5.0 + 2.0 + self.chan.channel.core.request_deadline_grace + 1.0])
+
+        # the request is canceled, so a late response is not handled
+        nr_handlers = self.chan.run(lambda: len(self.chan.channel.core.message_handlers)).result(1.0)
+        self.assertEqual(nr_handlers, 0)
+
+    def test_closed(self):
+        """ Test if waiting for the mainloop raises a TimeoutError after the channel is closed.
+        """
+
+        self.chan.close(1.0)
+        self.chan.wait_timeout = 0.1
+
+        with self.assertRaises(TimeoutError):
+            self.chan.subscribe('name', 'topic')
+
+    def test_session_1(self):
+        """ Test if the call handler of a session is called from the mainloop thread.
+        """
+
+        threads = []
+        handler = Mock(side_effect=lambda call: threads.append(threading.current_thread()))
+
+        self.chan.session('name', call_handler=handler)
+
+        self.chan.run(self.conn.mock_downstream_verb, verbs.CallVerb(
+            unidirectional=True,
+            postref=None,
+            name=b'name',
+            payload=b'payload',
+        )).result(1.0)
+
+        handler.assert_called_once()
+        self.assertIsInstance(handler.call_args[0][0], Call)
+        self.assertEqual(threads, [self.chan.thread])
+
+    def test_subscribe_1(self):
+        sub = self.chan.subscribe('name', 'topic', Mock())
+        self.chan.unsubscribe(sub)
+
+        self.chan.run(lambda: None).result(1.0)
+
+        sent = [type(verb) for verb in self.conn.upstream_verbs]
+        self.assertEqual(sent, [verbs.SubscribeVerb, verbs.UnsubscribeVerb])
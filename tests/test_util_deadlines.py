@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import Mock, call
+
+from nervix.util.deadlines import DeadlineQueue
+
+from tests.util.mockedtime import patch_time
+from tests.util.mockedloop import MockedLoop
+
+
+class Test(unittest.TestCase):
+
+    def test_expire_order_1(self):
+        """ Test if deadlines expire in order, regardless of the order they were added.
+        """
+
+        loop = MockedLoop()
+        handler = Mock()
+
+        with patch_time() as time:
+            queue = DeadlineQueue(loop, handler)
+            queue.add('b', 2.0)
+            queue.add('a', 1.0)
+            queue.add('c', 3.0)
+
+            time.sleep(1.5)
+            loop.run_timers()
+            self.assertEqual(handler.call_args_list, [call('a')])
+
+            time.sleep(2.0)
+            loop.run_timers()
+            self.assertEqual(handler.call_args_list, [call('a'), call('b'), call('c')])
+
+        self.assertEqual(len(queue), 0)
+
+    def test_remove_1(self):
+        """ Test if a removed deadline does not expire.
+        """
+
+        loop = MockedLoop()
+        handler = Mock()
+
+        with patch_time() as time:
+            queue = DeadlineQueue(loop, handler)
+            queue.add('a', 1.0)
+            queue.add('b', 2.0)
+            queue.remove('a')
+
+            time.sleep(5.0)
+            loop.run_timers()
+
+        self.assertEqual(handler.call_args_list, [call('b')])
+
+    def test_single_timer_1(self):
+        """ Test if only a single mainloop timer is used.
+        """
+
+        loop = MockedLoop()
+
+        queue = DeadlineQueue(loop, Mock())
+        for i in range(100):
+            queue.add(i, 1.0 + i)
+
+        self.assertEqual(len(loop.timers), 1)
+
+    def test_compaction_1(self):
+        """ Test if entries of removed keys do not pile up in the heap.
+        """
+
+        queue = DeadlineQueue(None, Mock())
+
+        for i in range(1000):
+            queue.add(i, 10.0)
+            queue.remove(i)
+
+        self.assertLess(len(queue.heap), 100)
@@ -0,0 +1,66 @@
+import unittest
+
+from nervix.util import delta
+
+
+class Test(unittest.TestCase):
+
+    def test_roundtrip(self):
+        """ Test if applying a delta to the old payload gives the new payload.
+        """
+
+        cases = [
+            (b'', b''),
+            (b'', b'new'),
+            (b'old', b''),
+            (b'abcdef', b'abcdef'),
+            (b'abcdef', b'abXdef'),
+            (b'abcdef', b'abcdefgh'),
+            (b'aaaa', b'aaaaaa'),
+            (b'aaaaaa', b'aaaa'),
+            (b'prefix-middle-suffix', b'prefix-other-suffix'),
+        ]
+
+        for old, new in cases:
+            kind, seq, body = delta.unpack(delta.pack_delta(7, old, new))
+
+            self.assertEqual(kind, delta.KIND_DELTA)
+            self.assertEqual(seq, 7)
+            self.assertEqual(delta.apply(old, body), new, (old, new))
+
+    def test_seq_wraparound(self):
+        """ Test if the sequence number wraps around once it no longer fits in the frame.
+        """
+
+        self.assertEqual(delta.next_seq(1), 2)
+        self.assertEqual(delta.next_seq(2 ** 32 - 2), 2 ** 32 - 1)
+        self.assertEqual(delta.next_seq(2 ** 32 - 1), 0)
+
+        kind, seq, body = delta.unpack(delta.pack_delta(delta.next_seq(2 ** 32 - 1), b'old', b'new'))
+
+        self.assertEqual(seq, 0)
+        self.assertEqual(delta.apply(b'old', body), b'new')
+
+    def test_small_change(self):
+        """ Test if a small change in a large payload gives a small delta.
+        """
+
+        old = bytes(range(256)) * 16
+        new = old[:1000] + b'X' + old[1001:]
+
+        frame = delta.pack_delta(1, old, new)
+
+        self.assertEqual(len(frame), delta.FRAME.size + delta.DELTA.size + 1)
+
+    def test_invalid(self):
+        """ Test if invalid frames and deltas raise ValueError.
+        """
+
+        with self.assertRaises(ValueError):
+            delta.unpack(b'\x01')
+
+        with self.assertRaises(ValueError):
+            delta.apply(b'abc', b'\x00')
+
+        with self.assertRaises(ValueError):
+            delta.apply(b'abc', delta.DELTA.pack(2, 2))
@@ -0,0 +1,151 @@
+import unittest
+
+from nervix import verbs
+from nervix.util.encoder import BaseEncoder
+from nervix.protocols.nxtcp.encoder import Encoder, PostPacket
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class SendSocket:
+    """ Socket that accepts at most limit bytes per call.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.data = bytearray()
+
+    def send(self, data):
+        data = bytes(data[:self.limit])
+        self.data += data
+        return len(data)
+
+
+class SendmsgSocket(SendSocket):
+
+    def __init__(self, limit):
+        SendSocket.__init__(self, limit)
+        self.calls = list()
+
+    def sendmsg(self, buffers):
+        self.calls.append(buffers)
+        return self.send(b''.join(buffers))
+
+
+class Test(unittest.TestCase):
+
+    def test_chunks_not_copied(self):
+        """ Test if large chunks are kept as views, and small chunks are joined.
+        """
+
+        encoder = BaseEncoder(copy_threshold=16)
+        large = bytearray(100)
+
+        encoder.add_encoded_chunks([b'head', b'er', large, b'tail'])
+
+        chunks = list(reversed(encoder.chunkbuffer))
+
+        self.assertEqual([bytes(chunk) for chunk in chunks], [b'header', bytes(large), b'tail'])
+        self.assertIs(chunks[1].obj, large)
+
+    def test_write_send(self):
+        """ Test if all chunks are written to a socket without sendmsg, with partial writes.
+        """
+
+        encoder = BaseEncoder(chunksize=7)
+        encoder.add_encoded_chunk(b'0123456789')
+        encoder.add_encoded_chunk(memoryview(b'abcdef'))
+
+        socket = SendSocket(limit=4)
+        while encoder.write_to_socket(socket):
+            pass
+
+        self.assertEqual(socket.data, b'0123456789abcdef')
+
+    def test_write_sendmsg(self):
+        """ Test if multiple chunks are written at once with sendmsg, with partial writes.
+        """
+
+        encoder = BaseEncoder(chunksize=8)
+        encoder.add_encoded_chunk(b'0123')
+        encoder.add_encoded_chunk(bytearray(b'4567'))
+        encoder.add_encoded_chunk(b'89ab')
+
+        socket = SendmsgSocket(limit=6)
+        while encoder.write_to_socket(socket):
+            pass
+
+        self.assertEqual(socket.data, b'0123456789ab')
+        self.assertEqual([len(buffers) for buffers in socket.calls], [2, 2])
+
+    def test_commit_not_fetched(self):
+        """ Test if committing more than was fetched raises a ValueError.
+        """
+
+        encoder = BaseEncoder()
+        encoder.add_encoded_chunk(b'0123')
+        encoder.fetch_chunk(2)
+
+        with self.assertRaises(ValueError):
+            encoder.commit(3)
+
+    def test_invalid_chunk(self):
+        """ Test if chunks that are not buffers raise a TypeError.
+        """
+
+        with self.assertRaises(TypeError):
+            BaseEncoder().add_encoded_chunk('string')
+
+    def test_packet_payload_view(self):
+        """ Test if the payload of a packet is not copied, and the packet encodes the same as
+        with a bytes payload.
+        """
+
+        payload = bytearray(b'x' * 2000)
+
+        packet = PostPacket(1, memoryview(payload))
+        buffers = packet.get_buffers()
+
+        self.assertIs(buffers[1].obj, payload)
+        self.assertEqual(packet.get_chunk(), PostPacket(1, bytes(payload)).get_chunk())
+
+        encoder = Encoder()
+        encoder.encode(packet)
+
+        self.assertIs(encoder.chunkbuffer[0].obj, payload)
+
+    def test_validate_payload(self):
+        """ Test if payloads are validated by their size in bytes, whatever their type.
+        """
+
+        verbs.validate_payload(bytearray(2 ** 15))
+        verbs.validate_payload(memoryview(bytes(2 ** 15)))
+
+        with self.assertRaises(ValueError):
+            verbs.validate_payload(memoryview(bytearray(2 ** 15 + 1)))
+
+        with self.assertRaises(ValueError):
+            # 2 ** 14 items, but 2 ** 16 bytes
+            verbs.validate_payload(memoryview(bytearray(2 ** 16)).cast('I'))
+
+        with self.assertRaises(ValueError):
+            verbs.validate_payload(memoryview(bytes(10))[::2])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_validate_payload_fortran_order(self):
+        """ Test if buffers that are only contiguous in Fortran order are refused, as the encoder
+        can't send them as they are.
+        """
+
+        array = numpy.asfortranarray(numpy.arange(12, dtype=numpy.int32).reshape(3, 4))
+
+        with self.assertRaises(ValueError):
+            verbs.validate_payload(memoryview(array))
+
+        verbs.validate_payload(memoryview(numpy.ascontiguousarray(array)))
+
+        with self.assertRaises(ValueError):
+            verbs.validate_payload('string')
@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import Mock
+
+from nervix.util.slots import SlotTable
+
+
+class Test(unittest.TestCase):
+
+    def test_add_get_1(self):
+        table = SlotTable()
+
+        handler1 = Mock()
+        handler2 = Mock()
+
+        ref1 = table.add(handler1)
+        ref2 = table.add(handler2)
+
+        self.assertEqual(ref1, 1)
+        self.assertEqual(ref2, 2)
+        self.assertIs(table.get(ref1), handler1)
+        self.assertIs(table.get(ref2), handler2)
+        self.assertEqual(len(table), 2)
+
+    def test_remove_1(self):
+        table = SlotTable()
+
+        ref = table.add(Mock())
+        table.remove(ref)
+
+        self.assertIsNone(table.get(ref))
+        self.assertNotIn(ref, table)
+        self.assertEqual(len(table), 0)
+
+    def test_reuse_1(self):
+        """ Test if a freed slot is reused, but with a reference that differs from the old one.
+        """
+
+        table = SlotTable()
+
+        old_ref = table.add(Mock())
+        table.remove(old_ref)
+
+        handler = Mock()
+        new_ref = table.add(handler)
+
+        self.assertNotEqual(old_ref, new_ref)
+        self.assertEqual(len(table.handlers), 2)
+        self.assertIsNone(table.get(old_ref))
+        self.assertIs(table.get(new_ref), handler)
+
+        # removing the old reference again must not affect the new one
+        table.remove(old_ref)
+        self.assertIs(table.get(new_ref), handler)
+
+    def test_wraparound_1(self):
+        """ Test if references stay within 32 bits when a slot is reused many times.
+        """
+
+        table = SlotTable(slot_bits=22)
+
+        seen = set()
+        for _ in range(3000):
+            ref = table.add(Mock())
+            self.assertGreater(ref, 0)
+            self.assertLess(ref, 2 ** 32)
+            seen.add(ref)
+            table.remove(ref)
+
+        # all 1024 generations of slot 1 have been used
+        self.assertEqual(len(seen), 1024)
+
+    def test_overflow_1(self):
+        table = SlotTable(slot_bits=2)
+
+        for _ in range(3):
+            table.add(Mock())
+
+        with self.assertRaises(OverflowError):
+            table.add(Mock())
+
+    def test_unknown_ref_1(self):
+        table = SlotTable()
+
+        self.assertIsNone(table.get(12345))
+        table.remove(12345)
+        self.assertEqual(len(table), 0)
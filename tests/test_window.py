@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import Mock
+
+from nervix.window import RequestWindow, AimdLimit
+
+
+class Test(unittest.TestCase):
+
+    def test_window_fifo_1(self):
+        """ Test if waiting requests are started in the order they entered the window.
+        """
+
+        window = RequestWindow()
+        window.set_limit(1)
+
+        order = []
+        window.enter('a', lambda: order.append(1))
+        window.enter('b', lambda: order.append(2))
+        window.enter('a', lambda: order.append(3))
+
+        self.assertEqual(order, [1])
+
+        window.leave('a')
+        self.assertEqual(order, [1, 2])
+
+        window.leave('b')
+        self.assertEqual(order, [1, 2, 3])
+
+    def test_window_name_limit_1(self):
+        """ Test if a name that is at its limit does not hold back other names.
+        """
+
+        window = RequestWindow()
+        window.set_limit(1, 'a')
+
+        start_a = Mock()
+        start_b = Mock()
+
+        window.enter('a', Mock())
+        waiter = window.enter('a', start_a)
+        window.enter('b', start_b)
+
+        start_a.assert_not_called()
+        start_b.assert_called_once()
+
+        window.cancel(waiter)
+        window.leave('a')
+
+        start_a.assert_not_called()
+        self.assertEqual(window.stats()['queued_requests'], 0)
+
+    def test_window_raise_limit_1(self):
+        """ Test if raising the limit starts waiting requests.
+        """
+
+        window = RequestWindow()
+        window.set_limit(1)
+
+        start = Mock()
+        window.enter('a', Mock())
+        window.enter('a', start)
+
+        start.assert_not_called()
+
+        window.set_limit(None)
+
+        start.assert_called_once()
+
+    def test_aimd_increase_1(self):
+        """ Test if the limit grows while latency is stable and the window is used.
+        """
+
+        limit = AimdLimit(initial=4)
+
+        for _ in range(100):
+            limit.update(0.010, True, int(limit))
+
+        self.assertGreater(int(limit), 4)
+
+    def test_aimd_no_increase_when_idle(self):
+        """ Test if the limit does not grow when the window is not used.
+        """
+
+        limit = AimdLimit(initial=4)
+
+        for _ in range(100):
+            limit.update(0.010, True, 1)
+
+        self.assertEqual(int(limit), 4)
+
+    def test_aimd_backoff_latency(self):
+        """ Test if the limit shrinks when the latency rises.
+        """
+
+        limit = AimdLimit(initial=20)
+
+        for _ in range(10):
+            limit.update(0.010, True, 10)
+
+        before = limit.limit
+
+        for _ in range(50):
+            limit.update(0.100, True, 10)
+
+        self.assertLess(limit.limit, before)
+
+    def test_aimd_backoff_failure(self):
+        """ Test if a failure backs off once per window of requests in flight.
+        """
+
+        limit = AimdLimit(initial=10, backoff=0.5)
+        limit.update(0.010, True, 1)
+
+        limit.update(1.0, False, 4)
+        self.assertEqual(int(limit), 5)
+
+        # responses of requests that were already in flight don't back off again
+        limit.update(1.0, False, 3)
+        limit.update(1.0, False, 2)
+        limit.update(1.0, False, 1)
+        self.assertEqual(int(limit), 5)
+
+        limit.update(1.0, False, 1)
+        self.assertEqual(int(limit), 2)
+
+    def test_aimd_minimum(self):
+        limit = AimdLimit(initial=2, minimum=1, backoff=0.1)
+
+        for _ in range(10):
+            limit.update(1.0, False, 1)
+
+        self.assertEqual(int(limit), 1)
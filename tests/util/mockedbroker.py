@@ -0,0 +1,51 @@
+from nervix.channel import Channel
+from nervix import verbs
+
+from tests.util.mockedconnection import MockedConnection
+
+
+class MockedBroker:
+    """ Two channels that are connected to each other the way the server would connect them. Requests
+    of the requester channel are passed as calls to the session channel, and posts of the session
+    channel are passed back as messages, when pump() is called.
+    """
+
+    def __init__(self, loop=None):
+        self.requester_conn = MockedConnection()
+        self.requester = Channel(self.requester_conn, loop=loop)
+
+        self.session_conn = MockedConnection()
+        self.session = Channel(self.session_conn, loop=loop)
+
+        self.requester_conn.mock_connection_ready(True)
+        self.session_conn.mock_connection_ready(True)
+
+        # number of requests passed to the session channel
+        self.nr_requests = 0
+
+    def pump(self):
+        """ Pass verbs between both channels until neither has anything left to send.
+        """
+
+        while self.requester_conn.upstream_verbs or self.session_conn.upstream_verbs:
+
+            while self.requester_conn.upstream_verbs:
+                verb = self.requester_conn.upstream_verbs.popleft()
+                self.nr_requests += 1
+
+                self.session_conn.mock_downstream_verb(verbs.CallVerb(
+                    unidirectional=verb.unidirectional,
+                    postref=verb.messageref or 0,
+                    name=verb.name,
+                    payload=verb.payload,
+                ))
+
+            while self.session_conn.upstream_verbs:
+                verb = self.session_conn.upstream_verbs.popleft()
+
+                if isinstance(verb, verbs.PostVerb):
+                    self.requester_conn.mock_downstream_verb(verbs.MessageVerb(
+                        messageref=verb.postref,
+                        status=verbs.MessageVerb.STATUS_OK,
+                        payload=verb.payload,
+                    ))
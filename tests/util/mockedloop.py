@@ -0,0 +1,70 @@
+import time
+
+
+class MockedLoop:
+    """ Mainloop replacement that only supports timers and scheduled calls. Timers are expired by
+    calling run_timers(), which is best used together with patch_time(). Scheduled calls are run by
+    calling run_calls().
+    """
+
+    def __init__(self):
+        self.timers = list()
+        self.pending_calls = list()
+
+    def now(self):
+        return time.monotonic()
+
+    def timer(self):
+        timer = MockedTimer(self)
+        self.timers.append(timer)
+        return timer
+
+    def call_soon(self, func, *args, **kwargs):
+        self.pending_calls.append((func, args, kwargs))
+
+    def run_calls(self):
+        """ Run all scheduled calls, returns the number of calls that were run.
+        """
+
+        calls = self.pending_calls
+        self.pending_calls = list()
+
+        for func, args, kwargs in calls:
+            func(*args, **kwargs)
+
+        return len(calls)
+
+    def run_timers(self):
+        """ Call the handlers of all timers that have expired.
+        Returns the number of timers that expired.
+        """
+
+        n = 0
+        for timer in list(self.timers):
+            if timer.deadline is not None and timer.deadline <= self.now():
+                timer.deadline = None
+                n += 1
+                timer.handler(*timer.handler_args, **timer.handler_kwargs)
+
+        return n
+
+
+class MockedTimer:
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.deadline = None
+        self.handler = None
+        self.handler_args = ()
+        self.handler_kwargs = {}
+
+    def set_handler(self, handler=None, *args, **kwargs):
+        self.handler = handler
+        self.handler_args = args
+        self.handler_kwargs = kwargs
+
+    def set(self, timeout):
+        self.deadline = self.loop.now() + timeout
+
+    def cancel(self):
+        self.deadline = None